@@ -1,30 +1,238 @@
-from flask import Flask, request, jsonify, send_from_directory
+from flask import Flask, Response, request, jsonify, send_from_directory, make_response
 from flask_cors import CORS
-from datetime import datetime, timedelta
+from datetime import timedelta
 import os
+import atexit
+import logging
+import threading
+import time
 from pathlib import Path
 
 from config import Config
-from database import Database
-from vector_store import VectorStore
-from llm_extraction.llm_service import LLMService
-from processing.intent_processor import IntentProcessor
-from processing.sync_orchestrator import SyncOrchestrator
-from visualizer.day_view_generator import DayViewGenerator
-
+from compression import enable_compression
+from json_provider import configure_json
+from log_config import setup_logging, get_logger, LogSampler
+from metrics import REGISTRY, PROMETHEUS_CONTENT_TYPE, instrument_flask
+from tracing import setup_tracing, instrument_flask as instrument_tracing
+from utils import decode_cursor, encode_cursor, local_today, normalize_item_updates, parse_bool, split_tags
 app = Flask(__name__)
 CORS(app, resources={r"/*": {"origins": "*"}})
+configure_json(app)
+
+setup_logging()
+setup_tracing()
+logger = get_logger('api')
+item_sampler = LogSampler(Config.LOG_ITEM_SAMPLE_EVERY)
+
+instrument_tracing(app)
+if Config.METRICS_ENABLED:
+    instrument_flask(app)
+if Config.COMPRESS_ENABLED:
+    enable_compression(app)
 
 BASE_DIR = Path(__file__).resolve().parent
-STATIC_DIR = BASE_DIR / 'static' / 'visualizations'
+STATIC_DIR = Path(Config.VISUALIZATION_DIR)
+
+class LazyService:
+    """
+    Stand-in for a service that is built on first attribute access.
+    
+    Routes use the module-level names below as if they were the services
+    themselves. The heavy imports (chromadb and its embedding model, PIL,
+    requests) and constructors run the first time a request needs them, or
+    in warm_up_services(), so importing this module and serving /health
+    stay fast.
+    """
+    
+    def __init__(self, name: str, factory):
+        self._name = name
+        self._factory = factory
+        self._instance = None
+        self._lock = threading.Lock()
+    
+    def resolve(self):
+        instance = self._instance
+        if instance is None:
+            with self._lock:
+                if self._instance is None:
+                    start = time.perf_counter()
+                    self._instance = self._factory()
+                    logger.info("Service initialized", extra={
+                        'service': self._name,
+                        'ms': round((time.perf_counter() - start) * 1000, 1)
+                    })
+                instance = self._instance
+        return instance
+    
+    @property
+    def initialized(self) -> bool:
+        return self._instance is not None
+    
+    def __getattr__(self, attr):
+        return getattr(self.resolve(), attr)
+
+def _build_database():
+    from database import Database
+    return Database(Config.DATABASE_PATH)
+
+def _build_vector_store():
+    from vector_store import VectorStore
+    return VectorStore()
+
+def _build_llm_service():
+    from llm_extraction.llm_service import LLMService
+    return LLMService()
+
+def _build_reindex_scheduler():
+    from processing.reindex_scheduler import ReindexScheduler
+    return ReindexScheduler(db, vector_store, delay=Config.REINDEX_DEBOUNCE_SECONDS)
+
+def _build_processor():
+    from processing.intent_processor import IntentProcessor
+    return IntentProcessor(db, vector_store, reindex_scheduler)
+
+def _build_sync_orchestrator():
+    from processing.sync_orchestrator import SyncOrchestrator
+    return SyncOrchestrator(db, llm_service, use_mock=Config.USE_MOCK_DATA)
+
+def _build_visualization_store():
+    from visualizer.storage import VisualizationStore
+    return VisualizationStore(
+        str(STATIC_DIR),
+        max_bytes=Config.VISUALIZATION_CACHE_MAX_MB * 1024 * 1024,
+        memory_bytes=Config.VISUALIZATION_MEMORY_CACHE_MB * 1024 * 1024
+    )
+
+def _build_visualizer():
+    from visualizer.day_view_generator import DayViewGenerator
+    return DayViewGenerator(
+        output_dir=str(STATIC_DIR),
+        compress_level=Config.PNG_COMPRESS_LEVEL,
+        fast_compress_level=Config.PNG_FAST_COMPRESS_LEVEL,
+        storage=visualization_store
+    )
+
+def _build_range_visualizer():
+    from visualizer.range_view_generator import RangeViewGenerator
+    return RangeViewGenerator(visualizer, max_workers=Config.VISUALIZER_WORKERS or None)
+
+# Shared services (see init_services; rebuilt per worker after a fork)
+db = None
+vector_store = None
+llm_service = None
+reindex_scheduler = None
+processor = None
+sync_orchestrator = None
+visualization_store = None
+visualizer = None
+range_visualizer = None
+
+# Built in this order by warm_up_services; dependencies come first
+SERVICE_FACTORIES = {
+    'db': _build_database,
+    'vector_store': _build_vector_store,
+    'llm_service': _build_llm_service,
+    'reindex_scheduler': _build_reindex_scheduler,
+    'processor': _build_processor,
+    'sync_orchestrator': _build_sync_orchestrator,
+    'visualization_store': _build_visualization_store,
+    'visualizer': _build_visualizer,
+    'range_visualizer': _build_range_visualizer
+}
+
+def init_services():
+    """Install (unbuilt) lazy services for the routes"""
+    module_globals = globals()
+    for name, factory in SERVICE_FACTORIES.items():
+        module_globals[name] = LazyService(name, factory)
+
+def warm_up_services():
+    """Build every service now instead of on the first request that needs it"""
+    start = time.perf_counter()
+    module_globals = globals()
+    for name in SERVICE_FACTORIES:
+        try:
+            module_globals[name].resolve()
+        except Exception:
+            logger.exception("Service warm-up failed", extra={'service': name})
+    logger.info("Services warmed up", extra={'ms': round((time.perf_counter() - start) * 1000, 1)})
+
+def start_warm_up(mode: str = None):
+    """
+    Entry-point hook for SERVICE_WARMUP: 'off' (build on first use),
+    'background' (build in a daemon thread while requests are already
+    served) or 'eager' (build before returning).
+    """
+    mode = (mode or Config.SERVICE_WARMUP).lower()
+    if mode == 'eager':
+        warm_up_services()
+    elif mode == 'background':
+        threading.Thread(target=warm_up_services, name='service-warmup', daemon=True).start()
+
+def reinit_after_fork():
+    """
+    Reset services in a forked server worker.
+    
+    The chromadb client, the reindex timer thread, the SQLite writer
+    thread, the tile process pool and the storage index lock all belong
+    to the process that created them, so a preloaded parent's instances
+    must not be used in the child.
+    The same goes for the logging queue listener and span export threads,
+    and for the event bus (its ids carry a per-process boot id).
+    """
+    setup_logging(force=True)
+    setup_tracing(force=True)
+    from events import BUS
+    BUS.reset()
+    init_services()
+    start_warm_up()
+
+def shutdown_services():
+    """Flush pending work before the process exits (only for services that were built)"""
+    if reindex_scheduler.initialized:
+        reindex_scheduler.flush()
+    if visualization_store.initialized:
+        visualization_store.save(force=True)
+    if range_visualizer.initialized:
+        range_visualizer.shutdown()
+    if db.initialized:
+        db.close()
 
-# Initialize services
-db = Database(Config.DATABASE_PATH)
-vector_store = VectorStore()
-llm_service = LLMService()
-processor = IntentProcessor(db, vector_store)
-sync_orchestrator = SyncOrchestrator(db, llm_service, use_mock=Config.USE_MOCK_DATA)
-visualizer = DayViewGenerator(output_dir=str(STATIC_DIR))
+init_services()
+atexit.register(shutdown_services)
+
+def request_include_archived() -> bool:
+    """Archived items are left out unless the request asks for them (?include_archived=true)"""
+    return parse_bool(request.args.get('include_archived'))
+
+def request_tags():
+    """Tag filter from the query string: ?tag=a&tag=b or ?tags=a,b (items must carry all)"""
+    return split_tags(request.args.getlist('tag') + request.args.get('tags', '').split(','))
+
+def items_etag(*parts) -> str:
+    """Weak validator for item listings: the DB items_version plus anything else the body depends on"""
+    return '-'.join(['items', str(db.get_items_version()), *map(str, parts)])
+
+def not_modified(etag: str):
+    """304 for a matching If-None-Match (answered before the items table is read), else None"""
+    if request.if_none_match.contains_weak(etag):
+        response = make_response('', 304)
+        response.set_etag(etag, weak=True)
+        return response
+    return None
+
+def with_etag(response, etag: str):
+    response.set_etag(etag, weak=True)
+    # Cacheable, but revalidated on every use so polling clients get 304s
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    """Prometheus scrape endpoint (this process only)"""
+    if not Config.METRICS_ENABLED:
+        return jsonify({"error": "Metrics are disabled"}), 404
+    return Response(REGISTRY.render(), content_type=PROMETHEUS_CONTENT_TYPE)
 
 @app.route('/health', methods=['GET'])
 def health():
@@ -39,7 +247,8 @@ def health():
         "database": {
             "path": Config.DATABASE_PATH,
             "exists": os.path.exists(Config.DATABASE_PATH)
-        }
+        },
+        "services": {name: globals()[name].initialized for name in SERVICE_FACTORIES}
     })
 
 @app.route('/api/parse', methods=['POST'])
@@ -52,13 +261,11 @@ def parse_input():
         if not user_input:
             return jsonify({"success": False, "error": "No input provided"}), 400
         
-        print(f"Parsing input: '{user_input}'")
+        logger.debug("Parsing input", extra={'input_chars': len(user_input)})
         llm_result = llm_service.parse_natural_language(user_input)
-        print(f" LLM result: {llm_result.get('success')}")
         
         if not llm_result['success']:
-            print(f" LLM failed: {llm_result.get('error')}")
-            print(f"   Details: {llm_result.get('details')}")
+            logger.warning("LLM failed: %s", llm_result.get('error'), extra={'details': llm_result.get('details')})
             return jsonify({
                 "success": False,
                 "error": llm_result.get('error', 'LLM processing failed'),
@@ -66,10 +273,10 @@ def parse_input():
             }), 500
         
         items = llm_result['data'].get('items', [])
-        print(f" Extracted {len(items)} items")
+        logger.debug("Extracted items", extra={'count': len(items)})
         
         if not items:
-            print("No items extracted from LLM response")
+            logger.info("No items extracted from LLM response")
             return jsonify({
                 "success": False,
                 "error": "No items extracted from input",
@@ -77,24 +284,8 @@ def parse_input():
             }), 400
         
         # Validate and normalize items
-        validated_items = []
-        for item in items:
-            if not isinstance(item, dict):
-                continue
-            if 'type' not in item or 'title' not in item:
-                continue
-            
-            validated_item = {
-                'type': item.get('type', 'task'),
-                'title': item.get('title', 'Untitled'),
-                'description': item.get('description'),
-                'datetime': item.get('datetime'),
-                'priority': item.get('priority', 'medium'),
-                'tags': item.get('tags', []),
-                'completed': item.get('completed', False),
-                'source': 'manual'
-            }
-            validated_items.append(validated_item)
+        from processing.intent_processor import IntentProcessor
+        validated_items = IntentProcessor.normalize_items(items, source='manual')
         
         if not validated_items:
             return jsonify({
@@ -111,10 +302,7 @@ def parse_input():
             "count": len(created_items)
         })
     except Exception as e:
-        import traceback
-        error_trace = traceback.format_exc()
-        print(f"Error in parse_input: {str(e)}")
-        print(f"Traceback: {error_trace}")
+        logger.exception("Error in parse_input")
         return jsonify({
             "success": False,
             "error": "Server error",
@@ -125,23 +313,146 @@ def parse_input():
 def get_items():
     """Get all items"""
     try:
+        etag = items_etag()
+        cached = not_modified(etag)
+        if cached:
+            return cached
+        
         item_type = request.args.get('type')
-        items = db.get_all_items(item_type)
+        items = db.get_all_items(item_type, tags=request_tags(), include_archived=request_include_archived())
         
-        return jsonify({
+        return with_etag(jsonify({
             "success": True,
             "items": items,
             "count": len(items)
+        }), etag)
+    except Exception as e:
+        logger.exception("Error getting items")
+        return jsonify({"success": False, "error": str(e)}), 500
+
+@app.route('/api/items/changes', methods=['GET'])
+def get_item_changes():
+    """Items changed and ids deleted since a cursor (omit `since` for a full snapshot)"""
+    try:
+        try:
+            since = decode_cursor(request.args.get('since'))
+        except ValueError as e:
+            return jsonify({"success": False, "error": str(e)}), 400
+        limit = min(request.args.get('limit', Config.CHANGES_PAGE_SIZE, type=int), Config.CHANGES_PAGE_SIZE)
+        
+        changes = db.get_changes(since, limit=max(limit, 1))
+        
+        return jsonify({
+            "success": True,
+            "upserts": changes['upserts'],
+            "deletions": changes['deletions'],
+            "cursor": encode_cursor(changes['cursor']),
+            "has_more": changes['has_more'],
+            "reset": changes['reset']
+        })
+    except Exception as e:
+        logger.exception("Error getting item changes")
+        return jsonify({"success": False, "error": str(e)}), 500
+
+@app.route('/api/events', methods=['GET'])
+def events_stream():
+    """Server-sent events: item.created/updated/deleted and sync.progress"""
+    from events import BUS, parse_last_event_id, stream
+    
+    # Every stream pins a server thread here (asgi.py serves them on the event loop instead)
+    if BUS.blocking_subscribers >= Config.EVENTS_MAX_BLOCKING_SUBSCRIBERS:
+        response = jsonify({"success": False, "error": "Too many event streams; serve with uvicorn (asgi.py) for more"})
+        response.status_code = 503
+        response.headers['Retry-After'] = str(int(Config.EVENTS_RETRY_MS / 1000) or 1)
+        return response
+    
+    last_event_id = parse_last_event_id(request.headers.get('Last-Event-ID') or request.args.get('last_event_id'))
+    BUS.watch_version(db.get_items_version)
+    subscription = BUS.subscribe(last_event_id)
+    response = Response(stream(subscription), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    # Keep reverse proxies (nginx) from buffering the stream
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+@app.route('/api/tags', methods=['GET'])
+def get_tags():
+    """Tag cardinalities: how many items carry each tag"""
+    try:
+        prefix = request.args.get('prefix')
+        limit = request.args.get('limit', type=int)
+        tags = db.get_tag_counts(prefix=prefix, limit=limit)
+        
+        return jsonify({
+            "success": True,
+            "tags": tags,
+            "count": len(tags)
+        })
+    except Exception as e:
+        logger.exception("Error getting tags")
+        return jsonify({"success": False, "error": str(e)}), 500
+
+# Columns a bulk update may set
+BULK_UPDATABLE_FIELDS = ('type', 'title', 'description', 'datetime', 'priority', 'tags', 'completed')
+
+@app.route('/api/items/bulk', methods=['POST'])
+def bulk_items():
+    """Update, complete or delete many items in one transaction, with a result per id"""
+    try:
+        data = request.get_json() or {}
+        action = data.get('action')
+        ids = data.get('ids')
+        
+        if action not in ('update', 'complete', 'delete'):
+            return jsonify({"success": False, "error": "action must be 'update', 'complete' or 'delete'"}), 400
+        if not isinstance(ids, list) or not ids or not all(isinstance(i, int) and not isinstance(i, bool) for i in ids):
+            return jsonify({"success": False, "error": "ids must be a non-empty list of integers"}), 400
+        # Repeated ids get one result
+        ids = list(dict.fromkeys(ids))
+        if len(ids) > Config.BULK_MAX_ITEMS:
+            return jsonify({"success": False, "error": f"At most {Config.BULK_MAX_ITEMS} ids per request"}), 400
+        
+        if action == 'delete':
+            done = processor.delete_items(ids)
+        else:
+            if action == 'complete':
+                updates = {'completed': parse_bool(data.get('completed', True))}
+            else:
+                updates = data.get('updates') or {}
+                if not isinstance(updates, dict) or not updates or any(key not in BULK_UPDATABLE_FIELDS for key in updates):
+                    return jsonify({
+                        "success": False,
+                        "error": f"updates must set some of: {', '.join(BULK_UPDATABLE_FIELDS)}"
+                    }), 400
+                try:
+                    updates = normalize_item_updates(updates)
+                except ValueError as e:
+                    return jsonify({"success": False, "error": str(e)}), 400
+            done = processor.update_items(ids, updates)
+        
+        done = set(done)
+        results = [
+            {"id": item_id, "success": True} if item_id in done else
+            {"id": item_id, "success": False, "error": "Item not found"}
+            for item_id in ids
+        ]
+        
+        return jsonify({
+            "success": True,
+            "action": action,
+            "results": results,
+            "succeeded": len(done),
+            "failed": len(ids) - len(done)
         })
     except Exception as e:
-        print(f"Error getting items: {str(e)}")
+        logger.exception("Error in bulk_items")
         return jsonify({"success": False, "error": str(e)}), 500
 
 @app.route('/api/items/<int:item_id>', methods=['GET'])
 def get_item(item_id):
     """Get single item"""
     try:
-        item = db.get_item_by_id(item_id)
+        item = db.get_item_by_id(item_id, include_archived=request_include_archived())
         
         if not item:
             return jsonify({"success": False, "error": "Item not found"}), 404
@@ -151,35 +462,35 @@ def get_item(item_id):
             "item": item
         })
     except Exception as e:
-        print(f"Error getting item: {str(e)}")
+        logger.exception("Error getting item", extra={'item_id': item_id})
         return jsonify({"success": False, "error": str(e)}), 500
 
 @app.route('/api/items/<int:item_id>', methods=['PUT'])
 def update_item(item_id):
     """Update item"""
     try:
-        data = request.get_json()
-        success = db.update_item(item_id, data)
+        try:
+            data = normalize_item_updates(request.get_json())
+        except ValueError as e:
+            return jsonify({"success": False, "error": str(e)}), 400
+        updated_item = processor.update_item(item_id, data)
         
-        if not success:
+        if not updated_item:
             return jsonify({"success": False, "error": "Item not found"}), 404
         
-        updated_item = db.get_item_by_id(item_id)
-        
         return jsonify({
             "success": True,
             "item": updated_item
         })
     except Exception as e:
-        print(f" Error updating item: {str(e)}")
+        logger.exception("Error updating item", extra={'item_id': item_id})
         return jsonify({"success": False, "error": str(e)}), 500
 
 @app.route('/api/items/<int:item_id>', methods=['DELETE'])
 def delete_item(item_id):
     """Delete item"""
     try:
-        vector_store.delete_item(item_id)
-        success = db.delete_item(item_id)
+        success = processor.delete_item(item_id)
         
         if not success:
             return jsonify({"success": False, "error": "Item not found"}), 404
@@ -189,7 +500,7 @@ def delete_item(item_id):
             "message": "Item deleted"
         })
     except Exception as e:
-        print(f"Error deleting item: {str(e)}")
+        logger.exception("Error deleting item", extra={'item_id': item_id})
         return jsonify({"success": False, "error": str(e)}), 500
 
 @app.route('/api/search', methods=['POST'])
@@ -202,14 +513,12 @@ def search():
         if not query:
             return jsonify({"success": False, "error": "No query provided"}), 400
         
-        results = vector_store.search(query, n_results=10)
-        
-        items = []
-        for result in results:
-            item = db.get_item_by_id(result['id'])
-            if item:
-                item['relevance_score'] = 1 - result['distance'] if result['distance'] else None
-                items.append(item)
+        # Tags narrow the candidates via the item_tags index before hydration
+        tags = split_tags(data.get('tags')) or request_tags()
+        include_archived = parse_bool(data.get('include_archived')) or request_include_archived()
+        allowed_ids = db.get_item_ids_by_tags(tags, include_archived) if tags else None
+        results = vector_store.search(query, n_results=10, allowed_ids=allowed_ids, include_archived=include_archived)
+        items = processor.hydrate_search_results(results, include_archived)
         
         return jsonify({
             "success": True,
@@ -218,16 +527,15 @@ def search():
             "count": len(items)
         })
     except Exception as e:
-        print(f"Error in search: {str(e)}")
+        logger.exception("Error in search")
         return jsonify({"success": False, "error": str(e)}), 500
 
 @app.route('/api/sync', methods=['POST'])
 def sync_external_data():
     """Sync calendar and email data"""
     try:
-        print("Starting sync...")
         result = sync_orchestrator.sync_all()
-        print(f"Sync complete: {result}")
+        logger.info("Sync complete", extra=result)
         
         return jsonify({
             'success': True,
@@ -235,23 +543,60 @@ def sync_external_data():
             'message': f"Synced {result['total']} items ({result['calendar']} calendar + {result['email']} email)"
         })
     except Exception as e:
-        print(f"Sync error: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Sync error")
         return jsonify({
             'success': False,
             'error': str(e)
         }), 500
 
+@app.route('/api/archive', methods=['POST'])
+def archive_items():
+    """Move completed items older than `older_than_days` (default ARCHIVE_AFTER_DAYS) to the archive"""
+    try:
+        data = request.get_json(silent=True) or {}
+        older_than_days = data.get('older_than_days', Config.ARCHIVE_AFTER_DAYS)
+        if isinstance(older_than_days, bool) or not isinstance(older_than_days, (int, float)) or older_than_days < 0:
+            return jsonify({"success": False, "error": "older_than_days must be a non-negative number"}), 400
+        
+        result = processor.archive_items(older_than_days, Config.ARCHIVE_BATCH_SIZE)
+        return jsonify({"success": True, **result})
+    except Exception as e:
+        logger.exception("Error archiving items")
+        return jsonify({"success": False, "error": str(e)}), 500
+
+@app.route('/api/export', methods=['GET'])
+def export_items():
+    """Stream every item as NDJSON (?embeddings=true adds vectors, ?include_archived=true the archive)"""
+    from backup_items import iter_export
+    
+    include_embeddings = parse_bool(request.args.get('embeddings'))
+    body = iter_export(
+        db,
+        vector_store if include_embeddings else None,
+        include_archived=request_include_archived(),
+        page_size=Config.EXPORT_PAGE_SIZE
+    )
+    response = Response(body, mimetype='application/x-ndjson')
+    response.headers['Content-Disposition'] = f"attachment; filename=items-{time.strftime('%Y%m%d-%H%M%S')}.ndjson"
+    return response
+
 @app.route('/api/items/grouped', methods=['GET'])
 def get_items_grouped():
     """Get items grouped by day (today/tomorrow/upcoming)"""
     try:
         view = request.args.get('view', 'all')
+        # Buckets move at midnight even when no item changed
+        today = local_today()
+        etag = items_etag(today.isoformat())
+        cached = not_modified(etag)
+        if cached:
+            return cached
+        
         all_items = db.get_all_items()
         
-        today = datetime.now().date()
-        tomorrow = (datetime.now() + timedelta(days=1)).date()
+        # Bucket on the stored local_date; no per-item datetime parsing
+        today_key = today.isoformat()
+        tomorrow_key = (today + timedelta(days=1)).isoformat()
         
         grouped = {
             'today': [],
@@ -259,44 +604,31 @@ def get_items_grouped():
             'upcoming': []
         }
         
-        print(f"\n Grouping {len(all_items)} items...")
-        print(f"   Today: {today}")
-        print(f"   Tomorrow: {tomorrow}")
+        debug_items = logger.isEnabledFor(logging.DEBUG)
         
         for item in all_items:
-            if not item.get('datetime'):
-                grouped['upcoming'].append(item)
-                continue
+            item_date = item.get('local_date')
+            if item_date == today_key:
+                bucket = 'today'
+            elif item_date == tomorrow_key:
+                bucket = 'tomorrow'
+            else:
+                # Future, past and undated items all land in upcoming
+                bucket = 'upcoming'
+            grouped[bucket].append(item)
             
-            try:
-                item_date = datetime.fromisoformat(item['datetime']).date()
-                
-                print(f"   Item: '{item['title'][:30]}' -> Date: {item_date}")
-                
-                if item_date == today:
-                    print(f"Added to TODAY")
-                    grouped['today'].append(item)
-                elif item_date == tomorrow:
-                    print(f"Added to TOMORROW")
-                    grouped['tomorrow'].append(item)
-                elif item_date > tomorrow:
-                    print(f" Added to UPCOMING")
-                    grouped['upcoming'].append(item)
-                else:
-                    print(f" Past date, added to UPCOMING")
-                    grouped['upcoming'].append(item)
-            except Exception as date_error:
-                print(f"Date parse error: {date_error}")
-                grouped['upcoming'].append(item)
-        
-        print(f"\n   Results: Today={len(grouped['today'])}, Tomorrow={len(grouped['tomorrow'])}, Upcoming={len(grouped['upcoming'])}\n")
+            if debug_items and item_sampler():
+                logger.debug("Grouped item", extra={'item_id': item['id'], 'date': item_date, 'bucket': bucket})
+        
+        if debug_items:
+            logger.debug("Grouped items", extra={k: len(v) for k, v in grouped.items()})
         
         if view == 'all':
-            return jsonify({'success': True, 'items': grouped})
+            return with_etag(jsonify({'success': True, 'items': grouped}), etag)
         else:
-            return jsonify({'success': True, 'items': grouped.get(view, [])})
+            return with_etag(jsonify({'success': True, 'items': grouped.get(view, [])}), etag)
     except Exception as e:
-        print(f"Error in get_items_grouped: {str(e)}")
+        logger.exception("Error in get_items_grouped")
         return jsonify({"success": False, "error": str(e)}), 500
 
 @app.route('/api/visualize/day', methods=['POST'])
@@ -304,42 +636,143 @@ def visualize_day():
     """Generate visual day view image"""
     try:
         data = request.get_json() or {}
-        date = data.get('date', datetime.now().strftime('%Y-%m-%d'))
-        
-        print(f"Generating visualization for {date}...")
-        
-        start_datetime = f"{date}T00:00:00"
-        end_datetime = f"{date}T23:59:59"
-        
-        day_items = db.get_items_by_date_range(start_datetime, end_datetime)
-        print(f"Found {len(day_items)} items for {date}")
-        
-        # Generate image
-        image_url = visualizer.generate(date, day_items)
-        print(f"Generated image: {image_url}")
-        
-        return jsonify({
+        date = data.get('date', local_today().isoformat())
+        output_format = data.get('format', 'png')
+        fast_encode = bool(data.get('fast', False))
+        
+        from visualizer.day_view_generator import OUTPUT_FORMATS
+        if output_format not in OUTPUT_FORMATS:
+            return jsonify({"success": False, "error": f"format must be one of {', '.join(OUTPUT_FORMATS)}"}), 400
+        
+        day_items = db.get_items_by_local_dates(date, date)
+        
+        cache_key = visualizer.cache_key(date, day_items)
+        # The image_url differs per format; fast_encode only changes the bytes behind it
+        etag = f"{cache_key}-{output_format}"
+        # Only while the image is stored: after an eviction the client's image_url would 404
+        if (request.if_none_match.contains(etag)
+                and visualizer.is_cached(f"day_view_{date}_{cache_key}.{output_format}")):
+            response = make_response('', 304)
+            response.set_etag(etag)
+            return response
+        
+        # Generate image (served from cache when the day is unchanged)
+        image_url = visualizer.generate(
+            date, day_items, key=cache_key,
+            output_format=output_format, fast_encode=fast_encode
+        )
+        logger.debug("Generated day view", extra={'date': date, 'items': len(day_items), 'image_url': image_url})
+        
+        response = jsonify({
             'success': True,
             'image_url': image_url,
+            'format': output_format,
             'date': date,
             'items_count': len(day_items)
         })
+        response.set_etag(etag)
+        return response
     except Exception as e:
-        print(f"Visualization error: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Visualization error")
         return jsonify({
             'success': False,
             'error': str(e)
         }), 500
 
+@app.route('/api/visualize/range', methods=['POST'])
+def visualize_range():
+    """Generate a week or month view from one range query"""
+    try:
+        data = request.get_json() or {}
+        view = data.get('view', 'week')
+        anchor = data.get('date', local_today().isoformat())
+        output = data.get('output', 'composite')
+        output_format = data.get('format', 'png')
+        
+        if output not in ('composite', 'tiles'):
+            return jsonify({"success": False, "error": "output must be 'composite' or 'tiles'"}), 400
+        
+        from visualizer.day_view_generator import OUTPUT_FORMATS
+        from visualizer.range_view_generator import range_for_view
+        if output_format not in OUTPUT_FORMATS or (output == 'composite' and output_format != 'png'):
+            return jsonify({"success": False, "error": "composite output is PNG only; use output='tiles' for SVG"}), 400
+        
+        try:
+            start_date, end_date = range_for_view(view, anchor)
+        except ValueError as e:
+            return jsonify({"success": False, "error": str(e)}), 400
+        
+        range_items = db.get_items_by_local_dates(start_date, end_date)
+        
+        # Everything in the response follows from the tiles' keys and the requested output
+        etag = f"{range_visualizer.cache_key(start_date, end_date, range_items)}-{view}-{output}-{output_format}"
+        # Only while every linked image is stored: after an eviction the client's URLs would 404
+        if request.if_none_match.contains(etag) and range_visualizer.is_cached(
+                start_date, end_date, range_items, output_format, composite=output == 'composite'):
+            response = make_response('', 304)
+            response.set_etag(etag)
+            return response
+        logger.debug("Generating range view", extra={'view': view, 'start': start_date, 'end': end_date, 'items': len(range_items)})
+        
+        result = {
+            'success': True,
+            'view': view,
+            'start_date': start_date,
+            'end_date': end_date,
+            'items_count': len(range_items)
+        }
+        
+        if output == 'composite':
+            image_url, tiles = range_visualizer.generate_composite(start_date, end_date, range_items)
+            result['image_url'] = image_url
+        else:
+            tiles = range_visualizer.generate_tiles(start_date, end_date, range_items, output_format)
+        
+        result['days'] = [{'date': day, **tile} for day, tile in sorted(tiles.items())]
+        
+        response = jsonify(result)
+        response.set_etag(etag)
+        return response
+    except Exception as e:
+        logger.exception("Range visualization error")
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+def _send_stored_visualization(stored_name: str, etag: str, mimetype: str):
+    """Send a content-addressed visualization, from memory when the store has it cached"""
+    visualization_store.touch(stored_name)
+    data = visualization_store.read(stored_name)
+    if data is None:
+        return send_from_directory(str(STATIC_DIR), stored_name, mimetype=mimetype, etag=etag, max_age=31536000)
+    
+    response = make_response(data)
+    response.mimetype = mimetype
+    response.set_etag(etag)
+    response.cache_control.public = True
+    response.cache_control.max_age = 31536000
+    return response.make_conditional(request)
+
 @app.route('/static/visualizations/<path:filename>')
 def serve_visualization(filename):
     """Serve generated visualizations"""
     try:
+        from visualizer.day_view_generator import DayViewGenerator
+        etag = DayViewGenerator.etag_for(filename)
+        if etag:
+            # Content-addressed file: the name changes whenever the image does
+            mimetype = 'image/svg+xml' if filename.endswith('.svg') else 'image/png'
+            if (filename.endswith('.svg') and request.accept_encodings['gzip']
+                    and visualization_store.contains(f"{filename}.gz")):
+                response = _send_stored_visualization(f"{filename}.gz", f"{etag}-gz", mimetype)
+                response.headers['Content-Encoding'] = 'gzip'
+                response.vary.add('Accept-Encoding')
+                return response
+            return _send_stored_visualization(filename, etag, mimetype)
         return send_from_directory(str(STATIC_DIR), filename)
     except Exception as e:
-        print(f"Error serving file: {str(e)}")
+        logger.warning("Error serving file %s: %s", filename, e)
         return jsonify({"error": "File not found"}), 404
 
 if __name__ == '__main__':
@@ -353,4 +786,5 @@ if __name__ == '__main__':
     print(f"Static Files: {STATIC_DIR}")
     print("="*60 + "\n")
     
-    app.run(debug=True, port=5000, host='0.0.0.0')
\ No newline at end of file
+    start_warm_up()
+    app.run(debug=Config.FLASK_DEBUG, port=Config.SERVER_PORT, host=Config.SERVER_HOST)
\ No newline at end of file
@@ -0,0 +1,60 @@
+"""
+Archive old completed items (hot/cold split).
+
+Completed items not updated for ARCHIVE_AFTER_DAYS (and, when dated,
+dated before then) move from `items` to `items_archive` in transactions
+of ARCHIVE_BATCH_SIZE rows, and their vectors move to the archive Chroma
+collection without re-embedding. Reads leave archived items out;
+/api/items, /api/items/<id> and /api/search include them with
+include_archived=true. POST /api/archive runs the same job in the server.
+
+    python archive_items.py
+    python archive_items.py --older-than-days 30 --batch-size 1000
+    python archive_items.py --status
+"""
+import argparse
+import os
+import sqlite3
+import sys
+
+from config import Config
+
+def archive_status(db_path: str) -> dict:
+    conn = sqlite3.connect(db_path)
+    try:
+        hot = conn.execute('SELECT COUNT(*) FROM items').fetchone()[0]
+        archived = conn.execute('SELECT COUNT(*) FROM items_archive').fetchone()[0]
+    finally:
+        conn.close()
+    return {'items': hot, 'archived': archived}
+
+def main():
+    parser = argparse.ArgumentParser(description="Move old completed items to the archive")
+    parser.add_argument('--older-than-days', type=float, default=Config.ARCHIVE_AFTER_DAYS)
+    parser.add_argument('--batch-size', type=int, default=Config.ARCHIVE_BATCH_SIZE, help="Items per write transaction")
+    parser.add_argument('--status', action='store_true', help="Show hot and archived item counts")
+    args = parser.parse_args()
+    
+    if not os.path.exists(Config.DATABASE_PATH):
+        print(f"Database not found: {Config.DATABASE_PATH}")
+        sys.exit(1)
+    
+    if args.status:
+        status = archive_status(Config.DATABASE_PATH)
+        print(f"{status['items']} items, {status['archived']} archived")
+        sys.exit(0)
+    
+    from database import Database
+    from processing.intent_processor import IntentProcessor
+    from vector_store import VectorStore
+    
+    db = Database(Config.DATABASE_PATH)
+    processor = IntentProcessor(db, VectorStore())
+    try:
+        result = processor.archive_items(args.older_than_days, args.batch_size)
+    finally:
+        db.close()
+    print(f"Archived {result['archived']} items ({result['vectors']} vectors moved)")
+
+if __name__ == '__main__':
+    main()
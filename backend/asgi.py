@@ -0,0 +1,175 @@
+"""
+ASGI entry point with async versions of the LLM-bound endpoints.
+
+/api/parse, /api/sync, /api/search and the /api/events stream are served
+natively on the event loop: Ollama calls go through a shared
+httpx.AsyncClient and blocking SQLite/Chroma work is pushed to a bounded
+thread pool, so in-flight requests waiting on the LLM (or idle event
+subscribers) do not each hold a thread. Every other route falls through
+to the Flask app unchanged.
+
+    uvicorn asgi:app --port 5000
+    python serve.py --server uvicorn
+"""
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.middleware.cors import CORSMiddleware
+from starlette.requests import Request
+from starlette.responses import JSONResponse, StreamingResponse
+from starlette.routing import Mount, Route
+from uvicorn.middleware.wsgi import WSGIMiddleware
+
+import app as flask_app
+from config import Config
+from events import BUS, astream, parse_last_event_id
+from log_config import get_logger
+from metrics import instrument_async_endpoint
+from tracing import trace_async_endpoint
+from processing.intent_processor import IntentProcessor
+from utils import parse_bool, split_tags
+
+logger = get_logger('asgi')
+
+async def _json_body(request: Request) -> dict:
+    try:
+        data = await request.json()
+    except ValueError:
+        return {}
+    return data if isinstance(data, dict) else {}
+
+async def parse_input(request: Request):
+    """Parse natural language input (manual entry)"""
+    try:
+        data = await _json_body(request)
+        user_input = data.get('input', '')
+        
+        if not user_input:
+            return JSONResponse({"success": False, "error": "No input provided"}, status_code=400)
+        
+        llm_result = await flask_app.llm_service.aparse_natural_language(user_input)
+        
+        if not llm_result['success']:
+            logger.warning("LLM failed: %s", llm_result.get('error'), extra={'details': llm_result.get('details')})
+            return JSONResponse({
+                "success": False,
+                "error": llm_result.get('error', 'LLM processing failed'),
+                "details": llm_result.get('details', '')
+            }, status_code=500)
+        
+        items = llm_result['data'].get('items', [])
+        if not items:
+            return JSONResponse({
+                "success": False,
+                "error": "No items extracted from input",
+                "details": "LLM did not extract any items from your input"
+            }, status_code=400)
+        
+        validated_items = IntentProcessor.normalize_items(items, source='manual')
+        if not validated_items:
+            return JSONResponse({
+                "success": False,
+                "error": "Invalid item structure",
+                "details": "Items must have 'type' and 'title' fields"
+            }, status_code=400)
+        
+        created_items = await asyncio.to_thread(flask_app.processor.process_items, validated_items)
+        
+        return JSONResponse({
+            "success": True,
+            "items": created_items,
+            "count": len(created_items)
+        })
+    except Exception as e:
+        logger.exception("Error in parse_input")
+        return JSONResponse({
+            "success": False,
+            "error": "Server error",
+            "details": str(e)
+        }, status_code=500)
+
+async def search(request: Request):
+    """Semantic search"""
+    try:
+        data = await _json_body(request)
+        query = data.get('query', '')
+        
+        if not query:
+            return JSONResponse({"success": False, "error": "No query provided"}, status_code=400)
+        
+        tags = split_tags(data.get('tags') or request.query_params.getlist('tag'))
+        include_archived = parse_bool(data.get('include_archived') or request.query_params.get('include_archived'))
+        allowed_ids = await asyncio.to_thread(flask_app.db.get_item_ids_by_tags, tags, include_archived) if tags else None
+        results = await asyncio.to_thread(flask_app.vector_store.search, query, 10, allowed_ids, include_archived)
+        items = await asyncio.to_thread(flask_app.processor.hydrate_search_results, results, include_archived)
+        
+        return JSONResponse({
+            "success": True,
+            "query": query,
+            "items": items,
+            "count": len(items)
+        })
+    except Exception as e:
+        logger.exception("Error in search")
+        return JSONResponse({"success": False, "error": str(e)}, status_code=500)
+
+async def sync_external_data(request: Request):
+    """Sync calendar and email data"""
+    try:
+        result = await flask_app.sync_orchestrator.async_sync_all(Config.ASYNC_SYNC_CONCURRENCY)
+        
+        return JSONResponse({
+            'success': True,
+            'synced': result,
+            'message': f"Synced {result['total']} items ({result['calendar']} calendar + {result['email']} email)"
+        })
+    except Exception as e:
+        logger.exception("Sync error")
+        return JSONResponse({
+            'success': False,
+            'error': str(e)
+        }, status_code=500)
+
+async def events_stream(request: Request):
+    """Server-sent events on the event loop: no thread held per subscriber"""
+    last_event_id = parse_last_event_id(request.headers.get('last-event-id') or request.query_params.get('last_event_id'))
+    BUS.watch_version(flask_app.db.get_items_version)
+    subscription = BUS.subscribe(last_event_id, loop=asyncio.get_running_loop())
+    return StreamingResponse(astream(subscription), media_type='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+
+@asynccontextmanager
+async def lifespan(application):
+    # Bound the threads used for blocking DB/vector work (asyncio.to_thread uses this executor)
+    executor = ThreadPoolExecutor(max_workers=Config.ASYNC_EXECUTOR_WORKERS, thread_name_prefix='async-io')
+    asyncio.get_running_loop().set_default_executor(executor)
+    flask_app.start_warm_up()
+    yield
+    if flask_app.llm_service.initialized:
+        await flask_app.llm_service.aclose()
+    executor.shutdown(wait=False)
+
+def _route(path: str, endpoint, methods):
+    endpoint = trace_async_endpoint(path)(endpoint)
+    if Config.METRICS_ENABLED:
+        endpoint = instrument_async_endpoint(path)(endpoint)
+    return Route(path, endpoint, methods=methods)
+
+app = Starlette(
+    routes=[
+        _route('/api/parse', parse_input, ['POST']),
+        _route('/api/search', search, ['POST']),
+        _route('/api/sync', sync_external_data, ['POST']),
+        Route('/api/events', events_stream, methods=['GET']),
+        Mount('/', app=WSGIMiddleware(flask_app.app))
+    ],
+    middleware=[
+        Middleware(CORSMiddleware, allow_origins=['*'], allow_methods=['*'], allow_headers=['*'])
+    ],
+    lifespan=lifespan
+)
@@ -0,0 +1,207 @@
+"""
+Streaming NDJSON export and import of items and their embeddings.
+
+An export is one JSON object per line: a header record, every item (the
+stored columns plus `archived_at`, and with embeddings its vector as
+`embedding`), then an end record with the item count so a truncated file
+is noticed. Items are read page by page from one snapshot and written as
+they are read, so memory stays flat whatever the table size; GET
+/api/export streams the same lines.
+
+Imports keep ids and timestamps: each batch of IMPORT_BATCH_SIZE records
+is one write transaction, and its vectors are loaded with batched
+upserts of the stored embeddings while that transaction runs, so nothing
+is re-embedded. Items exported without a vector are embedded afresh
+(unless --no-embed-missing). A file without its end record, or with a
+different item count, raises IncompleteExportError once the items it
+does hold are committed (the CLI exits 1), since the restore is partial.
+
+    python backup_items.py export backup.ndjson.gz --embeddings --include-archived
+    python backup_items.py import backup.ndjson.gz
+    python backup_items.py export - | ...           # stdout / stdin
+"""
+import argparse
+import gzip
+import json
+import sys
+import time
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from config import Config
+from log_config import get_logger
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+logger = get_logger('backup')
+
+FORMAT = 'auraplan-items'
+FORMAT_VERSION = 1
+
+class IncompleteExportError(ValueError):
+    """The export was truncated or its item count does not match; what it held is already imported"""
+    
+    def __init__(self, message: str, counts: Dict):
+        super().__init__(message)
+        self.counts = counts
+
+def dumps_line(record: Dict) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(record, option=orjson.OPT_APPEND_NEWLINE)
+    return json.dumps(record, separators=(',', ':')).encode('utf-8') + b'\n'
+
+def loads_line(line: bytes) -> Dict:
+    return orjson.loads(line) if orjson is not None else json.loads(line)
+
+def iter_export(db, vector_store=None, include_archived: bool = False, page_size: int = 1000) -> Iterator[bytes]:
+    """NDJSON chunks (one per page of items); with a vector_store, items carry their embedding"""
+    from migrate_database import SCHEMA_VERSION
+    
+    yield dumps_line({
+        'format': FORMAT,
+        'version': FORMAT_VERSION,
+        'schema_version': SCHEMA_VERSION,
+        'exported_at': datetime.now().isoformat(),
+        'embeddings': vector_store is not None,
+        'include_archived': include_archived
+    })
+    count = 0
+    for page in db.iter_item_pages(page_size, include_archived):
+        if vector_store is not None:
+            hot_ids = [record['id'] for record in page if not record['archived_at']]
+            cold_ids = [record['id'] for record in page if record['archived_at']]
+            embeddings = vector_store.get_embeddings(hot_ids)
+            embeddings.update(vector_store.get_embeddings(cold_ids, archived=True))
+            for record in page:
+                record['embedding'] = embeddings.get(record['id'])
+        count += len(page)
+        yield b''.join(dumps_line(record) for record in page)
+    yield dumps_line({'format': FORMAT, 'end': True, 'items': count})
+
+def _check_header(record: Dict):
+    if record.get('format') != FORMAT or 'end' in record:
+        raise ValueError("Not an item export: the first line must be its header record")
+    if record.get('version', 0) > FORMAT_VERSION:
+        raise ValueError(f"Export format version {record['version']} is newer than this release supports")
+
+def _iter_records(lines: Iterable[bytes], errors: List[str]) -> Iterator[Dict]:
+    """Decoded records; stops at a line or compressed stream cut off mid-way, noting why in `errors`"""
+    try:
+        for line in lines:
+            if line.strip():
+                yield loads_line(line)
+    except (EOFError, ValueError) as e:
+        errors.append(str(e))
+
+def import_ndjson(db, vector_store, lines: Iterable[bytes], batch_size: int = 5000,
+                  embed_missing: bool = True, log=None) -> Dict:
+    """
+    Load an export back in; returns counts of items, vectors loaded and
+    items embedded afresh. Raises IncompleteExportError for a truncated
+    export, after committing the items it holds.
+    """
+    log = log or logger.info
+    counts = {'items': 0, 'vectors': 0, 'embedded': 0}
+    start = time.perf_counter()
+    
+    def flush(batch: List[Dict]):
+        written = db.import_items(batch, wait=False)
+        # The writer thread commits the rows while the vectors load here
+        counts['vectors'] += vector_store.load_embeddings(batch)
+        if embed_missing:
+            missing = [record for record in batch if record.get('embedding') is None and not record.get('archived_at')]
+            counts['embedded'] += vector_store.upsert_items(missing)
+        counts['items'] += written.result()
+        log(f"Imported {counts['items']} items ({counts['items'] / (time.perf_counter() - start):.0f}/s)")
+    
+    header = None
+    expected: Optional[int] = None
+    batch = []
+    errors: List[str] = []
+    for record in _iter_records(lines, errors):
+        if header is None:
+            _check_header(record)
+            header = record
+            continue
+        if record.get('format') == FORMAT:
+            expected = record.get('items')
+            continue
+        batch.append(record)
+        if len(batch) >= batch_size:
+            flush(batch)
+            batch = []
+    if batch:
+        flush(batch)
+    
+    if header is None:
+        raise ValueError(f"Unreadable export: {errors[0]}" if errors else "Empty export")
+    if errors:
+        raise IncompleteExportError(f"Export is cut off ({errors[0]}); {counts['items']} items imported", counts)
+    if expected is None:
+        raise IncompleteExportError(f"Export has no end record; it is truncated ({counts['items']} items imported)", counts)
+    if expected != counts['items']:
+        raise IncompleteExportError(
+            f"Export lists {expected} items but holds {counts['items']} (all of them imported)", counts
+        )
+    return counts
+
+def _open(path: str, mode: str):
+    if path == '-':
+        return sys.stdout.buffer if 'w' in mode else sys.stdin.buffer
+    if path.endswith('.gz'):
+        return gzip.open(path, mode)
+    return open(path, mode)
+
+def main():
+    parser = argparse.ArgumentParser(description="Export or import items (and embeddings) as NDJSON")
+    commands = parser.add_subparsers(dest='command', required=True)
+    
+    export_parser = commands.add_parser('export', help="Write every item to PATH ('-' for stdout, .gz to compress)")
+    export_parser.add_argument('path')
+    export_parser.add_argument('--embeddings', action='store_true', help="Include each item's stored vector")
+    export_parser.add_argument('--include-archived', action='store_true')
+    export_parser.add_argument('--page-size', type=int, default=Config.EXPORT_PAGE_SIZE)
+    
+    import_parser = commands.add_parser('import', help="Load an export from PATH ('-' for stdin)")
+    import_parser.add_argument('path')
+    import_parser.add_argument('--batch-size', type=int, default=Config.IMPORT_BATCH_SIZE, help="Items per write transaction")
+    import_parser.add_argument('--no-embed-missing', action='store_true', help="Leave items exported without a vector unembedded")
+    args = parser.parse_args()
+    
+    from database import Database
+    db = Database(Config.DATABASE_PATH)
+    try:
+        if args.command == 'export':
+            vector_store = None
+            if args.embeddings:
+                from vector_store import VectorStore
+                vector_store = VectorStore()
+            out = _open(args.path, 'wb')
+            try:
+                for chunk in iter_export(db, vector_store, args.include_archived, args.page_size):
+                    out.write(chunk)
+            finally:
+                if out is not sys.stdout.buffer:
+                    out.close()
+        else:
+            from vector_store import VectorStore
+            source = _open(args.path, 'rb')
+            try:
+                counts = import_ndjson(db, VectorStore(), source, args.batch_size,
+                                       embed_missing=not args.no_embed_missing, log=lambda msg: print(msg, file=sys.stderr))
+            except IncompleteExportError as e:
+                print(f"Incomplete restore: {e}", file=sys.stderr)
+                sys.exit(1)
+            finally:
+                if source is not sys.stdin.buffer:
+                    source.close()
+            print(f"Imported {counts['items']} items: {counts['vectors']} vectors loaded, "
+                  f"{counts['embedded']} embedded", file=sys.stderr)
+    finally:
+        db.close()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,8 @@
+"""
+Benchmark harness for the API hot paths.
+
+    python -m benchmarks.stub_ollama --port 11435 --latency 0.2
+    python -m benchmarks.datagen --items 100000 --data-dir /tmp/bench
+    python -m benchmarks.run --items 100000 --output results.json
+    python -m benchmarks.run --compare results.json
+"""
@@ -0,0 +1,145 @@
+"""
+Seeded data generator for benchmarks.
+
+Creates N items (10k-1M) in a Database and VectorStore under a scratch
+data directory. The same seed always yields the same items, and a
+populated directory is reused when its recorded item count and seed
+match, so large datasets are built once.
+
+Usage (from backend/):
+    python -m benchmarks.datagen --items 100000 --seed 42 --data-dir /tmp/bench
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import time
+from datetime import date, timedelta
+from typing import Dict, Iterator, List, Optional
+
+META_FILE = 'bench_meta.json'
+
+WORDS = (
+    'project', 'report', 'meeting', 'groceries', 'dentist', 'invoice', 'budget', 'review',
+    'presentation', 'gym', 'flight', 'hotel', 'birthday', 'gift', 'laundry', 'taxes',
+    'email', 'client', 'design', 'deploy', 'backup', 'garden', 'recipe', 'book',
+    'call', 'plan', 'draft', 'renew', 'insurance', 'car', 'doctor', 'school'
+)
+VERBS = ('Buy', 'Finish', 'Call', 'Schedule', 'Review', 'Send', 'Prepare', 'Book', 'Pay', 'Fix')
+TAGS = ('work', 'home', 'health', 'finance', 'shopping', 'travel', 'family', 'errands', 'urgent', 'ideas')
+
+def use_data_dir(data_dir: str):
+    """Point Config at a scratch directory; call before anything imports config"""
+    os.makedirs(data_dir, exist_ok=True)
+    os.environ['DATABASE_PATH'] = os.path.join(data_dir, 'productivity.db')
+    os.environ['CHROMA_PATH'] = os.path.join(data_dir, 'chroma')
+    os.environ['VISUALIZATION_DIR'] = os.path.join(data_dir, 'visualizations')
+
+def generate_items(count: int, seed: int = 42, start: str = '2026-01-01', days: int = 365) -> Iterator[Dict]:
+    """Deterministic items spread over `days` days from `start`"""
+    rng = random.Random(seed)
+    first_day = date.fromisoformat(start)
+    for i in range(count):
+        words = rng.sample(WORDS, 2)
+        source = rng.choices(('manual', 'calendar', 'email'), weights=(6, 3, 1))[0]
+        day = first_day + timedelta(days=rng.randrange(days))
+        has_time = rng.random() < 0.8
+        yield {
+            'type': rng.choices(('task', 'reminder', 'note'), weights=(6, 3, 1))[0],
+            'title': f"{rng.choice(VERBS)} {words[0]} {words[1]}",
+            'description': f"Notes about the {words[0]} and {words[1]}" if rng.random() < 0.5 else None,
+            'datetime': f"{day.isoformat()}T{rng.randrange(7, 21):02d}:{rng.choice((0, 15, 30, 45)):02d}:00" if has_time else None,
+            'priority': rng.choice(('low', 'medium', 'high')),
+            'tags': rng.sample(TAGS, rng.randrange(0, 4)),
+            'completed': rng.random() < 0.3,
+            'source': source,
+            'external_id': f"bench-{source}-{seed}-{i}" if source != 'manual' else None
+        }
+
+def _read_meta(data_dir: str) -> Optional[Dict]:
+    try:
+        with open(os.path.join(data_dir, META_FILE)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def populate(data_dir: str, count: int, seed: int = 42, batch_size: int = 5000,
+             vector_limit: Optional[int] = None, reuse: bool = True, verbose: bool = True) -> Dict:
+    """
+    Fill the data directory's Database and VectorStore with `count` items.
+    
+    Only the first `vector_limit` items are embedded (None embeds all);
+    embedding dominates build time for large datasets.
+    """
+    vector_count = count if vector_limit is None else min(count, vector_limit)
+    meta = _read_meta(data_dir)
+    if reuse and meta and meta.get('items') == count and meta.get('seed') == seed and meta.get('vectors') == vector_count:
+        if verbose:
+            print(f"Reusing {count} items in {data_dir}")
+        return meta
+    
+    from database import Database
+    from vector_store import VectorStore
+    from config import Config
+    
+    # Start from scratch so a smaller earlier dataset leaves no stray rows or vectors
+    for path in (Config.DATABASE_PATH, os.path.join(data_dir, META_FILE)):
+        if os.path.exists(path):
+            os.remove(path)
+    shutil.rmtree(Config.CHROMA_PATH, ignore_errors=True)
+    
+    database = Database(Config.DATABASE_PATH)
+    vector_store = VectorStore() if vector_count else None
+    
+    start = time.perf_counter()
+    created = 0
+    embedded = 0
+    batch: List[Dict] = []
+    
+    def flush(items: List[Dict]):
+        nonlocal created, embedded
+        item_ids = database.create_items(items)
+        created += len(item_ids)
+        if vector_store is not None and embedded < vector_count:
+            to_embed = [dict(item, id=item_id) for item, item_id in zip(items, item_ids)][:vector_count - embedded]
+            embedded += vector_store.upsert_items(to_embed)
+        if verbose:
+            print(f"  {created}/{count} items ({embedded} embedded) {time.perf_counter() - start:.1f}s", end='\r')
+    
+    for item in generate_items(count, seed):
+        batch.append(item)
+        if len(batch) >= batch_size:
+            flush(batch)
+            batch = []
+    if batch:
+        flush(batch)
+    
+    meta = {
+        'items': created,
+        'seed': seed,
+        'vectors': embedded,
+        'build_seconds': round(time.perf_counter() - start, 2)
+    }
+    with open(os.path.join(data_dir, META_FILE), 'w') as f:
+        json.dump(meta, f)
+    if verbose:
+        print(f"\nCreated {created} items ({embedded} embedded) in {meta['build_seconds']}s")
+    return meta
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate seeded benchmark data")
+    parser.add_argument('--items', type=int, default=10000)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--data-dir', default=os.path.join('data', 'bench'))
+    parser.add_argument('--batch-size', type=int, default=5000)
+    parser.add_argument('--vector-limit', type=int, default=None,
+                        help="Embed only the first N items (default: all)")
+    parser.add_argument('--rebuild', action='store_true', help="Ignore an existing matching dataset")
+    args = parser.parse_args()
+    
+    use_data_dir(args.data_dir)
+    populate(args.data_dir, args.items, args.seed, args.batch_size, args.vector_limit, reuse=not args.rebuild)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,265 @@
+"""
+Benchmark runner for the API hot paths.
+
+Builds (or reuses) a seeded dataset, starts the stub Ollama, and times
+each scenario either in-process through Flask's test client (default,
+no network in the measurement) or against a running server (--url).
+Results are JSON with p50/p95/p99 latency and throughput per scenario,
+plus enough metadata (commit, dataset, settings) to compare runs.
+
+Usage (from backend/):
+    python -m benchmarks.run --items 100000 --requests 200 --output before.json
+    python -m benchmarks.run --items 100000 --requests 200 --compare before.json
+    python -m benchmarks.run --scenarios items,search --concurrency 8
+    python -m benchmarks.run --url http://localhost:5000 --ollama-latency 0.5
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional
+
+from benchmarks.datagen import WORDS, populate, use_data_dir
+from benchmarks.stub_ollama import start_stub
+
+class Scenario:
+    """One endpoint call; `body` builds the JSON payload from a seeded Random"""
+    
+    def __init__(self, method: str, path: str, body: Optional[Callable[[random.Random], Dict]] = None,
+                 reset: Optional[str] = None):
+        self.method = method
+        self.path = path
+        self.body = body
+        # Client method run (untimed) before every call; such scenarios run one call at a time
+        self.reset = reset
+
+def _random_day(rng: random.Random) -> str:
+    return f"2026-{rng.randrange(1, 13):02d}-{rng.randrange(1, 29):02d}"
+
+PARSE_INPUTS = (
+    "Buy groceries tomorrow at 5pm",
+    "Remind me to call the dentist on Friday morning",
+    "Finish the budget report by next Monday, high priority",
+    "Note: ideas for the garden project"
+)
+
+SCENARIOS: Dict[str, Scenario] = {
+    'items': Scenario('GET', '/api/items'),
+    'grouped': Scenario('GET', '/api/items/grouped'),
+    'search': Scenario('POST', '/api/search', lambda rng: {'query': ' '.join(rng.sample(WORDS, 2))}),
+    'visualize_day': Scenario('POST', '/api/visualize/day', lambda rng: {'date': _random_day(rng)}),
+    'parse': Scenario('POST', '/api/parse', lambda rng: {'input': rng.choice(PARSE_INPUTS)}),
+    'sync': Scenario('POST', '/api/sync', reset='reset_sync')
+}
+
+# Writers last, so read scenarios see exactly the generated dataset
+DEFAULT_ORDER = ('items', 'grouped', 'search', 'visualize_day', 'parse', 'sync')
+
+class InProcessClient:
+    """Flask test client per thread; measures handler time without sockets"""
+    
+    def __init__(self, app_module):
+        self.app_module = app_module
+        self._local = threading.local()
+    
+    def request(self, method: str, path: str, body: Optional[Dict]) -> int:
+        client = getattr(self._local, 'client', None)
+        if client is None:
+            client = self._local.client = self.app_module.app.test_client()
+        response = client.open(path, method=method, json=body)
+        response.get_data()
+        return response.status_code
+    
+    def reset_sync(self):
+        """Forget previously synced calendar/email items so each sync does full work"""
+        orchestrator = self.app_module.sync_orchestrator
+        external_ids = [
+            item['external_id']
+            for source in (orchestrator.calendar_source, orchestrator.email_source)
+            for item in source.transform_to_items(source.fetch_data())
+        ]
+        conn = self.app_module.db.get_connection()
+        conn.executemany('DELETE FROM items WHERE external_id = ?', [(eid,) for eid in external_ids])
+        conn.commit()
+        conn.close()
+
+class HttpClient:
+    """requests.Session per thread against a running server"""
+    
+    def __init__(self, base_url: str):
+        import requests
+        self._requests = requests
+        self.base_url = base_url.rstrip('/')
+        self._local = threading.local()
+    
+    def request(self, method: str, path: str, body: Optional[Dict]) -> int:
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = self._local.session = self._requests.Session()
+        response = session.request(method, f"{self.base_url}{path}", json=body, timeout=300)
+        return response.status_code
+    
+    def reset_sync(self):
+        # No access to the server's database; repeated syncs only deduplicate
+        pass
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, int(round(pct / 100 * len(sorted_values))))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+def run_scenario(client, name: str, scenario: Scenario, requests: int, concurrency: int,
+                 warmup: int, seed: int) -> Dict:
+    rng = random.Random(f"{seed}-{name}")
+    bodies = [scenario.body(rng) if scenario.body else None for _ in range(warmup + requests)]
+    
+    def call(body) -> tuple:
+        if scenario.reset:
+            getattr(client, scenario.reset)()
+        start = time.perf_counter()
+        status = client.request(scenario.method, scenario.path, body)
+        return time.perf_counter() - start, status
+    
+    for body in bodies[:warmup]:
+        call(body)
+    
+    workers = 1 if scenario.reset else concurrency
+    wall_start = time.perf_counter()
+    if workers == 1:
+        results = [call(body) for body in bodies[warmup:]]
+    else:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(call, bodies[warmup:]))
+    wall = time.perf_counter() - wall_start
+    if scenario.reset:
+        # Leave the untimed resets out of throughput
+        wall = sum(elapsed for elapsed, _status in results)
+    
+    latencies = sorted(elapsed for elapsed, _status in results)
+    errors = sum(1 for _elapsed, status in results if status >= 400)
+    return {
+        'method': scenario.method,
+        'path': scenario.path,
+        'requests': len(results),
+        'errors': errors,
+        'concurrency': workers,
+        'p50_ms': round(percentile(latencies, 50) * 1000, 3),
+        'p95_ms': round(percentile(latencies, 95) * 1000, 3),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 3),
+        'mean_ms': round(sum(latencies) / len(latencies) * 1000, 3) if latencies else 0.0,
+        'max_ms': round(latencies[-1] * 1000, 3) if latencies else 0.0,
+        'throughput_rps': round(len(results) / wall, 2) if wall > 0 else 0.0
+    }
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, timeout=5, check=True).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+def compare(baseline: Dict, current: Dict) -> List[str]:
+    """Per-scenario baseline->current values with the change in percent"""
+    lines = [f"{'scenario':<15}{'p50 ms':>24}{'p95 ms':>24}{'p99 ms':>24}{'rps':>24}"]
+    for name, result in current['scenarios'].items():
+        before = baseline.get('scenarios', {}).get(name)
+        if not before:
+            continue
+        cells = []
+        for key in ('p50_ms', 'p95_ms', 'p99_ms', 'throughput_rps'):
+            old, new = before[key], result[key]
+            delta = (new - old) / old * 100 if old else 0.0
+            cells.append(f"{old:.1f}->{new:.1f} ({delta:+.0f}%)")
+        lines.append(f"{name:<15}" + ''.join(f"{cell:>24}" for cell in cells))
+    return lines
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark API hot paths")
+    parser.add_argument('--items', type=int, default=10000, help="Dataset size (10k-1M)")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--data-dir', default=os.path.join('data', 'bench'))
+    parser.add_argument('--vector-limit', type=int, default=None, help="Embed only the first N items")
+    parser.add_argument('--scenarios', default=','.join(DEFAULT_ORDER))
+    parser.add_argument('--requests', type=int, default=100, help="Timed requests per scenario")
+    parser.add_argument('--warmup', type=int, default=5)
+    parser.add_argument('--concurrency', type=int, default=1)
+    parser.add_argument('--ollama-latency', type=float, default=0.2)
+    parser.add_argument('--ollama-jitter', type=float, default=0.0)
+    parser.add_argument('--url', default=None,
+                        help="Benchmark a running server (start it with OLLAMA_BASE_URL at the stub)")
+    parser.add_argument('--stub-port', type=int, default=0)
+    parser.add_argument('--output', default=None, help="Write results JSON here (default: stdout)")
+    parser.add_argument('--compare', default=None, help="Baseline results JSON to diff against")
+    args = parser.parse_args()
+    
+    names = [name.strip() for name in args.scenarios.split(',') if name.strip()]
+    unknown = [name for name in names if name not in SCENARIOS]
+    if unknown:
+        parser.error(f"Unknown scenarios: {', '.join(unknown)} (choose from {', '.join(SCENARIOS)})")
+    
+    stub = start_stub(args.stub_port, args.ollama_latency, args.ollama_jitter)
+    stub_url = f"http://127.0.0.1:{stub.server_address[1]}"
+    
+    if args.url:
+        client = HttpClient(args.url)
+        dataset = {'external_server': args.url}
+        print(f"Stub Ollama at {stub_url}; the server under test must use OLLAMA_BASE_URL={stub_url}",
+              file=sys.stderr)
+    else:
+        use_data_dir(args.data_dir)
+        os.environ['OLLAMA_BASE_URL'] = stub_url
+        os.environ.setdefault('LOG_LEVEL', 'WARNING')
+        dataset = populate(args.data_dir, args.items, args.seed, vector_limit=args.vector_limit)
+        import app as app_module
+        client = InProcessClient(app_module)
+    
+    results = {}
+    for name in names:
+        print(f"Running {name} ...", file=sys.stderr)
+        results[name] = run_scenario(client, name, SCENARIOS[name], args.requests,
+                                     args.concurrency, args.warmup, args.seed)
+    
+    report = {
+        'meta': {
+            'commit': _git_commit(),
+            'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'mode': 'http' if args.url else 'in-process',
+            'dataset': dataset,
+            'requests': args.requests,
+            'warmup': args.warmup,
+            'concurrency': args.concurrency,
+            'ollama_latency': args.ollama_latency,
+            'ollama_jitter': args.ollama_jitter,
+            'seed': args.seed
+        },
+        'scenarios': results
+    }
+    
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+        print(f"Results written to {args.output}", file=sys.stderr)
+    else:
+        print(output)
+    
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        print('\n'.join(compare(baseline, report)), file=sys.stderr)
+    
+    stub.shutdown()
+
+if __name__ == '__main__':
+    main()
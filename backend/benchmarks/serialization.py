@@ -0,0 +1,149 @@
+"""
+Row materialization and JSON serialization benchmark for /api/items.
+
+Loads N generated items into a scratch database and compares, for the
+full-table read behind /api/items:
+  - fetching as sqlite3.Row -> dict vs the Item row factory (time and
+    traced memory per row)
+  - serializing the response with the stdlib encoder (ItemJSONProvider)
+    vs orjson (OrjsonProvider), for dict rows and for Item rows
+
+Usage (from backend/):
+    python -m benchmarks.serialization --items 100000
+    python -m benchmarks.serialization --items 100000 --output serialization.json
+"""
+import argparse
+import gc
+import json
+import os
+import sqlite3
+import sys
+import time
+import tracemalloc
+from typing import Callable, Dict, List
+
+from benchmarks.datagen import generate_items, use_data_dir
+
+def _best_of(repeat: int, func: Callable) -> float:
+    """Fastest of `repeat` runs in seconds (least disturbed by the rest of the machine)"""
+    best = float('inf')
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def _traced_bytes(build: Callable[[], List]) -> int:
+    """Bytes still allocated by the rows `build` returns (the list itself included)"""
+    gc.collect()
+    tracemalloc.start()
+    rows = build()
+    current, _peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del rows
+    return current
+
+def prepare(data_dir: str, count: int, seed: int) -> str:
+    """Scratch database holding `count` items; reused when the row count already matches"""
+    use_data_dir(data_dir)
+    from config import Config
+    from database import Database
+    
+    db_path = Config.DATABASE_PATH
+    if os.path.exists(db_path):
+        conn = sqlite3.connect(db_path)
+        try:
+            existing = conn.execute('SELECT COUNT(*) FROM items').fetchone()[0]
+        except sqlite3.OperationalError:
+            existing = -1
+        conn.close()
+        if existing == count:
+            return db_path
+        os.remove(db_path)
+    
+    database = Database(db_path)
+    batch = []
+    for item in generate_items(count, seed):
+        batch.append(item)
+        if len(batch) >= 5000:
+            database.create_items(batch)
+            batch = []
+    database.create_items(batch)
+    return db_path
+
+def run(db_path: str, repeat: int) -> Dict:
+    import app as app_module
+    from json_provider import ItemJSONProvider, OrjsonProvider, orjson
+    from models import ITEM_SELECT, item_row_factory
+    
+    query = f'SELECT {ITEM_SELECT} FROM items ORDER BY datetime_utc DESC, created_at DESC'
+    
+    def fetch_dicts() -> List:
+        conn = sqlite3.connect(db_path)
+        conn.row_factory = sqlite3.Row
+        rows = [dict(row) for row in conn.execute(query)]
+        conn.close()
+        return rows
+    
+    def fetch_items() -> List:
+        conn = sqlite3.connect(db_path)
+        conn.row_factory = item_row_factory
+        rows = conn.execute(query).fetchall()
+        conn.close()
+        return rows
+    
+    dict_rows = fetch_dicts()
+    item_rows = fetch_items()
+    count = len(item_rows)
+    
+    results = {
+        'rows': count,
+        'fetch_ms': {
+            'dict': round(_best_of(repeat, fetch_dicts) * 1000, 1),
+            'item': round(_best_of(repeat, fetch_items) * 1000, 1)
+        },
+        'bytes_per_row': {
+            'dict': round(_traced_bytes(fetch_dicts) / count, 1),
+            'item': round(_traced_bytes(fetch_items) / count, 1)
+        },
+        'serialize_ms': {}
+    }
+    
+    flask_app = app_module.app
+    providers = {'stdlib': ItemJSONProvider(flask_app)}
+    if orjson is not None:
+        providers['orjson'] = OrjsonProvider(flask_app)
+    
+    with flask_app.app_context():
+        for provider_name, provider in providers.items():
+            for row_name, rows in (('dict', dict_rows), ('item', item_rows)):
+                payload = {'success': True, 'items': rows, 'count': count}
+                elapsed = _best_of(repeat, lambda: provider.response(payload).get_data())
+                results['serialize_ms'][f"{provider_name}/{row_name}"] = round(elapsed * 1000, 1)
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark item row materialization and JSON serialization")
+    parser.add_argument('--items', type=int, default=100000)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--data-dir', default=os.path.join('data', 'bench', 'serialization'))
+    parser.add_argument('--repeat', type=int, default=5, help="Runs per measurement; the fastest is reported")
+    parser.add_argument('--output', default=None, help="Write results JSON here (default: stdout)")
+    args = parser.parse_args()
+    
+    os.environ.setdefault('LOG_LEVEL', 'WARNING')
+    print(f"Preparing {args.items} items in {args.data_dir} ...", file=sys.stderr)
+    db_path = prepare(args.data_dir, args.items, args.seed)
+    results = run(db_path, args.repeat)
+    
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+        print(f"Results written to {args.output}", file=sys.stderr)
+    else:
+        print(output)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,116 @@
+"""
+Local stand-in for Ollama's /api/generate with configurable latency.
+
+Returns canned JSON shaped like a real non-streamed response, including
+the eval_duration / prompt_eval_duration counters, so the API can be
+benchmarked without a model. Email extraction prompts get an
+email-style answer; everything else gets a parsed task.
+
+Usage (from backend/):
+    python -m benchmarks.stub_ollama --port 11435 --latency 0.2 --jitter 0.05
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+PARSE_RESPONSE = {
+    'items': [{
+        'type': 'task',
+        'title': 'Buy groceries',
+        'description': 'Milk, eggs and bread',
+        'datetime': '2026-01-23T17:00:00',
+        'priority': 'medium',
+        'tags': ['shopping', 'errands']
+    }]
+}
+
+EMAIL_RESPONSE = {
+    'relevant': True,
+    'type': 'task',
+    'title': 'Reply to project update',
+    'description': 'Follow up on the action items',
+    'datetime': '2026-01-24T10:00:00',
+    'priority': 'high'
+}
+
+class StubOllamaHandler(BaseHTTPRequestHandler):
+    latency = 0.0
+    jitter = 0.0
+    model = 'llama3.2'
+    
+    def log_message(self, *args):
+        pass
+    
+    def _send_json(self, payload, status=200):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def do_GET(self):
+        if self.path == '/api/tags':
+            self._send_json({'models': [{'name': self.model}]})
+        else:
+            self._send_json({'error': 'not found'}, status=404)
+    
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length', 0))
+        request = json.loads(self.rfile.read(length) or b'{}')
+        if self.path != '/api/generate':
+            self._send_json({'error': 'not found'}, status=404)
+            return
+        
+        delay = max(0.0, self.latency + random.uniform(-self.jitter, self.jitter))
+        time.sleep(delay)
+        
+        prompt = request.get('prompt', '')
+        is_email = 'email' in prompt.lower()
+        answer = EMAIL_RESPONSE if is_email else PARSE_RESPONSE
+        total_ns = int(delay * 1e9)
+        self._send_json({
+            'model': request.get('model', self.model),
+            'response': json.dumps(answer),
+            'done': True,
+            'total_duration': total_ns,
+            'load_duration': 0,
+            'prompt_eval_count': len(prompt) // 4,
+            'prompt_eval_duration': total_ns // 4,
+            'eval_count': 60,
+            'eval_duration': total_ns - total_ns // 4
+        })
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 1024
+
+def start_stub(port: int = 0, latency: float = 0.0, jitter: float = 0.0, host: str = '127.0.0.1') -> ThreadingHTTPServer:
+    """Serve in a background thread; port 0 picks a free one (see server.server_address)"""
+    handler = type('ConfiguredStubHandler', (StubOllamaHandler,), {'latency': latency, 'jitter': jitter})
+    server = _Server((host, port), handler)
+    threading.Thread(target=server.serve_forever, name='stub-ollama', daemon=True).start()
+    return server
+
+def main():
+    parser = argparse.ArgumentParser(description="Stub Ollama server for benchmarks")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=11435)
+    parser.add_argument('--latency', type=float, default=0.2, help="Seconds per /api/generate call")
+    parser.add_argument('--jitter', type=float, default=0.0, help="Uniform +/- seconds added to latency")
+    args = parser.parse_args()
+    
+    server = start_stub(args.port, args.latency, args.jitter, args.host)
+    print(f"Stub Ollama on http://{args.host}:{server.server_address[1]} "
+          f"(latency {args.latency}s +/- {args.jitter}s); Ctrl+C to stop")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+if __name__ == '__main__':
+    main()
@@ -31,7 +31,7 @@ def check_schema():
         columns = {col[1]: col for col in cursor.fetchall()}
         
         required_columns = [
-            'id', 'type', 'title', 'description', 'datetime', 
+            'id', 'type', 'title', 'description', 'datetime', 'datetime_utc', 'local_date',
             'priority', 'tags', 'completed', 'source', 'external_id',
             'created_at', 'updated_at'
         ]
@@ -0,0 +1,58 @@
+"""
+Response compression for large API payloads.
+
+An after_request hook encodes JSON and text bodies of at least
+COMPRESS_MIN_BYTES with brotli (when the `brotli` package is installed
+and the client accepts `br`) or gzip. Streamed and file responses, and
+responses that already carry a Content-Encoding (the pre-gzipped SVGs),
+are left alone.
+"""
+import gzip
+
+from config import Config
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE_MIMETYPES = ('application/json', 'text/plain', 'text/html', 'text/csv', 'image/svg+xml')
+
+def choose_encoding(accept_encodings) -> str:
+    """Best supported encoding the client accepts ('br', 'gzip' or '')"""
+    if brotli is not None and accept_encodings['br']:
+        return 'br'
+    if accept_encodings['gzip']:
+        return 'gzip'
+    return ''
+
+def compress(data: bytes, encoding: str) -> bytes:
+    if encoding == 'br':
+        return brotli.compress(data, quality=Config.COMPRESS_BROTLI_QUALITY)
+    return gzip.compress(data, compresslevel=Config.COMPRESS_GZIP_LEVEL, mtime=0)
+
+def enable_compression(app, min_bytes: int = None):
+    """Compress eligible Flask responses of at least `min_bytes` (default COMPRESS_MIN_BYTES)"""
+    from flask import request
+    
+    threshold = Config.COMPRESS_MIN_BYTES if min_bytes is None else min_bytes
+    
+    @app.after_request
+    def _compress_response(response):
+        if (response.status_code != 200 or response.direct_passthrough or response.is_streamed
+                or 'Content-Encoding' in response.headers
+                or response.mimetype not in COMPRESSIBLE_MIMETYPES):
+            return response
+        
+        response.vary.add('Accept-Encoding')
+        encoding = choose_encoding(request.accept_encodings)
+        if not encoding:
+            return response
+        
+        data = response.get_data()
+        if len(data) < threshold:
+            return response
+        
+        response.set_data(compress(data, encoding))
+        response.headers['Content-Encoding'] = encoding
+        return response
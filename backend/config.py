@@ -15,31 +15,124 @@ class Config:
     # Database Configuration
     DATABASE_PATH = os.getenv('DATABASE_PATH', str(BASE_DIR / 'data' / 'productivity.db'))
     CHROMA_PATH = os.getenv('CHROMA_PATH', str(BASE_DIR / 'data' / 'chroma'))
+    VISUALIZATION_DIR = os.getenv('VISUALIZATION_DIR', str(BASE_DIR / 'static' / 'visualizations'))
+    
+    # Schema migrations run at startup: online backup first (when data exists), backfills in chunks of N rows
+    MIGRATION_BACKUP = os.getenv('MIGRATION_BACKUP', 'true').lower() == 'true'
+    MIGRATION_CHUNK_SIZE = int(os.getenv('MIGRATION_CHUNK_SIZE', '5000'))
+    
+    # Writes go through one writer thread that group-commits ops arriving within N ms (up to MAX_BATCH per commit)
+    DB_WRITER_ENABLED = os.getenv('DB_WRITER_ENABLED', 'true').lower() == 'true'
+    DB_WRITER_BATCH_MS = float(os.getenv('DB_WRITER_BATCH_MS', '2'))
+    DB_WRITER_MAX_BATCH = int(os.getenv('DB_WRITER_MAX_BATCH', '64'))
+    # PRAGMA synchronous for writes (WAL journal): FULL survives power loss, NORMAL only process crashes
+    DB_SYNCHRONOUS = os.getenv('DB_SYNCHRONOUS', 'FULL').upper()
+    
+    # POST /api/items/bulk: most ids accepted per request
+    BULK_MAX_ITEMS = int(os.getenv('BULK_MAX_ITEMS', '1000'))
+    
+    # Delta sync (/api/items/changes): deletions are remembered this long; older cursors must resync
+    TOMBSTONE_RETENTION_DAYS = float(os.getenv('TOMBSTONE_RETENTION_DAYS', '30'))
+    CHANGES_PAGE_SIZE = int(os.getenv('CHANGES_PAGE_SIZE', '1000'))
+    
+    # Archival (archive_items.py, POST /api/archive): completed items untouched this long move to items_archive
+    ARCHIVE_AFTER_DAYS = float(os.getenv('ARCHIVE_AFTER_DAYS', '90'))
+    ARCHIVE_BATCH_SIZE = int(os.getenv('ARCHIVE_BATCH_SIZE', '500'))
+    
+    # NDJSON export/import (backup_items.py, GET /api/export): rows read per page, items per import transaction
+    EXPORT_PAGE_SIZE = int(os.getenv('EXPORT_PAGE_SIZE', '1000'))
+    IMPORT_BATCH_SIZE = int(os.getenv('IMPORT_BATCH_SIZE', '5000'))
+    
+    # Live events (/api/events): per-subscriber buffer before a slow client is dropped, replay ring for reconnects
+    EVENTS_QUEUE_SIZE = int(os.getenv('EVENTS_QUEUE_SIZE', '256'))
+    EVENTS_REPLAY_SIZE = int(os.getenv('EVENTS_REPLAY_SIZE', '256'))
+    EVENTS_HEARTBEAT_SECONDS = float(os.getenv('EVENTS_HEARTBEAT_SECONDS', '15'))
+    EVENTS_RETRY_MS = int(os.getenv('EVENTS_RETRY_MS', '3000'))
+    # Cross-worker items.changed polling, and the cap on /api/events streams that each hold a Flask thread
+    EVENTS_POLL_SECONDS = float(os.getenv('EVENTS_POLL_SECONDS', '1'))
+    EVENTS_MAX_BLOCKING_SUBSCRIBERS = int(os.getenv('EVENTS_MAX_BLOCKING_SUBSCRIBERS', '4'))
+    
+    # IANA zone (e.g. 'Europe/Berlin') for naive item datetimes and day bucketing; empty uses the system zone
+    TIMEZONE = os.getenv('TIMEZONE', '')
     
     # Flask Configuration
     FLASK_ENV = os.getenv('FLASK_ENV', 'development')
     FLASK_DEBUG = os.getenv('FLASK_DEBUG', 'true').lower() == 'true'
     
+    # Server Configuration (serve.py; backend is 'auto', 'gunicorn', 'waitress' or 'uvicorn')
+    SERVER_HOST = os.getenv('SERVER_HOST', '0.0.0.0')
+    SERVER_PORT = int(os.getenv('SERVER_PORT', '5000'))
+    SERVER_BACKEND = os.getenv('SERVER_BACKEND', 'auto')
+    SERVER_WORKERS = int(os.getenv('SERVER_WORKERS', '2'))
+    SERVER_THREADS = int(os.getenv('SERVER_THREADS', '8'))
+    SERVER_TIMEOUT = int(os.getenv('SERVER_TIMEOUT', '120'))
+    SERVER_PRELOAD = os.getenv('SERVER_PRELOAD', 'true').lower() == 'true'
+    
+    # Services are built on first use; warm-up is 'off', 'background' or 'eager'
+    SERVICE_WARMUP = os.getenv('SERVICE_WARMUP', 'off')
+    
+    # Async API (asgi.py): executor threads for blocking DB/vector calls, LLM connection pool, sync fan-out
+    ASYNC_EXECUTOR_WORKERS = int(os.getenv('ASYNC_EXECUTOR_WORKERS', '16'))
+    ASYNC_LLM_MAX_CONNECTIONS = int(os.getenv('ASYNC_LLM_MAX_CONNECTIONS', '256'))
+    ASYNC_SYNC_CONCURRENCY = int(os.getenv('ASYNC_SYNC_CONCURRENCY', '8'))
+    
+    # Logging (LOG_FORMAT is 'text' or 'json'; per-item debug lines are sampled 1 in N)
+    LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')
+    LOG_FORMAT = os.getenv('LOG_FORMAT', 'text')
+    LOG_ITEM_SAMPLE_EVERY = int(os.getenv('LOG_ITEM_SAMPLE_EVERY', '10'))
+    
+    # JSON responses: 'auto' uses orjson when installed, 'orjson' or 'stdlib' force one
+    JSON_BACKEND = os.getenv('JSON_BACKEND', 'auto')
+    
+    # Response compression (br when the brotli package is installed, else gzip) for bodies of at least N bytes
+    COMPRESS_ENABLED = os.getenv('COMPRESS_ENABLED', 'true').lower() == 'true'
+    COMPRESS_MIN_BYTES = int(os.getenv('COMPRESS_MIN_BYTES', '1024'))
+    COMPRESS_GZIP_LEVEL = int(os.getenv('COMPRESS_GZIP_LEVEL', '5'))
+    COMPRESS_BROTLI_QUALITY = int(os.getenv('COMPRESS_BROTLI_QUALITY', '4'))
+    
+    # Metrics (Prometheus text format at /metrics, per server process)
+    METRICS_ENABLED = os.getenv('METRICS_ENABLED', 'true').lower() == 'true'
+    
+    # Tracing (exporter is 'none', 'console' or 'file'; spans are appended to TRACING_FILE)
+    TRACING_EXPORTER = os.getenv('TRACING_EXPORTER', 'none')
+    TRACING_FILE = os.getenv('TRACING_FILE', str(BASE_DIR / 'data' / 'traces.jsonl'))
+    TRACING_SERVICE_NAME = os.getenv('TRACING_SERVICE_NAME', 'productivity-assistant')
+    
     # Feature Flags
     USE_MOCK_DATA = os.getenv('USE_MOCK_DATA', 'true').lower() == 'true'
     
-    # Ensure all required directories exist
+    # Vector index: seconds to coalesce edits before re-embedding
+    REINDEX_DEBOUNCE_SECONDS = float(os.getenv('REINDEX_DEBOUNCE_SECONDS', '2.0'))
+    
+    # Visualizer: worker processes for week/month tile rendering (0 = CPU count)
+    VISUALIZER_WORKERS = int(os.getenv('VISUALIZER_WORKERS', '0'))
+    
+    # Visualizer: zlib level for PNG output (0-9); the fast level is used when a request asks for fast encoding
+    PNG_COMPRESS_LEVEL = int(os.getenv('PNG_COMPRESS_LEVEL', '6'))
+    PNG_FAST_COMPRESS_LEVEL = int(os.getenv('PNG_FAST_COMPRESS_LEVEL', '1'))
+    
+    # Visualizer: disk budget for rendered images (LRU-evicted) and optional in-memory serving cache
+    VISUALIZATION_CACHE_MAX_MB = int(os.getenv('VISUALIZATION_CACHE_MAX_MB', '200'))
+    VISUALIZATION_MEMORY_CACHE_MB = int(os.getenv('VISUALIZATION_MEMORY_CACHE_MB', '0'))
+    
+    # Ensure all required directories exist (called by start_backend; not on import)
     @classmethod
-    def init_directories(cls):
+    def init_directories(cls, verbose: bool = True):
         """Create all required directories"""
         directories = [
             Path(cls.DATABASE_PATH).parent,  # data/
             Path(cls.CHROMA_PATH),  # data/chroma/
-            cls.BASE_DIR / 'static' / 'visualizations',  # static/visualizations/
+            Path(cls.VISUALIZATION_DIR),  # static/visualizations/
             cls.BASE_DIR / 'ingestion' / 'mock_data'  # ingestion/mock_data/
         ]
         
         for directory in directories:
             directory.mkdir(parents=True, exist_ok=True)
-            print(f" Ensured directory exists: {directory}")
+            if verbose:
+                print(f" Ensured directory exists: {directory}")
     
     @classmethod
-    def validate(cls):
+    def validate(cls, log=print):
         """Validate configuration"""
         errors = []
         
@@ -62,10 +155,10 @@ class Config:
                 errors.append(f"Mock email data not found: {mock_email}")
         
         if errors:
-            print("\n Configuration Warnings:")
+            log("\n Configuration Warnings:")
             for error in errors:
-                print(f"   - {error}")
-            print()
+                log(f"   - {error}")
+            log("")
         
         return len(errors) == 0
     
@@ -83,7 +176,3 @@ class Config:
         print(f"Mock Data Mode: {cls.USE_MOCK_DATA}")
         print(f"Flask Environment: {cls.FLASK_ENV}")
         print("="*60 + "\n")
-
-
-# Initialize directories on import
-Config.init_directories() 
\ No newline at end of file
@@ -1,10 +1,30 @@
+import os
 import sqlite3
-from datetime import datetime
-from typing import List, Dict, Optional
+from concurrent.futures import Future
+from datetime import datetime, timedelta
+from typing import Any, Callable, Iterator, List, Dict, Optional
+from config import Config
+from db_writer import SQLiteWriter, WriteOp, open_write_connection, run_in_transaction
+from log_config import get_logger
+from migrate_database import apply_migrations
+from models import ITEM_COLUMNS, ITEM_SELECT, Item, item_row_factory
+from metrics import timed
+from tracing import traced
+from utils import normalize_datetime, split_tags
+
+logger = get_logger('database')
 
 class Database:
     def __init__(self, db_path: str):
         self.db_path = db_path
+        db_dir = os.path.dirname(os.path.abspath(db_path))
+        os.makedirs(db_dir, exist_ok=True)
+        self.writer = SQLiteWriter(
+            db_path,
+            batch_ms=Config.DB_WRITER_BATCH_MS,
+            max_batch=Config.DB_WRITER_MAX_BATCH,
+            synchronous=Config.DB_SYNCHRONOUS
+        ) if Config.DB_WRITER_ENABLED else None
         self.init_db()
     
     def get_connection(self):
@@ -12,127 +32,358 @@ class Database:
         conn.row_factory = sqlite3.Row
         return conn
     
+    def submit_write(self, op: WriteOp, *args) -> Future:
+        """Run `op(cursor, *args)` in a write transaction; the Future resolves once it is committed"""
+        if self.writer is not None:
+            return self.writer.submit(op, *args)
+        future = Future()
+        conn = open_write_connection(self.db_path, Config.DB_SYNCHRONOUS)
+        try:
+            future.set_result(run_in_transaction(conn, op, *args))
+        except Exception as e:
+            future.set_exception(e)
+        finally:
+            conn.close()
+        return future
+    
+    def _write(self, op: WriteOp, *args, wait: bool = True) -> Any:
+        future = self.submit_write(op, *args)
+        return future.result() if wait else future
+    
+    def close(self):
+        """Commit queued writes and stop the writer thread"""
+        if self.writer is not None:
+            self.writer.close()
+    
     def init_db(self):
-        """Initialize database schema with ALL required columns"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        
-        # Items table with source and external_id columns
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS items (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                type TEXT NOT NULL CHECK(type IN ('task', 'note', 'reminder')),
-                title TEXT NOT NULL,
-                description TEXT,
-                datetime TEXT,
-                priority TEXT CHECK(priority IN ('low', 'medium', 'high')) DEFAULT 'medium',
-                tags TEXT,
-                completed BOOLEAN DEFAULT 0,
-                source TEXT DEFAULT 'manual',
-                external_id TEXT,
-                created_at TEXT NOT NULL,
-                updated_at TEXT NOT NULL
-            )
-        ''')
-        
-        # Create index for external_id lookups
-        cursor.execute('''
-            CREATE INDEX IF NOT EXISTS idx_external_id ON items(external_id)
-        ''')
-        
-        # Create index for datetime queries
-        cursor.execute('''
-            CREATE INDEX IF NOT EXISTS idx_datetime ON items(datetime)
-        ''')
-        
-        conn.commit()
-        conn.close()
-        print(" Database initialized with complete schema")
+        """Bring the schema up to date (versioned migrations in migrate_database.py)"""
+        version = apply_migrations(
+            self.db_path,
+            backup=Config.MIGRATION_BACKUP,
+            chunk_size=Config.MIGRATION_CHUNK_SIZE,
+            log=logger.info
+        )
+        pruned = self.prune_tombstones(Config.TOMBSTONE_RETENTION_DAYS)
+        logger.info("Database initialized", extra={'path': self.db_path, 'schema_version': version, 'tombstones_pruned': pruned})
     
-    def create_item(self, item_data: Dict) -> int:
-        """Create a new item"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        
-        now = datetime.now().isoformat()
-        
-        cursor.execute('''
-            INSERT INTO items (
-                type, title, description, datetime, priority, tags, 
-                completed, source, external_id, created_at, updated_at
-            )
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (
+    INSERT_ITEM_SQL = '''
+        INSERT INTO items (
+            type, title, description, datetime, datetime_utc, local_date, priority, tags, 
+            completed, source, external_id, created_at, updated_at, change_seq
+        )
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    '''
+    
+    @staticmethod
+    def _insert_params(item_data: Dict, now: str, change_seq: int) -> tuple:
+        return (
             item_data.get('type', 'task'),
             item_data.get('title', 'Untitled'),
             item_data.get('description'),
             item_data.get('datetime'),
+            *normalize_datetime(item_data.get('datetime')),
             item_data.get('priority', 'medium'),
             ','.join(item_data.get('tags', [])) if isinstance(item_data.get('tags'), list) else item_data.get('tags', ''),
             item_data.get('completed', False),
             item_data.get('source', 'manual'),
             item_data.get('external_id'),
             now,
-            now
-        ))
+            now,
+            change_seq
+        )
+    
+    @staticmethod
+    def _write_tags(cursor, item_id: int, tags):
+        """Replace an item's rows in item_tags (the indexed copy of items.tags)"""
+        cursor.execute('DELETE FROM item_tags WHERE item_id = ?', (item_id,))
+        cursor.executemany(
+            'INSERT OR IGNORE INTO item_tags (tag, item_id) VALUES (?, ?)',
+            [(tag, item_id) for tag in split_tags(tags)]
+        )
+    
+    @staticmethod
+    def _bump_items_version(cursor) -> int:
+        """
+        Inserts bump items_version here, once per transaction (updates and
+        deletes via triggers), and store the new value as their change_seq.
+        """
+        cursor.execute("UPDATE counters SET value = value + 1 WHERE name = 'items_version'")
+        cursor.execute("SELECT value FROM counters WHERE name = 'items_version'")
+        return cursor.fetchone()[0]
+    
+    @staticmethod
+    def _tag_filter(tags: List[str], tag_table: str = 'item_tags') -> tuple:
+        """Subquery of item ids carrying every tag; answered from the tag table's primary key"""
+        placeholders = ','.join('?' for _ in tags)
+        return (
+            f'SELECT item_id FROM {tag_table} WHERE tag IN ({placeholders}) '
+            f'GROUP BY item_id HAVING COUNT(*) = ?',
+            [*tags, len(tags)]
+        )
+    
+    # (items table, tag table) pairs; archived rows live in the second and are opt-in for reads
+    HOT_TABLES = (('items', 'item_tags'),)
+    ALL_TABLES = HOT_TABLES + (('items_archive', 'item_archive_tags'),)
+    
+    @classmethod
+    def _tables(cls, include_archived: bool) -> tuple:
+        return cls.ALL_TABLES if include_archived else cls.HOT_TABLES
+    
+    @staticmethod
+    def _item_select(table: str) -> str:
+        """Item's columns (not internal ones such as change_seq), plus archived_at for archived rows"""
+        return f'{ITEM_SELECT}, archived_at' if table == 'items_archive' else ITEM_SELECT
+    
+    @traced('db.create_item')
+    def create_item(self, item_data: Dict, wait: bool = True) -> int:
+        """Create a new item (wait=False returns a Future of the id)"""
+        return self._write(self._create_item, item_data, wait=wait)
+    
+    def _create_item(self, cursor, item_data: Dict) -> int:
+        now = datetime.now().isoformat()
+        change_seq = self._bump_items_version(cursor)
+        
+        cursor.execute(self.INSERT_ITEM_SQL, self._insert_params(item_data, now, change_seq))
         
         item_id = cursor.lastrowid
-        conn.commit()
-        conn.close()
+        self._write_tags(cursor, item_id, item_data.get('tags'))
         
         return item_id
     
-    def get_all_items(self, item_type: Optional[str] = None) -> List[Dict]:
-        """Get all items, optionally filtered by type"""
+    @traced('db.create_items')
+    def create_items(self, items: List[Dict]) -> List[int]:
+        """Create several items in one transaction; returns their ids in order"""
+        if not items:
+            return []
+        return self._write(self._create_items, items)
+    
+    def _create_items(self, cursor, items: List[Dict]) -> List[int]:
+        now = datetime.now().isoformat()
+        change_seq = self._bump_items_version(cursor)
+        item_ids = []
+        for item_data in items:
+            cursor.execute(self.INSERT_ITEM_SQL, self._insert_params(item_data, now, change_seq))
+            item_ids.append(cursor.lastrowid)
+        cursor.executemany(
+            'INSERT OR IGNORE INTO item_tags (tag, item_id) VALUES (?, ?)',
+            [(tag, item_id) for item_data, item_id in zip(items, item_ids) for tag in split_tags(item_data.get('tags'))]
+        )
+        
+        return item_ids
+    
+    @traced('db.get_all_items')
+    @timed('db_read')
+    def get_all_items(self, item_type: Optional[str] = None, tags: Optional[List[str]] = None,
+                      include_archived: bool = False) -> List[Item]:
+        """Get all items, optionally filtered by type and/or tags (items must carry every tag)"""
         conn = self.get_connection()
         cursor = conn.cursor()
+        cursor.row_factory = item_row_factory
         
-        if item_type:
-            cursor.execute('SELECT * FROM items WHERE type = ? ORDER BY datetime DESC, created_at DESC', (item_type,))
-        else:
-            cursor.execute('SELECT * FROM items ORDER BY datetime DESC, created_at DESC')
+        tags = split_tags(tags)
+        selects = []
+        params = []
+        for table, tag_table in self._tables(include_archived):
+            conditions = []
+            if item_type:
+                conditions.append('type = ?')
+                params.append(item_type)
+            if tags:
+                subquery, tag_params = self._tag_filter(tags, tag_table)
+                conditions.append(f'id IN ({subquery})')
+                params.extend(tag_params)
+            where = f" WHERE {' AND '.join(conditions)}" if conditions else ''
+            selects.append(f'SELECT {ITEM_SELECT} FROM {table}{where}')
+        
+        cursor.execute(f"{' UNION ALL '.join(selects)} ORDER BY datetime_utc DESC, created_at DESC", params)
+        
+        items = cursor.fetchall()
+        conn.close()
+        
+        return items
+    
+    @traced('db.get_item_ids_by_tags')
+    @timed('db_read')
+    def get_item_ids_by_tags(self, tags: List[str], include_archived: bool = False) -> set:
+        """Ids of items carrying every tag, read from the tag indexes only"""
+        tags = split_tags(tags)
+        if not tags:
+            return set()
+        
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        item_ids = set()
+        for _table, tag_table in self._tables(include_archived):
+            subquery, params = self._tag_filter(tags, tag_table)
+            cursor.execute(subquery, params)
+            item_ids.update(row[0] for row in cursor.fetchall())
+        conn.close()
+        
+        return item_ids
+    
+    @traced('db.get_tag_counts')
+    @timed('db_read')
+    def get_tag_counts(self, prefix: Optional[str] = None, limit: Optional[int] = None) -> List[Dict]:
+        """Items per tag, most used first; `prefix` is a range scan on the item_tags key"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        where = ''
+        params = []
+        if prefix:
+            prefix = prefix.strip().lower()
+            # tag >= prefix AND tag < prefix + U+10FFFF keeps the lookup on the primary key
+            where = 'WHERE tag >= ? AND tag < ? '
+            params.extend([prefix, prefix + '\U0010ffff'])
+        query = f'SELECT tag, COUNT(*) AS count FROM item_tags {where}GROUP BY tag ORDER BY count DESC, tag ASC'
+        if limit:
+            query += ' LIMIT ?'
+            params.append(limit)
+        cursor.execute(query, params)
         
         rows = cursor.fetchall()
         conn.close()
         
         return [dict(row) for row in rows]
     
-    def get_item_by_id(self, item_id: int) -> Optional[Dict]:
-        """Get a single item by ID"""
+    @traced('db.get_items_version')
+    @timed('db_read')
+    def get_items_version(self) -> int:
+        """Counter bumped on every items write; one primary-key read, items untouched"""
         conn = self.get_connection()
         cursor = conn.cursor()
         
-        cursor.execute('SELECT * FROM items WHERE id = ?', (item_id,))
+        cursor.execute("SELECT value FROM counters WHERE name = 'items_version'")
         row = cursor.fetchone()
         conn.close()
         
+        return row[0] if row else 0
+    
+    @traced('db.get_item_by_id')
+    @timed('db_read')
+    def get_item_by_id(self, item_id: int, include_archived: bool = False) -> Optional[Dict]:
+        """Get a single item by ID (archived rows carry an archived_at field)"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        row = None
+        for table, _tag_table in self._tables(include_archived):
+            cursor.execute(f'SELECT {self._item_select(table)} FROM {table} WHERE id = ?', (item_id,))
+            row = cursor.fetchone()
+            if row:
+                break
+        conn.close()
+        
         return dict(row) if row else None
     
+    @traced('db.get_items_by_ids')
+    @timed('db_read')
+    def get_items_by_ids(self, item_ids: List[int], include_archived: bool = False) -> List[Dict]:
+        """Get several items by ID in one query per table"""
+        if not item_ids:
+            return []
+        
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        placeholders = ','.join('?' for _ in item_ids)
+        rows = []
+        for table, _tag_table in self._tables(include_archived):
+            cursor.execute(f'SELECT {self._item_select(table)} FROM {table} WHERE id IN ({placeholders})', list(item_ids))
+            rows.extend(cursor.fetchall())
+        conn.close()
+        
+        return [dict(row) for row in rows]
+    
+    @traced('db.get_item_by_external_id')
+    @timed('db_read')
     def get_item_by_external_id(self, external_id: str) -> Optional[Dict]:
-        """Get item by external ID (for sync deduplication)"""
+        """Get item by external ID (for sync deduplication, so archived items count too)"""
         if not external_id:
             return None
             
         conn = self.get_connection()
         cursor = conn.cursor()
         
-        cursor.execute('SELECT * FROM items WHERE external_id = ?', (external_id,))
-        row = cursor.fetchone()
+        row = None
+        for table, _tag_table in self.ALL_TABLES:
+            cursor.execute(f'SELECT {self._item_select(table)} FROM {table} WHERE external_id = ?', (external_id,))
+            row = cursor.fetchone()
+            if row:
+                break
         conn.close()
         
         return dict(row) if row else None
     
-    def update_item(self, item_id: int, updates: Dict) -> bool:
-        """Update an item"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        
+    @staticmethod
+    def _prepare_updates(updates: Dict) -> Dict:
+        """Stamp updated_at and derive stored columns, in place"""
         updates['updated_at'] = datetime.now().isoformat()
         
+        # Keep the normalized datetime columns in step with the ISO text
+        if 'datetime' in updates:
+            updates['datetime_utc'], updates['local_date'] = normalize_datetime(updates['datetime'])
+        
         # Handle tags if it's a list
         if 'tags' in updates and isinstance(updates['tags'], list):
             updates['tags'] = ','.join(updates['tags'])
+        return updates
+    
+    # Ids per IN (...) list; stays under SQLite's bound-parameter limit
+    ID_CHUNK_SIZE = 500
+    
+    @classmethod
+    def _id_chunks(cls, item_ids: List[int]):
+        for start in range(0, len(item_ids), cls.ID_CHUNK_SIZE):
+            yield item_ids[start:start + cls.ID_CHUNK_SIZE]
+    
+    @traced('db.update_items')
+    def update_items(self, item_ids: List[int], updates: Dict) -> List[int]:
+        """Apply the same updates to several items in one transaction; returns the ids that existed"""
+        if not item_ids:
+            return []
+        return self._write(self._update_items, item_ids, self._prepare_updates(updates))
+    
+    def _update_items(self, cursor, item_ids: List[int], updates: Dict) -> List[int]:
+        # The write transaction is IMMEDIATE, so the existence check and the update see the same rows
+        set_clause = ', '.join([f"{key} = ?" for key in updates.keys()])
+        found = []
+        for chunk in self._id_chunks(item_ids):
+            placeholders = ','.join('?' for _ in chunk)
+            cursor.execute(f'SELECT id FROM items WHERE id IN ({placeholders})', chunk)
+            found.extend(row[0] for row in cursor.fetchall())
+            cursor.execute(f'UPDATE items SET {set_clause} WHERE id IN ({placeholders})',
+                           list(updates.values()) + list(chunk))
+        if 'tags' in updates:
+            for item_id in found:
+                self._write_tags(cursor, item_id, updates['tags'])
+        
+        return found
+    
+    @traced('db.delete_items')
+    def delete_items(self, item_ids: List[int]) -> List[int]:
+        """Delete several items in one transaction; returns the ids that existed"""
+        if not item_ids:
+            return []
+        return self._write(self._delete_items, item_ids)
+    
+    def _delete_items(self, cursor, item_ids: List[int]) -> List[int]:
+        found = []
+        for chunk in self._id_chunks(item_ids):
+            placeholders = ','.join('?' for _ in chunk)
+            cursor.execute(f'SELECT id FROM items WHERE id IN ({placeholders})', chunk)
+            found.extend(row[0] for row in cursor.fetchall())
+            cursor.execute(f'DELETE FROM items WHERE id IN ({placeholders})', chunk)
         
+        return found
+    
+    @traced('db.update_item')
+    def update_item(self, item_id: int, updates: Dict, wait: bool = True) -> bool:
+        """Update an item (wait=False returns a Future of the result)"""
+        return self._write(self._update_item, item_id, self._prepare_updates(updates), wait=wait)
+    
+    def _update_item(self, cursor, item_id: int, updates: Dict) -> bool:
         # Build dynamic update query
         set_clause = ', '.join([f"{key} = ?" for key in updates.keys()])
         values = list(updates.values()) + [item_id]
@@ -140,38 +391,282 @@ class Database:
         cursor.execute(f'UPDATE items SET {set_clause} WHERE id = ?', values)
         
         rows_affected = cursor.rowcount
-        conn.commit()
-        conn.close()
+        if rows_affected and 'tags' in updates:
+            self._write_tags(cursor, item_id, updates['tags'])
         
         return rows_affected > 0
     
-    def delete_item(self, item_id: int) -> bool:
-        """Delete an item"""
+    @traced('db.delete_item')
+    def delete_item(self, item_id: int, wait: bool = True) -> bool:
+        """Delete an item (wait=False returns a Future of the result)"""
+        return self._write(self._delete_item, item_id, wait=wait)
+    
+    @staticmethod
+    def _delete_item(cursor, item_id: int) -> bool:
+        cursor.execute('DELETE FROM items WHERE id = ?', (item_id,))
+        return cursor.rowcount > 0
+    
+    @traced('db.prune_tombstones')
+    def prune_tombstones(self, max_age_days: float) -> int:
+        """Drop tombstones older than max_age_days; cursors from before them must resync"""
+        cutoff = (datetime.now() - timedelta(days=max_age_days)).isoformat()
+        return self._write(self._prune_tombstones, cutoff)
+    
+    @staticmethod
+    def _prune_tombstones(cursor, cutoff: str) -> int:
+        cursor.execute('SELECT max(seq) FROM item_tombstones WHERE deleted_at < ?', (cutoff,))
+        through = cursor.fetchone()[0]
+        if through is None:
+            return 0
+        cursor.execute('DELETE FROM item_tombstones WHERE seq <= ?', (through,))
+        pruned = cursor.rowcount
+        cursor.execute("UPDATE counters SET value = max(value, ?) WHERE name = 'tombstones_pruned_through'", (through,))
+        
+        return pruned
+    
+    @traced('db.archive_items')
+    def archive_items(self, older_than_days: float, batch_size: int = 500,
+                      on_batch: Optional[Callable[[List[int]], None]] = None) -> int:
+        """
+        Move completed items untouched (and, when dated, past) for
+        `older_than_days` into items_archive, one write transaction per
+        `batch_size` items so other writes interleave. `on_batch` gets
+        each batch's ids after it commits (the vector store moves their
+        embeddings). They leave items through a DELETE, so delta-sync
+        clients see tombstones. Returns the number archived.
+        """
+        cutoff = datetime.now() - timedelta(days=older_than_days)
+        total = 0
+        while True:
+            item_ids = self._write(self._archive_batch, cutoff.isoformat(), int(cutoff.timestamp()), batch_size)
+            if not item_ids:
+                break
+            total += len(item_ids)
+            if on_batch:
+                on_batch(item_ids)
+            if len(item_ids) < batch_size:
+                break
+        return total
+    
+    @staticmethod
+    def _archive_batch(cursor, cutoff_iso: str, cutoff_epoch: int, limit: int) -> List[int]:
+        cursor.execute(
+            'SELECT id FROM items WHERE updated_at < ? AND completed = 1 '
+            'AND (datetime_utc IS NULL OR datetime_utc < ?) LIMIT ?',
+            (cutoff_iso, cutoff_epoch, limit)
+        )
+        item_ids = [row[0] for row in cursor.fetchall()]
+        if not item_ids:
+            return []
+        
+        placeholders = ','.join('?' for _ in item_ids)
+        cursor.execute(
+            f'INSERT OR REPLACE INTO items_archive ({ITEM_SELECT}, archived_at) '
+            f'SELECT {ITEM_SELECT}, ? FROM items WHERE id IN ({placeholders})',
+            [datetime.now().isoformat(), *item_ids]
+        )
+        cursor.execute(
+            f'INSERT OR IGNORE INTO item_archive_tags (tag, item_id) '
+            f'SELECT tag, item_id FROM item_tags WHERE item_id IN ({placeholders})',
+            item_ids
+        )
+        # Triggers drop the item_tags rows, bump items_version and write tombstones
+        cursor.execute(f'DELETE FROM items WHERE id IN ({placeholders})', item_ids)
+        return item_ids
+    
+    def iter_item_pages(self, page_size: int = 1000, include_archived: bool = False) -> Iterator[List[Dict]]:
+        """
+        Every item in id order as pages of dicts, read from one snapshot
+        without loading the table (exports). Archived rows come after the
+        hot ones and carry their archived_at; hot rows have it as None.
+        """
+        conn = self.get_connection()
+        try:
+            cursor = conn.cursor()
+            cursor.execute('BEGIN')
+            for table, _tag_table in self._tables(include_archived):
+                archived_at = 'archived_at' if table == 'items_archive' else 'NULL AS archived_at'
+                cursor.execute(f'SELECT {ITEM_SELECT}, {archived_at} FROM {table} ORDER BY id')
+                while True:
+                    rows = cursor.fetchmany(page_size)
+                    if not rows:
+                        break
+                    yield [dict(row) for row in rows]
+        finally:
+            conn.close()
+    
+    @traced('db.import_items')
+    def import_items(self, records: List[Dict], wait: bool = True) -> int:
+        """
+        Restore exported items in one transaction, keeping their ids and
+        timestamps (existing rows with those ids are replaced). Records
+        with an archived_at go to items_archive. Returns the count (or a
+        Future of it with wait=False, so the caller can load vectors
+        meanwhile).
+        """
+        if not records:
+            return 0
+        return self._write(self._import_items, records, wait=wait)
+    
+    @staticmethod
+    def _import_row(record: Dict) -> tuple:
+        row = dict(record)
+        if 'datetime_utc' not in row:
+            row['datetime_utc'], row['local_date'] = normalize_datetime(row.get('datetime'))
+        if isinstance(row.get('tags'), list):
+            row['tags'] = ','.join(row['tags'])
+        return tuple(row.get(column) for column in ITEM_COLUMNS)
+    
+    def _import_items(self, cursor, records: List[Dict]) -> int:
+        placeholders = ','.join('?' for _ in ITEM_COLUMNS)
+        change_seq = self._bump_items_version(cursor)
+        hot = [record for record in records if not record.get('archived_at')]
+        cold = [record for record in records if record.get('archived_at')]
+        
+        if hot:
+            ids = [(record['id'],) for record in hot]
+            # An id restored as hot must not also stay archived (and the other way round below)
+            cursor.executemany('DELETE FROM items_archive WHERE id = ?', ids)
+            cursor.executemany('DELETE FROM item_archive_tags WHERE item_id = ?', ids)
+            cursor.executemany('DELETE FROM item_tags WHERE item_id = ?', ids)
+            # A fresh change_seq (not the exported one) so delta-sync clients see the restored rows
+            cursor.executemany(f'INSERT OR REPLACE INTO items ({ITEM_SELECT}, change_seq) VALUES ({placeholders}, ?)',
+                               [(*self._import_row(record), change_seq) for record in hot])
+            cursor.executemany('INSERT OR IGNORE INTO item_tags (tag, item_id) VALUES (?, ?)',
+                               [(tag, record['id']) for record in hot for tag in split_tags(record.get('tags'))])
+        if cold:
+            ids = [(record['id'],) for record in cold]
+            cursor.executemany('DELETE FROM items WHERE id = ?', ids)
+            cursor.executemany('DELETE FROM item_archive_tags WHERE item_id = ?', ids)
+            cursor.executemany(f'INSERT OR REPLACE INTO items_archive ({ITEM_SELECT}, archived_at) VALUES ({placeholders}, ?)',
+                               [(*self._import_row(record), record['archived_at']) for record in cold])
+            cursor.executemany('INSERT OR IGNORE INTO item_archive_tags (tag, item_id) VALUES (?, ?)',
+                               [(tag, record['id']) for record in cold for tag in split_tags(record.get('tags'))])
+            # AUTOINCREMENT only tracks ids inserted into items; never hand out an archived one again
+            top = max(record['id'] for record in cold)
+            cursor.execute("UPDATE sqlite_sequence SET seq = max(seq, ?) WHERE name = 'items'", (top,))
+            if not cursor.rowcount:
+                cursor.execute("INSERT INTO sqlite_sequence (name, seq) VALUES ('items', ?)", (top,))
+        
+        return len(records)
+    
+    @traced('db.get_changes')
+    @timed('db_read')
+    def get_changes(self, since: Optional[Dict] = None, limit: int = 1000) -> Dict:
+        """
+        Items upserted and ids deleted after the `since` position, plus the
+        new position. Positions are dicts of items_version, the
+        (change_seq, id) keyset of the last upsert and the last tombstone
+        seq; an unchanged items_version answers from the counters row
+        alone. change_seq is assigned inside the write transaction, so it
+        follows commit order (an updated_at stamped before a write was
+        queued does not). `reset` means the client must refetch from an
+        empty position: tombstones it needs were pruned, or its position
+        predates change_seq.
+        """
         conn = self.get_connection()
         cursor = conn.cursor()
         
-        cursor.execute('DELETE FROM items WHERE id = ?', (item_id,))
+        # One read transaction, so the counters and both change lists come from the same snapshot
+        cursor.execute('BEGIN')
+        cursor.execute("SELECT name, value FROM counters WHERE name IN ('items_version', 'tombstones_pruned_through')")
+        counters = dict(cursor.fetchall())
+        version = counters.get('items_version', 0)
         
-        rows_affected = cursor.rowcount
-        conn.commit()
+        result = {'upserts': [], 'deletions': [], 'cursor': since, 'has_more': False, 'reset': False}
+        if since and since.get('version') == version:
+            conn.rollback()
+            conn.close()
+            return result
+        if since and (since.get('seq', 0) < counters.get('tombstones_pruned_through', 0) or 'change_seq' not in since):
+            conn.rollback()
+            conn.close()
+            result.update(cursor=None, reset=True)
+            return result
+        
+        position = dict(since) if since else {'change_seq': 0, 'id': 0}
+        cursor.row_factory = lambda c, row: (row[-1], Item(*row[:-1]))
+        cursor.execute(f'''
+            SELECT {ITEM_SELECT}, change_seq FROM items
+            WHERE (change_seq, id) > (?, ?)
+            ORDER BY change_seq ASC, id ASC
+            LIMIT ?
+        ''', (position['change_seq'], position['id'], limit + 1))
+        rows = cursor.fetchall()
+        cursor.row_factory = None
+        
+        if since:
+            cursor.execute('SELECT seq, item_id FROM item_tombstones WHERE seq > ? ORDER BY seq ASC LIMIT ?',
+                           (position['seq'], limit + 1))
+            tombstones = cursor.fetchall()
+        else:
+            # A fresh client holds nothing that could have been deleted
+            cursor.execute("SELECT seq FROM sqlite_sequence WHERE name = 'item_tombstones'")
+            row = cursor.fetchone()
+            position['seq'] = row[0] if row else 0
+            tombstones = []
+        conn.rollback()
         conn.close()
         
-        return rows_affected > 0
+        has_more = len(rows) > limit or len(tombstones) > limit
+        rows, tombstones = rows[:limit], tombstones[:limit]
+        upserts = [item for _change_seq, item in rows]
+        if rows:
+            position['change_seq'], position['id'] = rows[-1][0], upserts[-1].id
+        if tombstones:
+            position['seq'] = tombstones[-1][0]
+        # A partial page must not short-circuit the next call on an unchanged version
+        position['version'] = None if has_more else version
+        
+        result.update(
+            upserts=upserts,
+            deletions=[item_id for _seq, item_id in tombstones],
+            cursor=position,
+            has_more=has_more
+        )
+        return result
     
-    def get_items_by_date_range(self, start_date: str, end_date: str) -> List[Dict]:
-        """Get items within date range"""
+    @traced('db.get_items_by_date_range')
+    @timed('db_read')
+    def get_items_by_date_range(self, start_date: str, end_date: str) -> List[Item]:
+        """Get items within date range (ISO datetimes; compared as UTC instants)"""
+        start_epoch, _ = normalize_datetime(start_date)
+        end_epoch, _ = normalize_datetime(end_date)
+        if start_epoch is None or end_epoch is None:
+            return []
+        
         conn = self.get_connection()
         cursor = conn.cursor()
+        cursor.row_factory = item_row_factory
+        
+        cursor.execute(f'''
+            SELECT {ITEM_SELECT} FROM items 
+            WHERE datetime_utc >= ? 
+            AND datetime_utc <= ?
+            ORDER BY datetime_utc ASC
+        ''', (start_epoch, end_epoch))
         
-        cursor.execute('''
-            SELECT * FROM items 
-            WHERE datetime IS NOT NULL 
-            AND datetime >= ? 
-            AND datetime <= ?
-            ORDER BY datetime ASC
+        items = cursor.fetchall()
+        conn.close()
+        
+        return items
+    
+    @traced('db.get_items_by_local_dates')
+    @timed('db_read')
+    def get_items_by_local_dates(self, start_date: str, end_date: str) -> List[Item]:
+        """Get items whose local day (YYYY-MM-DD) falls in [start_date, end_date], in time order"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        cursor.row_factory = item_row_factory
+        
+        cursor.execute(f'''
+            SELECT {ITEM_SELECT} FROM items 
+            WHERE local_date >= ? 
+            AND local_date <= ?
+            ORDER BY local_date ASC, datetime_utc ASC
         ''', (start_date, end_date))
         
-        rows = cursor.fetchall()
+        items = cursor.fetchall()
         conn.close()
         
-        return [dict(row) for row in rows]
\ No newline at end of file
+        return items
@@ -0,0 +1,178 @@
+"""
+Single writer thread with group commit for SQLite.
+
+Every Database write is a function of a cursor, submitted to
+SQLiteWriter and answered with a Future. The writer thread owns the only
+write connection: it takes the first queued op, collects more for up to
+DB_WRITER_BATCH_MS (or DB_WRITER_MAX_BATCH ops), and runs them all in
+one IMMEDIATE transaction, each inside its own savepoint so a failing op
+rolls back alone. Futures resolve only after COMMIT, so a result is never
+reported for data that is not yet durable.
+
+One commit (and fsync) per group instead of per op, and no writers
+queueing on SQLite's lock, is what removes `database is locked` under
+concurrent parse/sync/PUT traffic. The database is switched to WAL so
+reads on their own connections never wait for the writer.
+"""
+import os
+import queue
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, List, Optional, Tuple
+
+from log_config import get_logger
+from metrics import Histogram, timed
+
+logger = get_logger('db_writer')
+
+WRITE_BATCH_SIZE = Histogram('db_write_batch_ops', 'Write ops committed per group commit',
+                             buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256))
+
+WriteOp = Callable[[sqlite3.Cursor], Any]
+
+_STOP = object()
+
+def open_write_connection(db_path: str, synchronous: str = 'FULL') -> sqlite3.Connection:
+    """Autocommit connection (transactions are explicit) in WAL mode"""
+    conn = sqlite3.connect(db_path, isolation_level=None, check_same_thread=False, timeout=30)
+    conn.row_factory = sqlite3.Row
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute(f'PRAGMA synchronous={synchronous}')
+    return conn
+
+def run_in_transaction(conn: sqlite3.Connection, op: WriteOp, *args) -> Any:
+    """Run one op in its own IMMEDIATE transaction (the path used without a writer thread)"""
+    cursor = conn.cursor()
+    cursor.execute('BEGIN IMMEDIATE')
+    try:
+        with timed('db_write'):
+            result = op(cursor, *args)
+        with timed('db_commit'):
+            cursor.execute('COMMIT')
+        return result
+    except BaseException:
+        cursor.execute('ROLLBACK')
+        raise
+
+class SQLiteWriter:
+    """Queue of write ops executed by one thread with group commit"""
+    
+    def __init__(self, db_path: str, batch_ms: float = 2.0, max_batch: int = 64, synchronous: str = 'FULL'):
+        self.db_path = db_path
+        self.batch_seconds = batch_ms / 1000
+        self.max_batch = max_batch
+        self.synchronous = synchronous
+        self._queue: 'queue.Queue' = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._pid: Optional[int] = None
+        self._lock = threading.Lock()
+    
+    def _ensure_started_locked(self):
+        # Started on first write, after close(), and again in a forked child (threads do not survive fork)
+        if self._thread is None or self._pid != os.getpid():
+            self._queue = queue.Queue()
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, args=(self._queue,), name='sqlite-writer', daemon=True)
+            self._thread.start()
+    
+    def submit(self, op: WriteOp, *args) -> Future:
+        """Queue `op(cursor, *args)`; the Future holds its return value once committed"""
+        future = Future()
+        # Under the lock, so nothing is ever queued behind close()'s stop marker
+        with self._lock:
+            self._ensure_started_locked()
+            self._queue.put((op, args, future))
+        return future
+    
+    def run(self, op: WriteOp, *args) -> Any:
+        """submit() and wait"""
+        return self.submit(op, *args).result()
+    
+    def close(self, timeout: float = 5.0):
+        """Commit what is queued, then stop the thread; ops it could not run fail instead of hanging"""
+        with self._lock:
+            thread, pending = self._thread, self._queue
+            if thread is None or self._pid != os.getpid():
+                return
+            pending.put(_STOP)
+            self._thread = None
+        thread.join(timeout)
+        if thread.is_alive():
+            logger.warning("SQLite writer still busy after close timeout", extra={'timeout': timeout})
+            return
+        # Only left behind if the thread died early; their callers would otherwise wait forever
+        error = RuntimeError("SQLite writer closed before the write ran")
+        while True:
+            try:
+                entry = pending.get_nowait()
+            except queue.Empty:
+                break
+            if entry is not _STOP and entry[2].set_running_or_notify_cancel():
+                entry[2].set_exception(error)
+    
+    def _next_batch(self, pending: 'queue.Queue', first) -> Tuple[List, bool]:
+        batch = [first]
+        deadline = time.monotonic() + self.batch_seconds
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            try:
+                entry = pending.get(timeout=remaining) if remaining > 0 else pending.get_nowait()
+            except queue.Empty:
+                break
+            if entry is _STOP:
+                return batch, True
+            batch.append(entry)
+        return batch, False
+    
+    def _run(self, pending: 'queue.Queue'):
+        conn = open_write_connection(self.db_path, self.synchronous)
+        stopping = False
+        try:
+            while not stopping:
+                first = pending.get()
+                if first is _STOP:
+                    break
+                batch, stopping = self._next_batch(pending, first)
+                self._commit_batch(conn, batch)
+        finally:
+            conn.close()
+    
+    def _commit_batch(self, conn: sqlite3.Connection, batch: List):
+        cursor = conn.cursor()
+        outcomes = []
+        try:
+            cursor.execute('BEGIN IMMEDIATE')
+            for op, args, future in batch:
+                if not future.set_running_or_notify_cancel():
+                    continue
+                cursor.execute('SAVEPOINT op')
+                try:
+                    # Timed here, not around Database's methods: with wait=False those return at enqueue
+                    with timed('db_write'):
+                        result = op(cursor, *args)
+                    outcomes.append((future, result, None))
+                    cursor.execute('RELEASE op')
+                except Exception as e:
+                    cursor.execute('ROLLBACK TO op')
+                    cursor.execute('RELEASE op')
+                    outcomes.append((future, None, e))
+            with timed('db_commit'):
+                cursor.execute('COMMIT')
+        except Exception as e:
+            logger.exception("Group commit failed", extra={'ops': len(batch)})
+            if conn.in_transaction:
+                cursor.execute('ROLLBACK')
+            # Including ops never started (BEGIN itself failed, e.g. `database is locked`)
+            for op, args, future in batch:
+                if future.running() or (not future.done() and future.set_running_or_notify_cancel()):
+                    future.set_exception(e)
+            return
+        
+        WRITE_BATCH_SIZE.observe(len(batch))
+        for future, result, error in outcomes:
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(result)
@@ -0,0 +1,253 @@
+"""
+In-process pub/sub for live item updates, streamed as server-sent events.
+
+Services publish `item.created`, `item.updated`, `item.deleted` and
+`sync.progress` events on BUS; /api/events (Flask, one thread per
+client) and its native ASGI twin in asgi.py (no thread per client)
+stream them to every subscriber. Each event is serialized once into an
+SSE frame at publish time, whatever the number of subscribers.
+
+Subscribers have bounded buffers: one that falls EVENTS_QUEUE_SIZE
+events behind is dropped and its stream ends, so a stalled client never
+holds memory or slows publishers. Event ids are `<boot>-<n>`, the boot
+part unique to the process: clients reconnect with Last-Event-ID and get
+the missed events replayed from a ring of recent ones, or a `resync`
+event when too many were missed or the id came from another process (a
+restart, or another server worker).
+
+The item.* events are per process. So that writes handled by any worker
+reach every stream, each process with subscribers also polls the shared
+items_version counter every EVENTS_POLL_SECONDS and publishes
+`items.changed` when it moves; clients then pull /api/items/changes.
+"""
+import asyncio
+import itertools
+import json
+import secrets
+import threading
+import time
+from collections import deque
+from typing import Callable, Deque, Dict, Iterator, List, Optional, Tuple
+
+from config import Config
+from log_config import get_logger
+from metrics import Counter, Gauge
+
+logger = get_logger('events')
+
+EVENTS_PUBLISHED = Counter('events_published_total', 'Events published on the in-process bus', ['type'])
+EVENTS_DROPPED = Counter('events_subscribers_dropped_total', 'Subscribers dropped for falling behind')
+EVENTS_SUBSCRIBERS = Gauge('events_subscribers', 'Connected event stream subscribers')
+
+HEARTBEAT_FRAME = b': heartbeat\n\n'
+# No id, so the client's Last-Event-ID is kept
+RESYNC_FRAME = b'event: resync\ndata: {}\n\n'
+
+def format_sse(event_id: str, event_type: str, data: Dict) -> bytes:
+    payload = json.dumps(data, separators=(',', ':'), default=str)
+    return f"id: {event_id}\nevent: {event_type}\ndata: {payload}\n\n".encode('utf-8')
+
+class Subscription:
+    """One subscriber's bounded buffer of SSE frames; read with get() or aget()"""
+    
+    def __init__(self, bus: 'EventBus', maxsize: int, loop: Optional[asyncio.AbstractEventLoop] = None):
+        self.bus = bus
+        self.maxsize = maxsize
+        self.dropped = False
+        self._frames: Deque[bytes] = deque()
+        self._cond = threading.Condition()
+        # Async subscribers are woken on their event loop instead of the condition
+        self._loop = loop
+        self._ready = asyncio.Event() if loop is not None else None
+    
+    def deliver(self, frame: bytes) -> bool:
+        """Called by publishers; False once the subscriber has been dropped"""
+        with self._cond:
+            if self.dropped:
+                return False
+            if len(self._frames) >= self.maxsize:
+                self.dropped = True
+                self._frames.clear()
+            else:
+                self._frames.append(frame)
+            self._cond.notify()
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._ready.set)
+        return not self.dropped
+    
+    def _drain(self) -> List[bytes]:
+        frames = list(self._frames)
+        self._frames.clear()
+        return frames
+    
+    def get(self, timeout: float) -> List[bytes]:
+        """Pending frames, waiting up to `timeout` seconds; [] on timeout or when dropped"""
+        with self._cond:
+            if not self._frames and not self.dropped:
+                self._cond.wait(timeout)
+            return self._drain()
+    
+    async def aget(self, timeout: float) -> List[bytes]:
+        """get() for subscribers created with a loop"""
+        try:
+            await asyncio.wait_for(self._ready.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        self._ready.clear()
+        with self._cond:
+            return self._drain()
+    
+    def close(self):
+        self.bus.unsubscribe(self)
+
+class EventBus:
+    """Fan-out of published events to subscriptions, plus a replay ring for reconnects"""
+    
+    def __init__(self, queue_size: int = 256, replay_size: int = 256):
+        self.queue_size = queue_size
+        self.replay_size = replay_size
+        self.reset()
+    
+    def reset(self):
+        """Start over with a new boot id (a forked worker must not share its parent's ids or subscribers)"""
+        self._lock = threading.Lock()
+        self.boot_id = secrets.token_hex(4)
+        self._subscribers: List[Subscription] = []
+        self._ids = itertools.count(1)
+        self._recent: Deque[Tuple[int, bytes]] = deque(maxlen=self.replay_size)
+        self._watcher: Optional[threading.Thread] = None
+    
+    @property
+    def has_subscribers(self) -> bool:
+        """Publishers can skip building payloads when nobody is listening"""
+        return bool(self._subscribers)
+    
+    @property
+    def blocking_subscribers(self) -> int:
+        """Subscribers each holding a server thread (those created without a loop)"""
+        return sum(1 for subscription in self._subscribers if subscription._loop is None)
+    
+    def subscribe(self, last_event_id: Optional[Tuple[str, int]] = None,
+                  loop: Optional[asyncio.AbstractEventLoop] = None) -> Subscription:
+        subscription = Subscription(self, self.queue_size, loop)
+        with self._lock:
+            if last_event_id is not None:
+                boot_id, last_seq = last_event_id
+                missed = [frame for seq, frame in self._recent if seq > last_seq]
+                oldest = self._recent[0][0] if self._recent else 1
+                latest = self._recent[-1][0] if self._recent else 0
+                if (boot_id != self.boot_id or oldest > last_seq + 1 or last_seq > latest
+                        or len(missed) >= self.queue_size):
+                    # Replay cannot cover the gap (or the id is from another process); the client refetches
+                    subscription.deliver(RESYNC_FRAME)
+                else:
+                    for frame in missed:
+                        subscription.deliver(frame)
+            self._subscribers.append(subscription)
+        EVENTS_SUBSCRIBERS.inc()
+        return subscription
+    
+    def unsubscribe(self, subscription: Subscription):
+        with self._lock:
+            if subscription not in self._subscribers:
+                return
+            self._subscribers.remove(subscription)
+        EVENTS_SUBSCRIBERS.dec()
+    
+    def publish(self, event_type: str, data: Dict) -> str:
+        """Send an event to every subscriber; returns its id"""
+        with self._lock:
+            seq = next(self._ids)
+            event_id = f"{self.boot_id}-{seq}"
+            frame = format_sse(event_id, event_type, data)
+            self._recent.append((seq, frame))
+            subscribers = list(self._subscribers)
+        EVENTS_PUBLISHED.labels(event_type).inc()
+        
+        for subscription in subscribers:
+            if not subscription.deliver(frame):
+                self.unsubscribe(subscription)
+                EVENTS_DROPPED.inc()
+                logger.warning("Dropped slow event subscriber", extra={'event_id': event_id})
+        return event_id
+    
+    def watch_version(self, read_version: Callable[[], int], interval: float = None):
+        """
+        Poll `read_version` (the shared items_version) while anyone is
+        subscribed and publish `items.changed` when it moves, whichever
+        process made the write. Starts one daemon thread; later calls are no-ops.
+        """
+        with self._lock:
+            if self._watcher is not None:
+                return
+            self._watcher = threading.Thread(
+                target=self._watch, args=(read_version, interval or Config.EVENTS_POLL_SECONDS),
+                name='events-version-watch', daemon=True
+            )
+            self._watcher.start()
+    
+    def _watch(self, read_version: Callable[[], int], interval: float):
+        watcher = threading.current_thread()
+        version = None
+        while self._watcher is watcher:
+            time.sleep(interval)
+            if not self._subscribers:
+                # Nobody to tell; start from the current version once someone subscribes
+                version = None
+                continue
+            try:
+                current = read_version()
+            except Exception:
+                logger.exception("Failed to read items_version for events")
+                continue
+            if version is not None and current != version:
+                self.publish('items.changed', {'version': current})
+            version = current
+
+BUS = EventBus(queue_size=Config.EVENTS_QUEUE_SIZE, replay_size=Config.EVENTS_REPLAY_SIZE)
+
+def publish(event_type: str, **data) -> Optional[str]:
+    """Publish on BUS; never raises into the caller's write path"""
+    try:
+        return BUS.publish(event_type, data)
+    except Exception:
+        logger.exception("Failed to publish event", extra={'event_type': event_type})
+        return None
+
+def parse_last_event_id(value: Optional[str]) -> Optional[Tuple[str, int]]:
+    """(boot id, sequence) from a `<boot>-<n>` event id; ids from older releases get ('', n) and a resync"""
+    if not value:
+        return None
+    boot_id, _, seq = value.strip().rpartition('-')
+    try:
+        return boot_id, int(seq)
+    except ValueError:
+        return None
+
+def stream(subscription: Subscription, heartbeat: float = None) -> Iterator[bytes]:
+    """SSE body for a blocking server: frames as they arrive, a comment line when idle"""
+    heartbeat = heartbeat or Config.EVENTS_HEARTBEAT_SECONDS
+    try:
+        yield f"retry: {int(Config.EVENTS_RETRY_MS)}\n\n".encode('utf-8')
+        last_write = time.monotonic()
+        while not subscription.dropped:
+            frames = subscription.get(timeout=heartbeat)
+            if frames:
+                yield b''.join(frames)
+                last_write = time.monotonic()
+            elif time.monotonic() - last_write >= heartbeat:
+                yield HEARTBEAT_FRAME
+                last_write = time.monotonic()
+    finally:
+        subscription.close()
+
+async def astream(subscription: Subscription, heartbeat: float = None):
+    """stream() for the event loop"""
+    heartbeat = heartbeat or Config.EVENTS_HEARTBEAT_SECONDS
+    try:
+        yield f"retry: {int(Config.EVENTS_RETRY_MS)}\n\n".encode('utf-8')
+        while not subscription.dropped:
+            frames = await subscription.aget(timeout=heartbeat)
+            yield b''.join(frames) if frames else HEARTBEAT_FRAME
+    finally:
+        subscription.close()
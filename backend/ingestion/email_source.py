@@ -18,7 +18,9 @@ class EmailSource(DataSource):
     
     def __init__(self, use_mock=True):
         self.use_mock = use_mock
-        self.mock_file = 'backend/ingestion/mock_data/email_messages.json'
+        # Use absolute path from current file location (as CalendarSource does)
+        current_dir = os.path.dirname(os.path.abspath(__file__))
+        self.mock_file = os.path.join(current_dir, 'mock_data', 'email_messages.json')
     
     def fetch_data(self) -> List[Dict]:
         """Fetch emails"""
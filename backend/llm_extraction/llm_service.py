@@ -1,71 +1,138 @@
 import json
 import requests
-from typing import Dict
+from typing import Dict, Optional
 from config import Config
+from metrics import timed
+from tracing import span, outgoing_headers
 from llm_extraction.prompts import get_system_prompt, get_user_prompt, get_email_extraction_prompt
 
+PARSE_TIMEOUT = 45  # INCREASED: Give more time (was 15, now 45 seconds)
+EMAIL_TIMEOUT = 30
+
+# Timing/token counters Ollama returns with every non-streamed response (durations in ns)
+OLLAMA_STATS = ('total_duration', 'load_duration', 'prompt_eval_duration', 'eval_duration',
+                'prompt_eval_count', 'eval_count')
+
+def _strip_code_fence(text: str) -> str:
+    """Remove a ```json fence the model sometimes wraps around its output"""
+    text = text.strip()
+    if text.startswith('```json'):
+        text = text.replace('```json', '').replace('```', '').strip()
+    elif text.startswith('```'):
+        text = text.replace('```', '').strip()
+    return text
+
+def _record_ollama_stats(current_span, status_code: int, ollama_response: Optional[Dict]):
+    current_span.set_attribute('http.status_code', status_code)
+    if ollama_response:
+        current_span.set_attributes({
+            f"ollama.{key}": ollama_response[key] for key in OLLAMA_STATS if key in ollama_response
+        })
+
 class LLMService:
     def __init__(self):
         self.base_url = Config.OLLAMA_BASE_URL
         self.model = Config.OLLAMA_MODEL
+        self._async_client = None
     
-    def parse_natural_language(self, user_input: str) -> dict:
-        """Send natural language input to Ollama and get structured JSON back"""
+    def _parse_payload(self, user_input: str) -> Dict:
+        full_prompt = f"{get_system_prompt()}\n\n{get_user_prompt(user_input)}"
+        return {
+            "model": self.model,
+            "prompt": full_prompt,
+            "stream": False,
+            "format": "json",
+            "options": {
+                "temperature": 0.1,
+                "num_predict": 200,  # INCREASED: Was 100, now 200 for complete JSON
+                "num_ctx": 1024,     # INCREASED: Was 512, now 1024 for better understanding
+                "top_p": 0.9,
+                "top_k": 40
+            }
+        }
+    
+    def _email_payload(self, email_data: Dict) -> Dict:
+        prompt = get_email_extraction_prompt(
+            email_data.get('subject', ''),
+            email_data.get('snippet', '')
+        )
+        return {
+            "model": self.model,
+            "prompt": prompt,
+            "stream": False,
+            "format": "json",
+            "options": {
+                "temperature": 0.1,
+                "num_predict": 100,
+                "num_ctx": 512
+            }
+        }
+    
+    def _parse_result(self, status_code: int, ollama_response: Optional[Dict]) -> dict:
+        """Turn an Ollama /api/generate response into the parse result dict"""
+        if status_code != 200:
+            return {
+                "success": False,
+                "error": "Ollama API error",
+                "details": f"Status code: {status_code}"
+            }
+        
+        response_text = _strip_code_fence(ollama_response.get('response', ''))
+        
         try:
-            full_prompt = f"{get_system_prompt()}\n\n{get_user_prompt(user_input)}"
-            
-            response = requests.post(
-                f"{self.base_url}/api/generate",
-                json={
-                    "model": self.model,
-                    "prompt": full_prompt,
-                    "stream": False,
-                    "format": "json",
-                    "options": {
-                        "temperature": 0.1,
-                        "num_predict": 200,  # INCREASED: Was 100, now 200 for complete JSON
-                        "num_ctx": 1024,     # INCREASED: Was 512, now 1024 for better understanding
-                        "top_p": 0.9,
-                        "top_k": 40
-                    }
-                },
-                timeout=45  # INCREASED: Give more time (was 15, now 45 seconds)
-            )
-            
-            if response.status_code != 200:
-                return {
-                    "success": False,
-                    "error": "Ollama API error",
-                    "details": f"Status code: {response.status_code}"
-                }
-            
-            ollama_response = response.json()
-            response_text = ollama_response.get('response', '')
-            
-            response_text = response_text.strip()
-            if response_text.startswith('```json'):
-                response_text = response_text.replace('```json', '').replace('```', '').strip()
-            elif response_text.startswith('```'):
-                response_text = response_text.replace('```', '').strip()
-            
-            parsed = json.loads(response_text)
-            
-            if 'items' not in parsed:
-                if 'type' in parsed and 'title' in parsed:
-                    parsed = {'items': [parsed]}
-                else:
-                    return {
-                        "success": False,
-                        "error": "Invalid JSON structure",
-                        "details": "Missing 'items' array"
-                    }
-            
+            with span('llm.parse_json', {'llm.response_chars': len(response_text)}), timed('llm_json_parse'):
+                parsed = json.loads(response_text)
+        except json.JSONDecodeError as e:
             return {
-                "success": True,
-                "data": parsed,
+                "success": False,
+                "error": "Failed to parse LLM response as JSON",
+                "details": str(e),
                 "raw_response": response_text
             }
-            
+        
+        if 'items' not in parsed:
+            if 'type' in parsed and 'title' in parsed:
+                parsed = {'items': [parsed]}
+            else:
+                return {
+                    "success": False,
+                    "error": "Invalid JSON structure",
+                    "details": "Missing 'items' array"
+                }
+        
+        return {
+            "success": True,
+            "data": parsed,
+            "raw_response": response_text
+        }
+    
+    def _email_result(self, status_code: int, ollama_response: Optional[Dict]) -> dict:
+        if status_code != 200:
+            return {"success": False, "error": "LLM request failed"}
+        
+        result_text = _strip_code_fence(ollama_response.get('response', '{}'))
+        with span('llm.parse_json', {'llm.response_chars': len(result_text)}), timed('llm_json_parse'):
+            data = json.loads(result_text)
+        return {
+            "success": True,
+            "data": data
+        }
+    
+    def parse_natural_language(self, user_input: str) -> dict:
+        """Send natural language input to Ollama and get structured JSON back"""
+        try:
+            with span('llm.generate', {'llm.model': self.model, 'llm.task': 'parse'}) as current:
+                with timed('llm_call'):
+                    response = requests.post(
+                        f"{self.base_url}/api/generate",
+                        json=self._parse_payload(user_input),
+                        headers=outgoing_headers(),
+                        timeout=PARSE_TIMEOUT
+                    )
+                body = response.json() if response.status_code == 200 else None
+                _record_ollama_stats(current, response.status_code, body)
+            return self._parse_result(response.status_code, body)
+        
         except requests.exceptions.ConnectionError:
             return {
                 "success": False,
@@ -78,13 +145,6 @@ class LLMService:
                 "error": "Ollama request timeout",
                 "details": "Request took too long (>45s). Try a simpler query or use a faster model."
             }
-        except json.JSONDecodeError as e:
-            return {
-                "success": False,
-                "error": "Failed to parse LLM response as JSON",
-                "details": str(e),
-                "raw_response": response_text if 'response_text' in locals() else None
-            }
         except Exception as e:
             return {
                 "success": False,
@@ -94,42 +154,91 @@ class LLMService:
     
     def extract_from_email(self, email_data: Dict) -> dict:
         """Extract task/reminder from email using LLM"""
-        prompt = get_email_extraction_prompt(
-            email_data.get('subject', ''),
-            email_data.get('snippet', '')
-        )
-        
         try:
-            response = requests.post(
-                f"{self.base_url}/api/generate",
-                json={
-                    "model": self.model,
-                    "prompt": prompt,
-                    "stream": False,
-                    "format": "json",
-                    "options": {
-                        "temperature": 0.1, 
-                        "num_predict": 100,
-                        "num_ctx": 512
-                    }
-                },
-                timeout=30
+            with span('llm.generate', {'llm.model': self.model, 'llm.task': 'email'}) as current:
+                with timed('llm_call'):
+                    response = requests.post(
+                        f"{self.base_url}/api/generate",
+                        json=self._email_payload(email_data),
+                        headers=outgoing_headers(),
+                        timeout=EMAIL_TIMEOUT
+                    )
+                body = response.json() if response.status_code == 200 else None
+                _record_ollama_stats(current, response.status_code, body)
+            return self._email_result(response.status_code, body)
+        
+        except Exception as e:
+            return {"success": False, "error": str(e)}
+    
+    # Async variants (used by the ASGI endpoints in asgi.py)
+    
+    def _get_async_client(self):
+        """Shared httpx client; one connection pool serves every in-flight request"""
+        if self._async_client is None:
+            import httpx
+            self._async_client = httpx.AsyncClient(
+                base_url=self.base_url,
+                limits=httpx.Limits(
+                    max_connections=Config.ASYNC_LLM_MAX_CONNECTIONS,
+                    max_keepalive_connections=Config.ASYNC_LLM_MAX_CONNECTIONS
+                )
             )
-            
-            if response.status_code == 200:
-                result_text = response.json().get('response', '{}')
-                result_text = result_text.strip()
-                if result_text.startswith('```json'):
-                    result_text = result_text.replace('```json', '').replace('```', '').strip()
-                
-                result = json.loads(result_text)
-                
-                return {
-                    "success": True,
-                    "data": result
-                }
-            else:
-                return {"success": False, "error": "LLM request failed"}
+        return self._async_client
+    
+    async def aclose(self):
+        if self._async_client is not None:
+            await self._async_client.aclose()
+            self._async_client = None
+    
+    async def aparse_natural_language(self, user_input: str) -> dict:
+        """Async version of parse_natural_language"""
+        import httpx
+        try:
+            with span('llm.generate', {'llm.model': self.model, 'llm.task': 'parse'}) as current:
+                with timed('llm_call'):
+                    response = await self._get_async_client().post(
+                        "/api/generate",
+                        json=self._parse_payload(user_input),
+                        headers=outgoing_headers(),
+                        timeout=PARSE_TIMEOUT
+                    )
+                body = response.json() if response.status_code == 200 else None
+                _record_ollama_stats(current, response.status_code, body)
+            return self._parse_result(response.status_code, body)
+        
+        except httpx.ConnectError:
+            return {
+                "success": False,
+                "error": "Cannot connect to Ollama",
+                "details": "Make sure Ollama is running (ollama serve)"
+            }
+        except httpx.TimeoutException:
+            return {
+                "success": False,
+                "error": "Ollama request timeout",
+                "details": "Request took too long (>45s). Try a simpler query or use a faster model."
+            }
+        except Exception as e:
+            return {
+                "success": False,
+                "error": "LLM service error",
+                "details": str(e)
+            }
+    
+    async def aextract_from_email(self, email_data: Dict) -> dict:
+        """Async version of extract_from_email"""
+        try:
+            with span('llm.generate', {'llm.model': self.model, 'llm.task': 'email'}) as current:
+                with timed('llm_call'):
+                    response = await self._get_async_client().post(
+                        "/api/generate",
+                        json=self._email_payload(email_data),
+                        headers=outgoing_headers(),
+                        timeout=EMAIL_TIMEOUT
+                    )
+                body = response.json() if response.status_code == 200 else None
+                _record_ollama_stats(current, response.status_code, body)
+            return self._email_result(response.status_code, body)
         
         except Exception as e:
-            return {"success": False, "error": str(e)}
\ No newline at end of file
+            return {"success": False, "error": str(e)}
@@ -0,0 +1,125 @@
+"""
+Logging setup for the backend.
+
+Records are handed to a QueueHandler and written by a background
+QueueListener, so request threads never block on stdout. Output is plain
+text or one JSON object per line (LOG_FORMAT=json); keyword context passed
+via `extra=` becomes structured fields, and records logged while a
+request is being handled carry its request_id.
+"""
+import atexit
+import itertools
+import json
+import logging
+import logging.handlers
+import queue
+import sys
+import threading
+from typing import Optional
+
+from config import Config
+from tracing import get_request_id
+
+ROOT_LOGGER = 'productivity'
+
+# Attributes every LogRecord has; anything else came from `extra=`
+_RESERVED_ATTRS = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+_listener: Optional[logging.handlers.QueueListener] = None
+_setup_lock = threading.Lock()
+
+class RequestIdFilter(logging.Filter):
+    """Tag records with the current request id (runs in the caller's thread, before queueing)"""
+    
+    def filter(self, record: logging.LogRecord) -> bool:
+        request_id = get_request_id()
+        if request_id and not hasattr(record, 'request_id'):
+            record.request_id = request_id
+        return True
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line with any `extra=` fields merged in"""
+    
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            'ts': self.formatTime(record, '%Y-%m-%dT%H:%M:%S'),
+            'level': record.levelname,
+            'logger': record.name,
+            'msg': record.getMessage()
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RESERVED_ATTRS and not key.startswith('_'):
+                payload[key] = value
+        if record.exc_info:
+            payload['exc'] = self.formatException(record.exc_info)
+        return json.dumps(payload, default=str)
+
+class TextFormatter(logging.Formatter):
+    """Readable single-line output with `extra=` fields appended as key=value"""
+    
+    def __init__(self):
+        super().__init__('%(asctime)s %(levelname)-7s %(name)s: %(message)s', '%H:%M:%S')
+    
+    def format(self, record: logging.LogRecord) -> str:
+        line = super().format(record)
+        fields = [f"{key}={value}" for key, value in record.__dict__.items()
+                  if key not in _RESERVED_ATTRS and not key.startswith('_')]
+        return f"{line} {' '.join(fields)}" if fields else line
+
+def setup_logging(level: Optional[str] = None, fmt: Optional[str] = None, force: bool = False):
+    """
+    Install the queue-backed handler on the 'productivity' logger.
+    
+    Safe to call repeatedly; pass force=True in a forked child, whose copy
+    of the listener thread does not exist.
+    """
+    global _listener
+    with _setup_lock:
+        if _listener is not None and not force:
+            return
+        
+        root = logging.getLogger(ROOT_LOGGER)
+        for handler in list(root.handlers):
+            root.removeHandler(handler)
+        
+        stream_handler = logging.StreamHandler(sys.stdout)
+        stream_handler.setFormatter(JsonFormatter() if (fmt or Config.LOG_FORMAT) == 'json' else TextFormatter())
+        
+        log_queue = queue.SimpleQueue()
+        queue_handler = logging.handlers.QueueHandler(log_queue)
+        queue_handler.addFilter(RequestIdFilter())
+        root.addHandler(queue_handler)
+        root.setLevel((level or Config.LOG_LEVEL).upper())
+        root.propagate = False
+        
+        _listener = logging.handlers.QueueListener(log_queue, stream_handler, respect_handler_level=True)
+        _listener.start()
+
+def stop_logging():
+    """Drain queued records (registered at exit)"""
+    global _listener
+    with _setup_lock:
+        if _listener is not None:
+            _listener.stop()
+            _listener = None
+
+atexit.register(stop_logging)
+
+def get_logger(name: str) -> logging.Logger:
+    """Logger under the 'productivity' namespace"""
+    return logging.getLogger(f"{ROOT_LOGGER}.{name}")
+
+class LogSampler:
+    """
+    Let one in every `every` calls through, for per-item debug lines.
+    
+    Callers should check logger.isEnabledFor(logging.DEBUG) first so the
+    sampler is never touched at INFO level.
+    """
+    
+    def __init__(self, every: int):
+        self.every = max(1, every)
+        self._counter = itertools.count()
+    
+    def __call__(self) -> bool:
+        return next(self._counter) % self.every == 0
@@ -0,0 +1,307 @@
+"""
+Lightweight in-process metrics with Prometheus text exposition.
+
+Counters, gauges and histograms keep their state in plain Python objects
+guarded by one lock per series, so recording costs a couple of
+perf_counter() calls and a bisect. Each server process exposes its own
+series at /metrics. Workers of one serve.py share a port, so with
+SERVER_WORKERS > 1 a scrape reaches one of them at random and sees only its
+counters: run a single worker (raising SERVER_THREADS instead), or one
+single-worker instance per port (`serve.py --workers 1 --port 5001`, ...)
+and scrape every port, summing at the collector.
+"""
+import abc
+import bisect
+import functools
+import inspect
+import threading
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+
+# Spans fast DB reads (ms) through LLM calls (tens of seconds)
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+def _escape(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(f'{extra[0]}="{extra[1]}"')
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+class _Metric(abc.ABC):
+    kind = ''
+    
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), registry=None):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+        (registry or REGISTRY).register(self)
+    
+    def labels(self, *values, **kwargs):
+        """Series for one label combination (created on first use)"""
+        if kwargs:
+            values = tuple(str(kwargs[name]) for name in self.labelnames)
+        else:
+            values = tuple(str(v) for v in values)
+        child = self._children.get(values)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(values, self._new_child())
+        return child
+    
+    def _default(self):
+        return self.labels()
+    
+    @abc.abstractmethod
+    def _new_child(self):
+        """A fresh series for one label combination"""
+    
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for values, child in sorted(self._children.items()):
+            lines.extend(child.render(self.name, self.labelnames, values))
+        return lines
+
+class _CounterChild:
+    def __init__(self):
+        self._value = 0.0
+        self._lock = threading.Lock()
+    
+    def inc(self, amount: float = 1.0):
+        with self._lock:
+            self._value += amount
+    
+    @property
+    def value(self) -> float:
+        return self._value
+    
+    def render(self, name, labelnames, values):
+        return [f"{name}{_format_labels(labelnames, values)} {_format_value(self._value)}"]
+
+class Counter(_Metric):
+    kind = 'counter'
+    
+    def _new_child(self):
+        return _CounterChild()
+    
+    def inc(self, amount: float = 1.0):
+        self._default().inc(amount)
+
+class _GaugeChild(_CounterChild):
+    def dec(self, amount: float = 1.0):
+        self.inc(-amount)
+    
+    def set(self, value: float):
+        with self._lock:
+            self._value = value
+
+class Gauge(_Metric):
+    kind = 'gauge'
+    
+    def _new_child(self):
+        return _GaugeChild()
+    
+    def inc(self, amount: float = 1.0):
+        self._default().inc(amount)
+    
+    def dec(self, amount: float = 1.0):
+        self._default().dec(amount)
+    
+    def set(self, value: float):
+        self._default().set(value)
+
+class _HistogramChild:
+    def __init__(self, buckets: Sequence[float]):
+        self._upper_bounds = list(buckets)
+        self._counts = [0] * (len(buckets) + 1)
+        self._sum = 0.0
+        self._lock = threading.Lock()
+    
+    def observe(self, value: float):
+        index = bisect.bisect_left(self._upper_bounds, value)
+        with self._lock:
+            self._counts[index] += 1
+            self._sum += value
+    
+    @property
+    def count(self) -> int:
+        return sum(self._counts)
+    
+    def time(self):
+        return _Timer(self.observe)
+    
+    def render(self, name, labelnames, values):
+        lines = []
+        cumulative = 0
+        with self._lock:
+            counts = list(self._counts)
+            total = self._sum
+        for bound, count in zip(self._upper_bounds + [float('inf')], counts):
+            cumulative += count
+            labels = _format_labels(labelnames, values, ('le', _format_value(bound)))
+            lines.append(f"{name}_bucket{labels} {cumulative}")
+        plain = _format_labels(labelnames, values)
+        lines.append(f"{name}_sum{plain} {_format_value(total)}")
+        lines.append(f"{name}_count{plain} {cumulative}")
+        return lines
+
+class Histogram(_Metric):
+    kind = 'histogram'
+    
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS, registry=None):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames, registry)
+    
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+    
+    def observe(self, value: float):
+        self._default().observe(value)
+    
+    def time(self):
+        return self._default().time()
+
+class _Timer:
+    """Context manager that observes elapsed seconds on exit"""
+    
+    def __init__(self, observe):
+        self._observe = observe
+    
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        self._observe(time.perf_counter() - self._start)
+        return False
+
+class Registry:
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+        self._lock = threading.Lock()
+    
+    def register(self, metric: _Metric):
+        with self._lock:
+            self._metrics.append(metric)
+    
+    def render(self) -> str:
+        """Prometheus text exposition format (version 0.0.4)"""
+        lines = []
+        for metric in list(self._metrics):
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+REGISTRY = Registry()
+
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+HTTP_REQUESTS = Counter('http_requests_total', 'HTTP requests handled', ['method', 'endpoint', 'status'])
+HTTP_LATENCY = Histogram('http_request_duration_seconds', 'HTTP request latency', ['method', 'endpoint'])
+HTTP_IN_FLIGHT = Gauge('http_requests_in_flight', 'HTTP requests currently being handled')
+STAGE_LATENCY = Histogram('stage_duration_seconds', 'Latency of internal stages (LLM, DB, vector, render)', ['stage'])
+STAGE_ERRORS = Counter('stage_errors_total', 'Internal stages that raised', ['stage'])
+
+class _StageTimer:
+    """Time a block or function into stage_duration_seconds{stage=...}"""
+    
+    __slots__ = ('_histogram', '_errors', '_start')
+    
+    def __init__(self, stage: str):
+        self._histogram = STAGE_LATENCY.labels(stage)
+        self._errors = STAGE_ERRORS.labels(stage)
+    
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        self._histogram.observe(time.perf_counter() - self._start)
+        if exc_type is not None:
+            self._errors.inc()
+        return False
+    
+    def __call__(self, func):
+        histogram = self._histogram
+        errors = self._errors
+        
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            except Exception:
+                errors.inc()
+                raise
+            finally:
+                histogram.observe(time.perf_counter() - start)
+        
+        @functools.wraps(func)
+        async def async_wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return await func(*args, **kwargs)
+            except Exception:
+                errors.inc()
+                raise
+            finally:
+                histogram.observe(time.perf_counter() - start)
+        
+        return async_wrapper if inspect.iscoroutinefunction(func) else wrapper
+
+def timed(stage: str) -> _StageTimer:
+    """Use as @timed('db_read') or `with timed('llm_call'):`"""
+    return _StageTimer(stage)
+
+def instrument_flask(app):
+    """Record request count, latency and in-flight requests for every Flask route"""
+    from flask import g, request
+    
+    @app.before_request
+    def _metrics_start():
+        g._metrics_start = time.perf_counter()
+        g._metrics_status = 500
+        HTTP_IN_FLIGHT.inc()
+    
+    @app.after_request
+    def _metrics_status(response):
+        g._metrics_status = response.status_code
+        return response
+    
+    @app.teardown_request
+    def _metrics_finish(exc):
+        start = g.pop('_metrics_start', None)
+        if start is None:
+            return
+        HTTP_IN_FLIGHT.dec()
+        endpoint = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+        HTTP_LATENCY.labels(request.method, endpoint).observe(time.perf_counter() - start)
+        HTTP_REQUESTS.labels(request.method, endpoint, g.pop('_metrics_status', 500)).inc()
+
+def instrument_async_endpoint(endpoint: str):
+    """Same request metrics as instrument_flask, for the native ASGI routes in asgi.py"""
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(request):
+            start = time.perf_counter()
+            status = 500
+            HTTP_IN_FLIGHT.inc()
+            try:
+                response = await func(request)
+                status = response.status_code
+                return response
+            finally:
+                HTTP_IN_FLIGHT.dec()
+                HTTP_LATENCY.labels(request.method, endpoint).observe(time.perf_counter() - start)
+                HTTP_REQUESTS.labels(request.method, endpoint, status).inc()
+        return wrapper
+    return decorator
@@ -1,21 +1,373 @@
+"""
+Versioned, online schema migrations for the items database.
+
+The schema version lives in `PRAGMA user_version`; each migration below
+moves it up by one. Migrations only make additive changes in place
+(CREATE ... IF NOT EXISTS, ADD COLUMN) and fill new columns in bounded
+rowid chunks, committing after each chunk so readers and the app's
+writers are never locked out for long. Every step is idempotent and the
+version is bumped only once a migration has finished, so an interrupted
+run simply resumes. Server workers all migrate at startup: a lock file
+next to the database lets one of them run the steps while the others
+wait and then find nothing left to do.
+
+Backups use the SQLite online backup API, which copies pages in steps
+while the database stays in use (unlike copying the file).
+
+    python migrate_database.py             # interactive menu
+    python migrate_database.py --status
+    python migrate_database.py --apply [--chunk-size 5000] [--no-backup]
+"""
 import sqlite3
 import os
 import shutil
+import sys
+import time
 from datetime import datetime
+from typing import Callable, Iterator, List, NamedTuple, Optional, Tuple
+
+from utils import file_lock, normalize_datetime, split_tags
+
+DEFAULT_CHUNK_SIZE = 5000
+BACKUP_PAGES_PER_STEP = 4096
+
+ProgressFn = Callable[[str, int, int], None]
+
+class Migration(NamedTuple):
+    version: int
+    description: str
+    apply: Callable[['MigrationContext'], None]
+
+class MigrationContext:
+    """What a migration step gets: the connection plus chunking/progress settings"""
+    
+    def __init__(self, conn: sqlite3.Connection, chunk_size: int, progress: ProgressFn):
+        self.conn = conn
+        self.chunk_size = chunk_size
+        self.progress = progress
+    
+    def columns(self, table: str) -> List[str]:
+        return [row[1] for row in self.conn.execute(f"PRAGMA table_info({table})")]
+    
+    def add_column(self, table: str, name: str, declaration: str) -> bool:
+        """ALTER TABLE ... ADD COLUMN unless present; False if it already existed"""
+        if name in self.columns(table):
+            return False
+        try:
+            self.conn.execute(f"ALTER TABLE {table} ADD COLUMN {name} {declaration}")
+            self.conn.commit()
+        except sqlite3.OperationalError as e:
+            # Another process migrating the same file got there first
+            if 'duplicate column' not in str(e).lower():
+                raise
+            return False
+        return True
+    
+    def chunks(self, table: str, label: str) -> Iterator[Tuple[int, int]]:
+        """
+        Yield (low, high] rowid ranges of chunk_size covering the table,
+        committing and reporting progress after the caller handles each.
+        """
+        max_rowid = self.conn.execute(f"SELECT max(rowid) FROM {table}").fetchone()[0] or 0
+        for low in range(0, max_rowid, self.chunk_size):
+            high = min(low + self.chunk_size, max_rowid)
+            yield low, high
+            self.conn.commit()
+            self.progress(label, high, max_rowid)
+    
+    def backfill(self, table: str, set_sql: str, where_sql: str, label: str, params: tuple = ()):
+        """
+        UPDATE rows matching where_sql in rowid ranges of chunk_size,
+        committing after each range. where_sql must exclude rows that are
+        already done so a resumed run skips them.
+        """
+        for low, high in self.chunks(table, label):
+            self.conn.execute(
+                f"UPDATE {table} SET {set_sql} WHERE rowid > ? AND rowid <= ? AND ({where_sql})",
+                (low, high, *params)
+            )
+
+MIGRATIONS: List[Migration] = []
 
-def backup_database(db_path):
-    """Create a timestamped backup of the database"""
+def migration(version: int, description: str):
+    """Register a migration; versions must be consecutive starting at 1"""
+    def register(func):
+        assert version == len(MIGRATIONS) + 1, f"migration {version} registered out of order"
+        MIGRATIONS.append(Migration(version, description, func))
+        return func
+    return register
+
+@migration(1, "items table with source/external_id columns and lookup indexes")
+def _baseline(ctx: MigrationContext):
+    # Fresh databases get the full table; databases from before versioning get the missing columns
+    ctx.conn.execute('''
+        CREATE TABLE IF NOT EXISTS items (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            type TEXT NOT NULL CHECK(type IN ('task', 'note', 'reminder')),
+            title TEXT NOT NULL,
+            description TEXT,
+            datetime TEXT,
+            priority TEXT CHECK(priority IN ('low', 'medium', 'high')) DEFAULT 'medium',
+            tags TEXT,
+            completed BOOLEAN DEFAULT 0,
+            source TEXT DEFAULT 'manual',
+            external_id TEXT,
+            created_at TEXT NOT NULL,
+            updated_at TEXT NOT NULL
+        )
+    ''')
+    ctx.add_column('items', 'source', "TEXT DEFAULT 'manual'")
+    ctx.add_column('items', 'external_id', 'TEXT')
+    ctx.backfill('items', "source = 'manual'", 'source IS NULL', 'items.source')
+    ctx.conn.execute('CREATE INDEX IF NOT EXISTS idx_external_id ON items(external_id)')
+    ctx.conn.execute('CREATE INDEX IF NOT EXISTS idx_datetime ON items(datetime)')
+    ctx.conn.commit()
+
+@migration(2, "item_tags join table (tag, item_id) backfilled from items.tags")
+def _item_tags(ctx: MigrationContext):
+    # Primary key (tag, item_id) without rowid is itself the covering index for tag lookups;
+    # idx_item_tags_item serves per-item rewrites and deletes
+    ctx.conn.execute('''
+        CREATE TABLE IF NOT EXISTS item_tags (
+            tag TEXT NOT NULL,
+            item_id INTEGER NOT NULL,
+            PRIMARY KEY (tag, item_id)
+        ) WITHOUT ROWID
+    ''')
+    ctx.conn.execute('CREATE INDEX IF NOT EXISTS idx_item_tags_item ON item_tags(item_id)')
+    # Deletes from any code path drop the item's tags too
+    ctx.conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS item_tags_on_delete AFTER DELETE ON items
+        BEGIN
+            DELETE FROM item_tags WHERE item_id = OLD.id;
+        END
+    ''')
+    for low, high in ctx.chunks('items', 'item_tags'):
+        rows = ctx.conn.execute(
+            "SELECT id, tags FROM items WHERE rowid > ? AND rowid <= ? AND tags IS NOT NULL AND tags != ''",
+            (low, high)
+        ).fetchall()
+        ctx.conn.executemany(
+            'INSERT OR IGNORE INTO item_tags (tag, item_id) VALUES (?, ?)',
+            [(tag, item_id) for item_id, tags in rows for tag in split_tags(tags)]
+        )
+    ctx.conn.commit()
+
+@migration(3, "datetime_utc epoch and local_date columns with range/sort indexes")
+def _normalized_datetimes(ctx: MigrationContext):
+    ctx.add_column('items', 'datetime_utc', 'INTEGER')
+    ctx.add_column('items', 'local_date', 'TEXT')
+    for low, high in ctx.chunks('items', 'items.datetime_utc'):
+        rows = ctx.conn.execute(
+            "SELECT id, datetime FROM items WHERE rowid > ? AND rowid <= ? "
+            "AND datetime IS NOT NULL AND datetime != '' AND datetime_utc IS NULL",
+            (low, high)
+        ).fetchall()
+        ctx.conn.executemany(
+            'UPDATE items SET datetime_utc = ?, local_date = ? WHERE id = ?',
+            [(*normalize_datetime(value), item_id) for item_id, value in rows]
+        )
+    # Built after the backfill so the chunks don't also pay for index maintenance
+    ctx.conn.execute('CREATE INDEX IF NOT EXISTS idx_items_datetime_utc ON items(datetime_utc, created_at)')
+    ctx.conn.execute('CREATE INDEX IF NOT EXISTS idx_items_local_date ON items(local_date, datetime_utc)')
+    ctx.conn.commit()
+
+@migration(4, "counters table with an items_version bumped on every items write")
+def _items_version(ctx: MigrationContext):
+    ctx.conn.execute('''
+        CREATE TABLE IF NOT EXISTS counters (
+            name TEXT PRIMARY KEY,
+            value INTEGER NOT NULL
+        ) WITHOUT ROWID
+    ''')
+    ctx.conn.execute("INSERT OR IGNORE INTO counters (name, value) VALUES ('items_version', 1)")
+    # Updates and deletes bump it from any code path or process. Inserts bump it once per
+    # transaction in Database instead: a per-row insert trigger made bulk loads ~60% slower
+    for event in ('UPDATE', 'DELETE'):
+        ctx.conn.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS items_version_on_{event.lower()} AFTER {event} ON items
+            BEGIN
+                UPDATE counters SET value = value + 1 WHERE name = 'items_version';
+            END
+        ''')
+    ctx.conn.commit()
+
+@migration(5, "updated_at index and item_tombstones for delta sync")
+def _change_feed(ctx: MigrationContext):
+    # Serves the archive's age filter; delta sync pages on change_seq instead (migration 7)
+    ctx.conn.execute('CREATE INDEX IF NOT EXISTS idx_items_updated_at ON items(updated_at)')
+    ctx.conn.execute('''
+        CREATE TABLE IF NOT EXISTS item_tombstones (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            item_id INTEGER NOT NULL,
+            deleted_at TEXT NOT NULL
+        )
+    ''')
+    ctx.conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS item_tombstones_on_delete AFTER DELETE ON items
+        BEGIN
+            INSERT INTO item_tombstones (item_id, deleted_at) VALUES (OLD.id, strftime('%Y-%m-%dT%H:%M:%f', 'now', 'localtime'));
+        END
+    ''')
+    ctx.conn.execute("INSERT OR IGNORE INTO counters (name, value) VALUES ('tombstones_pruned_through', 0)")
+    ctx.conn.commit()
+
+@migration(6, "items_archive and item_archive_tags for archived (cold) items")
+def _archive(ctx: MigrationContext):
+    # Rows keep the id they had in items (AUTOINCREMENT never hands it out again)
+    ctx.conn.execute('''
+        CREATE TABLE IF NOT EXISTS items_archive (
+            id INTEGER PRIMARY KEY,
+            type TEXT NOT NULL,
+            title TEXT NOT NULL,
+            description TEXT,
+            datetime TEXT,
+            priority TEXT,
+            tags TEXT,
+            completed BOOLEAN DEFAULT 0,
+            source TEXT,
+            external_id TEXT,
+            created_at TEXT NOT NULL,
+            updated_at TEXT NOT NULL,
+            datetime_utc INTEGER,
+            local_date TEXT,
+            archived_at TEXT NOT NULL
+        )
+    ''')
+    ctx.conn.execute('CREATE INDEX IF NOT EXISTS idx_items_archive_external_id ON items_archive(external_id)')
+    ctx.conn.execute('CREATE INDEX IF NOT EXISTS idx_items_archive_datetime_utc ON items_archive(datetime_utc, created_at)')
+    ctx.conn.execute('''
+        CREATE TABLE IF NOT EXISTS item_archive_tags (
+            tag TEXT NOT NULL,
+            item_id INTEGER NOT NULL,
+            PRIMARY KEY (tag, item_id)
+        ) WITHOUT ROWID
+    ''')
+    ctx.conn.commit()
+
+@migration(7, "items.change_seq: commit-ordered position for delta sync")
+def _change_seq(ctx: MigrationContext):
+    # Taken from items_version inside the write transaction, so a row committed later always
+    # sorts after every row a client has already seen (updated_at is stamped before the write
+    # is queued and follows the wall clock). Existing rows start at 0; old cursors get a reset.
+    ctx.add_column('items', 'change_seq', 'INTEGER NOT NULL DEFAULT 0')
+    ctx.conn.execute('CREATE INDEX IF NOT EXISTS idx_items_change_seq ON items(change_seq)')
+    # Updates bump items_version and take the new value, whatever code path issued them
+    ctx.conn.execute('DROP TRIGGER IF EXISTS items_version_on_update')
+    ctx.conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS items_version_on_update AFTER UPDATE ON items
+        WHEN NEW.change_seq IS OLD.change_seq
+        BEGIN
+            UPDATE counters SET value = value + 1 WHERE name = 'items_version';
+            UPDATE items SET change_seq = (SELECT value FROM counters WHERE name = 'items_version')
+            WHERE id = NEW.id;
+        END
+    ''')
+    # Database sets change_seq on insert (one bump per transaction); this catches other writers
+    ctx.conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS items_change_seq_on_insert AFTER INSERT ON items
+        WHEN NEW.change_seq = 0
+        BEGIN
+            UPDATE counters SET value = value + 1 WHERE name = 'items_version';
+            UPDATE items SET change_seq = (SELECT value FROM counters WHERE name = 'items_version')
+            WHERE id = NEW.id;
+        END
+    ''')
+    ctx.conn.commit()
+
+SCHEMA_VERSION = len(MIGRATIONS)
+
+def get_schema_version(conn: sqlite3.Connection) -> int:
+    return conn.execute('PRAGMA user_version').fetchone()[0]
+
+def pending_migrations(conn: sqlite3.Connection) -> List[Migration]:
+    current = get_schema_version(conn)
+    return [m for m in MIGRATIONS if m.version > current]
+
+class ProgressPrinter:
+    """Progress callback that logs each stage at most every `step_pct` percent"""
+    
+    def __init__(self, log=print, step_pct: int = 10):
+        self.log = log
+        self.step_pct = step_pct
+        self._last = {}
+    
+    def __call__(self, stage: str, done: int, total: int):
+        pct = 100 if not total else int(done * 100 / total)
+        last = self._last.get(stage, -self.step_pct)
+        if pct >= last + self.step_pct or done >= total:
+            self._last[stage] = pct
+            self.log(f"   {stage}: {done}/{total} ({pct}%)")
+
+def backup_database(db_path, backup_path: Optional[str] = None, progress: Optional[ProgressFn] = None,
+                    pages_per_step: int = BACKUP_PAGES_PER_STEP):
+    """Create a timestamped backup with the online backup API (the database stays usable)"""
     if not os.path.exists(db_path):
         print(f"Database not found: {db_path}")
         return None
     
-    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-    backup_path = f"{db_path}.backup_{timestamp}"
+    if backup_path is None:
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        backup_path = f"{db_path}.backup_{timestamp}"
+    
+    def report(status, remaining, total):
+        if progress:
+            progress('backup pages', total - remaining, total)
     
-    shutil.copy(db_path, backup_path)
-    print(f" Backup created: {backup_path}")
+    source = sqlite3.connect(db_path)
+    target = sqlite3.connect(backup_path)
+    try:
+        # Copies pages_per_step pages at a time, yielding to writers between steps
+        source.backup(target, pages=pages_per_step, progress=report)
+    finally:
+        target.close()
+        source.close()
     return backup_path
 
+def apply_migrations(db_path: str, backup: bool = True, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                     progress: Optional[ProgressFn] = None, log=print) -> int:
+    """
+    Bring the database at db_path up to SCHEMA_VERSION; returns the final version.
+    
+    A backup is taken first only when there is something to migrate and
+    the database already holds data.
+    """
+    progress = progress or ProgressPrinter(log)
+    conn = sqlite3.connect(db_path)
+    try:
+        if not pending_migrations(conn):
+            return get_schema_version(conn)
+        with file_lock(f"{db_path}.migrate.lock"):
+            return _apply_pending(conn, db_path, backup, chunk_size, progress, log)
+    finally:
+        conn.close()
+
+def _apply_pending(conn: sqlite3.Connection, db_path: str, backup: bool, chunk_size: int,
+                   progress: ProgressFn, log) -> int:
+    # Re-read under the lock: another process may have migrated while we waited
+    pending = pending_migrations(conn)
+    if not pending:
+        return get_schema_version(conn)
+    
+    has_items = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'items'"
+    ).fetchone() is not None
+    if backup and has_items:
+        backup_path = backup_database(db_path, progress=progress)
+        log(f" Backup created: {backup_path}")
+    
+    ctx = MigrationContext(conn, chunk_size, progress)
+    for step in pending:
+        if get_schema_version(conn) >= step.version:
+            continue
+        start = time.perf_counter()
+        log(f" Applying migration {step.version}: {step.description}")
+        step.apply(ctx)
+        conn.execute(f'PRAGMA user_version = {step.version}')
+        conn.commit()
+        log(f"   done in {(time.perf_counter() - start) * 1000:.0f} ms")
+    return get_schema_version(conn)
+
 def check_schema(db_path):
     """Check current database schema"""
     conn = sqlite3.connect(db_path)
@@ -27,8 +379,8 @@ def check_schema(db_path):
     conn.close()
     return columns
 
-def migrate_database(db_path):
-    """Add missing columns to database"""
+def migrate_database(db_path, backup: bool = True, chunk_size: int = DEFAULT_CHUNK_SIZE):
+    """Apply pending migrations in place"""
     
     print("\n" + "="*60)
     print("DATABASE MIGRATION TOOL")
@@ -39,87 +391,34 @@ def migrate_database(db_path):
         print("   Database will be created automatically when you start the backend.")
         return False
     
-    # Backup first
-    print("\n Creating backup...")
-    backup_path = backup_database(db_path)
-    if not backup_path:
-        return False
-    
-    # Check current schema
-    print("\n Checking current schema...")
-    columns = check_schema(db_path)
-    print(f"   Found {len(columns)} columns: {', '.join(columns.keys())}")
-    
-    # Determine what needs to be added
-    missing_columns = []
-    if 'source' not in columns:
-        missing_columns.append(('source', 'TEXT DEFAULT "manual"'))
-    if 'external_id' not in columns:
-        missing_columns.append(('external_id', 'TEXT'))
+    conn = sqlite3.connect(db_path)
+    current = get_schema_version(conn)
+    pending = pending_migrations(conn)
+    conn.close()
     
-    if not missing_columns:
+    print(f"\n Schema version: {current} (latest: {SCHEMA_VERSION})")
+    if not pending:
         print("\n Database schema is already up to date!")
         print("   No migration needed.")
         return True
     
-    print(f"\n Missing columns detected: {', '.join([col[0] for col in missing_columns])}")
-    print("   Starting migration...")
-    
-    # Perform migration
-    conn = sqlite3.connect(db_path)
-    cursor = conn.cursor()
+    for step in pending:
+        print(f"   pending {step.version}: {step.description}")
+    print()
     
     try:
-        for col_name, col_def in missing_columns:
-            print(f"\n   Adding column: {col_name}")
-            cursor.execute(f"ALTER TABLE items ADD COLUMN {col_name} {col_def}")
-            print(f"    Added {col_name}")
-        
-        # Update existing rows to have 'manual' source if NULL
-        if 'source' in [col[0] for col in missing_columns]:
-            cursor.execute("UPDATE items SET source = 'manual' WHERE source IS NULL")
-            print("    Set default values for existing items")
-        
-        # Create index for external_id
-        if 'external_id' in [col[0] for col in missing_columns]:
-            cursor.execute("CREATE INDEX IF NOT EXISTS idx_external_id ON items(external_id)")
-            print("    Created index on external_id")
-        
-        # Create index for datetime if not exists
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_datetime ON items(datetime)")
-        print("    Created index on datetime")
-        
-        conn.commit()
-        
-        # Verify final schema
-        cursor.execute("PRAGMA table_info(items)")
-        final_columns = cursor.fetchall()
-        
-        print("\n Migration completed successfully!")
-        print(f"\n Final schema ({len(final_columns)} columns):")
-        for col in final_columns:
-            print(f"   - {col[1]} ({col[2]})")
-        
-        # Get item count
-        cursor.execute("SELECT COUNT(*) FROM items")
-        count = cursor.fetchone()[0]
-        print(f"\n Database contains {count} items")
-         
-        conn.close()
-        return True
-        
+        version = apply_migrations(db_path, backup=backup, chunk_size=chunk_size)
     except Exception as e:
+        # Completed migrations stay applied; the failed one resumes on the next run
         print(f"\n Migration failed: {e}")
-        print("   Rolling back...")
-        conn.rollback()
-        conn.close()
-        
-        print(f"\n Restoring from backup...")
-        if os.path.exists(backup_path):
-            shutil.copy(backup_path, db_path)
-            print("    Backup restored")
-        
         return False
+    
+    final_columns = check_schema(db_path)
+    print(f"\n Migration completed successfully! Schema version {version}")
+    print(f"\n Final schema ({len(final_columns)} columns):")
+    for name, col in final_columns.items():
+        print(f"   - {name} ({col[2]})")
+    return True
 
 def recreate_database(db_path):
     """Completely recreate the database (WARNING: LOSES ALL DATA)"""
@@ -135,7 +434,7 @@ def recreate_database(db_path):
         return False
     
     if os.path.exists(db_path):
-        backup_database(db_path)
+        print(f" Backup created: {backup_database(db_path)}")
         os.remove(db_path)
         print(f" Deleted old database: {db_path}")
     
@@ -151,8 +450,7 @@ def recreate_database(db_path):
     return True
 
 if __name__ == '__main__':
-    # Get database path from config
-    import sys
+    import argparse
     from pathlib import Path
     
     # Add backend to path
@@ -161,20 +459,42 @@ if __name__ == '__main__':
     
     from config import Config
     
+    parser = argparse.ArgumentParser(description="Database schema migrations")
+    parser.add_argument('--status', action='store_true', help="Show the schema version and pending migrations")
+    parser.add_argument('--apply', action='store_true', help="Apply pending migrations without prompting")
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE, help="Rows per backfill transaction")
+    parser.add_argument('--no-backup', action='store_true')
+    args = parser.parse_args()
+    
+    if args.status:
+        if not os.path.exists(Config.DATABASE_PATH):
+            print(f"Database not found: {Config.DATABASE_PATH}")
+            sys.exit(1)
+        conn = sqlite3.connect(Config.DATABASE_PATH)
+        print(f"Schema version {get_schema_version(conn)} of {SCHEMA_VERSION}")
+        for step in pending_migrations(conn):
+            print(f"  pending {step.version}: {step.description}")
+        conn.close()
+        sys.exit(0)
+    
+    if args.apply:
+        success = migrate_database(Config.DATABASE_PATH, backup=not args.no_backup, chunk_size=args.chunk_size)
+        sys.exit(0 if success else 1)
+    
     print("\nDatabase location:", Config.DATABASE_PATH)
     print("\nChoose an option:")
-    print("1. Migrate existing database (keeps data, adds missing columns)")
+    print("1. Migrate existing database (keeps data, applies pending migrations in place)")
     print("2. Recreate database (DELETES all data)")
     print("3. Exit")
     
     choice = input("\nEnter choice (1/2/3): ").strip()
     
     if choice == '1':
-        success = migrate_database(Config.DATABASE_PATH)
+        success = migrate_database(Config.DATABASE_PATH, backup=not args.no_backup, chunk_size=args.chunk_size)
         sys.exit(0 if success else 1)
     elif choice == '2':
         success = recreate_database(Config.DATABASE_PATH)
         sys.exit(0 if success else 1)
     else:
         print("Exiting...")
-        sys.exit(0)
\ No newline at end of file
+        sys.exit(0)
@@ -0,0 +1,53 @@
+"""
+Typed rows for the hot read paths.
+
+`Item` is a slotted dataclass built straight from SQLite tuples by
+`item_row_factory`, skipping the sqlite3.Row -> dict step. It keeps
+read-only mapping access (`item['title']`, `item.get('datetime')`) so
+code written against dict rows keeps working, and orjson serializes it
+natively (see json_provider.py).
+"""
+from dataclasses import dataclass, fields
+from typing import Any, Dict, Optional
+
+@dataclass(slots=True)
+class Item:
+    id: int
+    type: str
+    title: str
+    description: Optional[str]
+    datetime: Optional[str]
+    datetime_utc: Optional[int]
+    local_date: Optional[str]
+    priority: Optional[str]
+    tags: Optional[str]
+    completed: int
+    source: Optional[str]
+    external_id: Optional[str]
+    created_at: str
+    updated_at: str
+    
+    def __getitem__(self, key: str) -> Any:
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key) from None
+    
+    def get(self, key: str, default: Any = None) -> Any:
+        return getattr(self, key, default)
+    
+    def keys(self):
+        return ITEM_COLUMNS
+    
+    def to_dict(self) -> Dict[str, Any]:
+        # Flat fields, so no need for dataclasses.asdict's recursive copy
+        return {name: getattr(self, name) for name in ITEM_COLUMNS}
+
+ITEM_COLUMNS = tuple(field.name for field in fields(Item))
+
+# Select list matching Item's field order, so rows map positionally
+ITEM_SELECT = ', '.join(ITEM_COLUMNS)
+
+def item_row_factory(cursor, row: tuple) -> Item:
+    """sqlite3 row factory for queries selecting ITEM_SELECT"""
+    return Item(*row)
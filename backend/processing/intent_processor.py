@@ -1,12 +1,57 @@
 from database import Database  
 from vector_store import VectorStore  
-from typing import Dict, List
+from processing.reindex_scheduler import EMBEDDED_FIELDS, ReindexScheduler, dirty_embedded_fields
+from events import BUS, publish
+from log_config import get_logger
+from tracing import traced
+from typing import Dict, List, Optional
+
+logger = get_logger('processor')
 
 class IntentProcessor:
-    def __init__(self, database: Database, vector_store: VectorStore):
+    def __init__(self, database: Database, vector_store: VectorStore,
+                 reindex_scheduler: Optional[ReindexScheduler] = None):
         self.db = database
         self.vector_store = vector_store
+        self.reindex_scheduler = reindex_scheduler
+    
+    @staticmethod
+    def normalize_items(items: List, source: str = 'manual') -> List[Dict]:
+        """Keep well-formed LLM items and fill in defaults"""
+        validated_items = []
+        for item in items:
+            if not isinstance(item, dict):
+                continue
+            if 'type' not in item or 'title' not in item:
+                continue
+            
+            validated_items.append({
+                'type': item.get('type', 'task'),
+                'title': item.get('title', 'Untitled'),
+                'description': item.get('description'),
+                'datetime': item.get('datetime'),
+                'priority': item.get('priority', 'medium'),
+                'tags': item.get('tags', []),
+                'completed': item.get('completed', False),
+                'source': source
+            })
+        return validated_items
     
+    @traced('intent.hydrate_search_results')
+    def hydrate_search_results(self, results: List[Dict], include_archived: bool = False) -> List[Dict]:
+        """Load the DB rows for vector hits in one query, keeping relevance order"""
+        item_ids = [r['id'] for r in results]
+        rows = {item['id']: item for item in self.db.get_items_by_ids(item_ids, include_archived)}
+        
+        items = []
+        for result in results:
+            item = rows.get(result['id'])
+            if item:
+                item['relevance_score'] = 1 - result['distance'] if result['distance'] else None
+                items.append(item)
+        return items
+    
+    @traced('intent.process_items')
     def process_items(self, items: List[Dict]) -> List[Dict]:
         """Process parsed items from LLM"""
         created_items = []
@@ -16,22 +61,97 @@ class IntentProcessor:
                 item_id = self.db.create_item(item)
                 
                 try:
-                    search_text = f"{item.get('title', '')} {item.get('description', '') or ''} {' '.join(item.get('tags', []) or [])}"
-                    
-                    metadata = {
-                        'type': item.get('type', 'task'),
-                        'priority': item.get('priority', 'medium'),
-                        'tags': ','.join(item.get('tags', []) or [])
-                    }
+                    search_text = VectorStore.build_document(item)
+                    metadata = VectorStore.build_metadata(item)
                     self.vector_store.add_item(item_id, search_text, metadata)
                 except Exception as vec_error:
-                    print(f"Warning: Failed to add item to vector store: {vec_error}")
+                    logger.warning("Failed to add item to vector store: %s", vec_error, extra={'item_id': item_id})
                 
                 created_item = self.db.get_item_by_id(item_id)
                 if created_item:
                     created_items.append(created_item)
+                    publish('item.created', item=created_item)
             except Exception as e:
-                print(f"Error processing item: {e}")
+                logger.exception("Error processing item")
                 continue
         
         return created_items
+    
+    @traced('intent.update_item')
+    def update_item(self, item_id: int, updates: Dict) -> Optional[Dict]:
+        """Apply updates and re-embed the item only if embedded text changed"""
+        before = self.db.get_item_by_id(item_id)
+        if not before:
+            return None
+        
+        if not self.db.update_item(item_id, updates):
+            return None
+        
+        after = self.db.get_item_by_id(item_id)
+        if after and dirty_embedded_fields(before, after):
+            if self.reindex_scheduler:
+                self.reindex_scheduler.schedule(item_id)
+            else:
+                self.vector_store.upsert_items([after])
+        
+        if after:
+            publish('item.updated', item=after)
+        return after
+    
+    @traced('intent.delete_item')
+    def delete_item(self, item_id: int) -> bool:
+        """Delete an item and its vector"""
+        if self.reindex_scheduler:
+            self.reindex_scheduler.discard(item_id)
+        self.vector_store.delete_item(item_id)
+        deleted = self.db.delete_item(item_id)
+        if deleted:
+            publish('item.deleted', id=item_id)
+        return deleted
+    
+    @traced('intent.update_items')
+    def update_items(self, item_ids: List[int], updates: Dict) -> List[int]:
+        """Apply the same updates to many items in one transaction; returns the ids that existed"""
+        updated = self.db.update_items(item_ids, dict(updates))
+        
+        # Without before-rows, any embedded field in the update re-embeds every item
+        if updated and any(field in updates for field in EMBEDDED_FIELDS):
+            if self.reindex_scheduler:
+                for item_id in updated:
+                    self.reindex_scheduler.schedule(item_id)
+            else:
+                self.vector_store.upsert_items(self.db.get_items_by_ids(updated))
+        
+        if updated and BUS.has_subscribers:
+            for item in self.db.get_items_by_ids(updated):
+                publish('item.updated', item=item)
+        return updated
+    
+    @traced('intent.delete_items')
+    def delete_items(self, item_ids: List[int]) -> List[int]:
+        """Delete many items in one transaction and their vectors in one call; returns the ids that existed"""
+        deleted = self.db.delete_items(item_ids)
+        if self.reindex_scheduler:
+            for item_id in deleted:
+                self.reindex_scheduler.discard(item_id)
+        self.vector_store.delete_items(deleted)
+        
+        for item_id in deleted:
+            publish('item.deleted', id=item_id)
+        return deleted
+    
+    @traced('intent.archive_items')
+    def archive_items(self, older_than_days: float, batch_size: int = 500) -> Dict:
+        """Move old completed items to the archive tables, and their vectors to the archive collection"""
+        vectors = 0
+        
+        def move_vectors(item_ids: List[int]):
+            nonlocal vectors
+            if self.reindex_scheduler:
+                for item_id in item_ids:
+                    self.reindex_scheduler.discard(item_id)
+            vectors += self.vector_store.archive_items(item_ids)
+        
+        archived = self.db.archive_items(older_than_days, batch_size, on_batch=move_vectors)
+        logger.info("Archived items", extra={'items': archived, 'vectors': vectors, 'older_than_days': older_than_days})
+        return {'archived': archived, 'vectors': vectors}
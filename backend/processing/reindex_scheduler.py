@@ -0,0 +1,64 @@
+import threading
+from typing import Optional, Set
+from database import Database
+from vector_store import VectorStore
+from log_config import get_logger
+
+logger = get_logger('reindex')
+
+# Fields that feed VectorStore.build_document / build_metadata
+EMBEDDED_FIELDS = ('title', 'description', 'tags', 'type', 'priority')
+
+def dirty_embedded_fields(before: dict, after: dict) -> Set[str]:
+    """Return the embedded fields whose value differs between two item rows"""
+    return {field for field in EMBEDDED_FIELDS if before.get(field) != after.get(field)}
+
+class ReindexScheduler:
+    """
+    Coalesce vector re-embeds for edited items.
+    
+    Edits are collected for `delay` seconds and then flushed as one
+    batched upsert, so an item saved many times in a burst is only
+    embedded once, from its latest DB row.
+    """
+    
+    def __init__(self, database: Database, vector_store: VectorStore, delay: float = 2.0):
+        self.db = database
+        self.vector_store = vector_store
+        self.delay = delay
+        self._pending: Set[int] = set()
+        self._lock = threading.Lock()
+        self._timer: Optional[threading.Timer] = None
+    
+    def schedule(self, item_id: int):
+        """Queue an item for re-embedding on the next flush"""
+        with self._lock:
+            self._pending.add(item_id)
+            if self._timer is None:
+                self._timer = threading.Timer(self.delay, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+    
+    def discard(self, item_id: int):
+        """Forget a pending re-embed (e.g. the item was deleted)"""
+        with self._lock:
+            self._pending.discard(item_id)
+    
+    def flush(self) -> int:
+        """Upsert every pending item now; returns the number re-embedded"""
+        with self._lock:
+            item_ids = list(self._pending)
+            self._pending.clear()
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+        
+        if not item_ids:
+            return 0
+        
+        try:
+            items = self.db.get_items_by_ids(item_ids)
+            return self.vector_store.upsert_items(items)
+        except Exception as e:
+            logger.warning("Failed to re-embed items: %s", e, extra={'item_ids': item_ids})
+            return 0
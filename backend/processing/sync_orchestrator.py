@@ -1,8 +1,11 @@
+import asyncio
 from typing import List, Dict
 from ingestion.calendar_source import CalendarSource  
 from ingestion.email_source import EmailSource  
 from llm_extraction.llm_service import LLMService  
 from database import Database 
+from events import BUS, publish
+from tracing import traced
 
 class SyncOrchestrator:
     def __init__(self, database: Database, llm_service: LLMService, use_mock=True):
@@ -11,6 +14,24 @@ class SyncOrchestrator:
         self.calendar_source = CalendarSource(use_mock=use_mock)
         self.email_source = EmailSource(use_mock=use_mock)
     
+    def _create(self, item: Dict) -> int:
+        """Insert a synced item and announce it"""
+        item_id = self.db.create_item(item)
+        self._announce(item_id)
+        return item_id
+    
+    def _announce(self, item_id: int):
+        """Publish item.created (the row is only re-read when someone listens)"""
+        if BUS.has_subscribers:
+            created_item = self.db.get_item_by_id(item_id)
+            if created_item:
+                publish('item.created', item=created_item)
+    
+    @staticmethod
+    def _progress(source: str, phase: str, processed: int, total: int, created: int):
+        publish('sync.progress', source=source, phase=phase, processed=processed, total=total, created=created)
+    
+    @traced('sync.sync_all')
     def sync_all(self) -> Dict:
         """Sync all sources"""
         calendar_count = self.sync_calendar()
@@ -22,27 +43,47 @@ class SyncOrchestrator:
             'total': calendar_count + email_count
         }
     
+    @traced('sync.sync_calendar')
     def sync_calendar(self) -> int:
         """Sync calendar events"""
         raw_events = self.calendar_source.fetch_data()
         items = self.calendar_source.transform_to_items(raw_events)
+        self._progress('calendar', 'started', 0, len(items), 0)
         
         count = 0
-        for item in items:
+        for processed, item in enumerate(items, 1):
             existing = self.db.get_item_by_external_id(item['external_id'])
             if not existing:
-                self.db.create_item(item)
+                self._create(item)
                 count += 1
+                self._progress('calendar', 'progress', processed, len(items), count)
         
+        self._progress('calendar', 'finished', len(items), len(items), count)
         return count
     
+    @staticmethod
+    def _apply_email_extraction(item: Dict, llm_result: Dict) -> bool:
+        """Merge LLM-extracted fields into the item; False if the email is not actionable"""
+        if not (llm_result.get('success') and llm_result['data'].get('relevant')):
+            return False
+        
+        enhanced_data = llm_result['data']
+        item['title'] = enhanced_data.get('title', item['title'])
+        item['description'] = enhanced_data.get('description', item['description'])
+        item['datetime'] = enhanced_data.get('datetime', item['datetime'])
+        item['priority'] = enhanced_data.get('priority', item['priority'])
+        item['type'] = enhanced_data.get('type', item['type'])
+        return True
+    
+    @traced('sync.sync_email')
     def sync_email(self) -> int:
         """Sync email-based tasks"""
         raw_emails = self.email_source.fetch_data()
         items = self.email_source.transform_to_items(raw_emails)
+        self._progress('email', 'started', 0, len(items), 0)
         
         count = 0
-        for item in items:
+        for processed, item in enumerate(items, 1):
             existing = self.db.get_item_by_external_id(item['external_id'])
             if existing:
                 continue
@@ -50,15 +91,63 @@ class SyncOrchestrator:
             raw_email = item.pop('_raw_email', {})
             llm_result = self.llm.extract_from_email(raw_email)
             
-            if llm_result.get('success') and llm_result['data'].get('relevant'):
-                enhanced_data = llm_result['data']
-                item['title'] = enhanced_data.get('title', item['title'])
-                item['description'] = enhanced_data.get('description', item['description'])
-                item['datetime'] = enhanced_data.get('datetime', item['datetime'])
-                item['priority'] = enhanced_data.get('priority', item['priority'])
-                item['type'] = enhanced_data.get('type', item['type'])
-                
-                self.db.create_item(item)
+            if self._apply_email_extraction(item, llm_result):
+                self._create(item)
                 count += 1
+            # Each email costs an LLM call, so report every one that was examined
+            self._progress('email', 'progress', processed, len(items), count)
+        
+        self._progress('email', 'finished', len(items), len(items), count)
+        return count
+    
+    @traced('sync.async_sync_all')
+    async def async_sync_all(self, concurrency: int = 8) -> Dict:
+        """Async sync: blocking DB/file work runs in the executor, email LLM calls run concurrently"""
+        calendar_count = await asyncio.to_thread(self.sync_calendar)
+        email_count = await self.async_sync_email(concurrency)
+        
+        return {
+            'calendar': calendar_count,
+            'email': email_count,
+            'total': calendar_count + email_count
+        }
+    
+    @traced('sync.async_sync_email')
+    async def async_sync_email(self, concurrency: int = 8) -> int:
+        """Async sync_email with up to `concurrency` LLM extractions in flight"""
+        raw_emails = await asyncio.to_thread(self.email_source.fetch_data)
+        items = self.email_source.transform_to_items(raw_emails)
+        
+        new_items = []
+        for item in items:
+            existing = await asyncio.to_thread(self.db.get_item_by_external_id, item['external_id'])
+            if not existing:
+                new_items.append(item)
+        
+        semaphore = asyncio.Semaphore(concurrency)
+        self._progress('email', 'started', 0, len(new_items), 0)
+        extracted = 0
+        actionable = 0
+        
+        async def extract(item: Dict) -> bool:
+            nonlocal extracted, actionable
+            raw_email = item.pop('_raw_email', {})
+            async with semaphore:
+                llm_result = await self.llm.aextract_from_email(raw_email)
+            is_relevant = self._apply_email_extraction(item, llm_result)
+            extracted += 1
+            actionable += is_relevant
+            self._progress('email', 'progress', extracted, len(new_items), actionable)
+            return is_relevant
+        
+        relevant = await asyncio.gather(*(extract(item) for item in new_items))
+        
+        # Queued together, so the writer thread commits them as one group instead of one by one
+        to_create = [item for item, is_relevant in zip(new_items, relevant) if is_relevant]
+        futures = await asyncio.to_thread(lambda: [self.db.create_item(item, wait=False) for item in to_create])
+        item_ids = await asyncio.gather(*(asyncio.wrap_future(future) for future in futures))
+        await asyncio.to_thread(lambda: [self._announce(item_id) for item_id in item_ids])
+        count = len(item_ids)
         
+        self._progress('email', 'finished', len(new_items), len(new_items), count)
         return count
\ No newline at end of file
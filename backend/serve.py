@@ -0,0 +1,123 @@
+"""
+Production server entry point.
+
+Runs the Flask app under gunicorn (POSIX: multiple worker processes, each
+with a thread pool) or waitress (any platform: one process, many threads)
+instead of the single-process Werkzeug dev server, or the ASGI app in
+asgi.py under uvicorn.
+
+    python serve.py
+    python serve.py --server gunicorn --workers 4 --threads 8
+    python serve.py --server waitress --threads 16
+    python serve.py --server uvicorn --workers 2   # async LLM endpoints (asgi.py)
+"""
+import argparse
+import os
+import sys
+from pathlib import Path
+
+# Add backend directory to path
+BACKEND_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+from config import Config
+
+def _post_fork(server, worker):
+    """gunicorn hook: give each worker its own chromadb client, timers and pools (and warm them if configured)"""
+    import app as app_module
+    app_module.reinit_after_fork()
+
+def run_gunicorn(host: str, port: int, workers: int, threads: int, preload: bool):
+    from gunicorn.app.base import BaseApplication
+    
+    class ProductivityApplication(BaseApplication):
+        def __init__(self, options):
+            self.options = options
+            super().__init__()
+        
+        def load_config(self):
+            for key, value in self.options.items():
+                self.cfg.set(key, value)
+        
+        def load(self):
+            import app as app_module
+            if not preload:
+                # Preloaded apps warm up per worker in _post_fork instead
+                app_module.start_warm_up()
+            return app_module.app
+    
+    options = {
+        'bind': f"{host}:{port}",
+        'workers': workers,
+        'threads': threads,
+        'worker_class': 'gthread',
+        'timeout': Config.SERVER_TIMEOUT,
+        # Import app once in the master; services are built lazily in each worker
+        'preload_app': preload,
+        'post_fork': _post_fork if preload else None
+    }
+    options = {key: value for key, value in options.items() if value is not None}
+    
+    print(f"Starting gunicorn on http://{host}:{port} ({workers} workers x {threads} threads)")
+    ProductivityApplication(options).run()
+
+def run_waitress(host: str, port: int, threads: int):
+    from waitress import serve
+    from app import app, start_warm_up
+    
+    start_warm_up()
+    
+    print(f"Starting waitress on http://{host}:{port} ({threads} threads)")
+    serve(app, host=host, port=port, threads=threads)
+
+def run_uvicorn(host: str, port: int, workers: int):
+    """Serve asgi.py (async LLM endpoints; other routes fall through to Flask)"""
+    import uvicorn
+    
+    print(f"Starting uvicorn on http://{host}:{port} ({workers} workers)")
+    # Each uvicorn worker is a fresh process that imports asgi.py itself
+    uvicorn.run('asgi:app', host=host, port=port, workers=workers, app_dir=str(BACKEND_DIR))
+
+def run_production(server: str = None, host: str = None, port: int = None,
+                   workers: int = None, threads: int = None, preload: bool = None):
+    """Start the production server, falling back to waitress where gunicorn is unavailable"""
+    server = server or Config.SERVER_BACKEND
+    host = host or Config.SERVER_HOST
+    port = port or Config.SERVER_PORT
+    workers = workers or Config.SERVER_WORKERS
+    threads = threads or Config.SERVER_THREADS
+    preload = Config.SERVER_PRELOAD if preload is None else preload
+    
+    if server == 'auto':
+        server = 'waitress' if os.name == 'nt' else 'gunicorn'
+    
+    if server == 'gunicorn':
+        run_gunicorn(host, port, workers, threads, preload)
+    elif server == 'waitress':
+        run_waitress(host, port, threads)
+    elif server == 'uvicorn':
+        run_uvicorn(host, port, workers)
+    else:
+        raise ValueError(f"Unknown server '{server}', expected 'gunicorn', 'waitress' or 'uvicorn'")
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the Productivity Assistant API in production mode")
+    parser.add_argument('--server', choices=['auto', 'gunicorn', 'waitress', 'uvicorn'])
+    parser.add_argument('--host')
+    parser.add_argument('--port', type=int)
+    parser.add_argument('--workers', type=int, help="gunicorn worker processes")
+    parser.add_argument('--threads', type=int, help="threads per worker")
+    parser.add_argument('--no-preload', action='store_true', help="import the app separately in each worker")
+    args = parser.parse_args()
+    
+    run_production(
+        server=args.server,
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        threads=args.threads,
+        preload=False if args.no_preload else None
+    )
+
+if __name__ == '__main__':
+    main()
@@ -1,39 +1,65 @@
+import argparse
 import os
 import sys
 import sqlite3
-import shutil
+import subprocess
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Tuple
 from pathlib import Path
 
 # Add backend directory to path
 BACKEND_DIR = Path(__file__).resolve().parent
 sys.path.insert(0, str(BACKEND_DIR))
 
+# (connect, read) would need requests; urllib takes one timeout for both
+OLLAMA_PROBE_TIMEOUT = 1.0
+
 def print_header(text):
     print("\n" + "="*60)
     print(text.center(60))
     print("="*60)
 
-def check_ollama():
-    """Check if Ollama is running"""
-    import requests
+def check_ollama(log=print):
+    """Check if Ollama is running (short timeout; stdlib so no requests import)"""
+    import json
+    import urllib.request
+    from config import Config
+    
     try:
-        response = requests.get('http://localhost:11434/api/tags', timeout=2)
-        if response.status_code == 200:
-            print(" Ollama is running")
-            models = response.json().get('models', [])
-            if models:
-                print(f"   Available models: {', '.join([m['name'] for m in models])}")
-            return True
-        else:
-            print("  Ollama is running but returned unexpected status")
-            return False
-    except:
-        print(" Ollama is NOT running")
-        print("   Please start Ollama first: ollama serve")
-        print("   Or install from: https://ollama.ai")
+        with urllib.request.urlopen(f"{Config.OLLAMA_BASE_URL}/api/tags", timeout=OLLAMA_PROBE_TIMEOUT) as response:
+            if response.status != 200:
+                log("  Ollama is running but returned unexpected status")
+                return False
+            models = json.loads(response.read() or b'{}').get('models', [])
+        log(" Ollama is running")
+        if models:
+            log(f"   Available models: {', '.join([m['name'] for m in models])}")
+        return True
+    except Exception:
+        log(" Ollama is NOT running")
+        log("   Please start Ollama first: ollama serve")
+        log("   Or install from: https://ollama.ai")
         return False
 
-def check_database():
+def estimate_item_count(cursor) -> str:
+    """
+    Row count without scanning the table: the planner's estimate from
+    sqlite_stat1 (written by ANALYZE) when present, else max(rowid), which
+    overcounts only by deleted rows.
+    """
+    try:
+        cursor.execute("SELECT stat FROM sqlite_stat1 WHERE tbl = 'items' LIMIT 1")
+        row = cursor.fetchone()
+        if row and row[0]:
+            return f"~{int(row[0].split()[0])}"
+    except sqlite3.OperationalError:
+        pass  # no ANALYZE has run yet
+    cursor.execute("SELECT max(rowid) FROM items")
+    max_rowid = cursor.fetchone()[0]
+    return f"<= {max_rowid or 0}"
+
+def check_database(log=print):
     """Check and initialize database"""
     from config import Config
     
@@ -41,62 +67,67 @@ def check_database():
     db_exists = os.path.exists(db_path)
     
     if not db_exists:
-        print(f" Creating new database at: {db_path}")
+        log(f" Creating new database at: {db_path}")
     else:
-        print(f" Database exists at: {db_path}")
+        log(f" Database exists at: {db_path}")
         
-        # Check if it has the correct schema
+        # Bring older databases up to date in place (online backup, chunked backfills)
+        from migrate_database import SCHEMA_VERSION, ProgressPrinter, apply_migrations, get_schema_version
         conn = sqlite3.connect(db_path)
         cursor = conn.cursor()
         
         try:
+            version = get_schema_version(conn)
+            if version < SCHEMA_VERSION:
+                log(f"  Schema version {version}, migrating to {SCHEMA_VERSION}...")
+                apply_migrations(
+                    db_path,
+                    backup=Config.MIGRATION_BACKUP,
+                    chunk_size=Config.MIGRATION_CHUNK_SIZE,
+                    progress=ProgressPrinter(log),
+                    log=log
+                )
+            
             cursor.execute("PRAGMA table_info(items)")
             columns = {col[1]: col for col in cursor.fetchall()}
             
-            required_cols = ['id', 'type', 'title', 'description', 'datetime', 
+            required_cols = ['id', 'type', 'title', 'description', 'datetime', 'datetime_utc', 'local_date',
                            'priority', 'tags', 'completed', 'source', 'external_id',
                            'created_at', 'updated_at']
             
             missing = [col for col in required_cols if col not in columns]
             
             if missing:
-                print(f"  Database missing columns: {', '.join(missing)}")
-                print("   Backing up and recreating database...")
+                log(f"  Database missing columns after migration: {', '.join(missing)}")
+                log("   Run: python migrate_database.py --status")
                 conn.close()
-                
-                # Backup old database
-                backup_path = db_path + '.backup'
-                shutil.copy(db_path, backup_path)
-                print(f"   Backed up to: {backup_path}")
-                
-                # Delete old database
-                os.remove(db_path)
-                print("   Old database removed")
                 return False
-            else:
-                cursor.execute("SELECT COUNT(*) FROM items")
-                count = cursor.fetchone()[0]
-                print(f"   Contains {count} items")
-                print(f"   Schema: {len(columns)} columns ✓")
-                conn.close()
-                return True
+            
+            log(f"   Contains {estimate_item_count(cursor)} items")
+            log(f"   Schema: version {get_schema_version(conn)}, {len(columns)} columns ✓")
+            conn.close()
+            return True
         except Exception as e:
-            print(f" Database error: {e}")
+            log(f" Database error: {e}")
             conn.close()
             return False
     
     # Initialize database using Database class
     from database import Database
     db = Database(Config.DATABASE_PATH)
-    print("Database initialized successfully")
+    try:
+        log("Database initialized successfully")
+    finally:
+        # Stop its writer thread; the server opens its own Database
+        db.close()
     return True
 
-def check_mock_data():
+def check_mock_data(log=print):
     """Check if mock data files exist"""
     from config import Config
     
     if not Config.USE_MOCK_DATA:
-        print("Mock data mode is disabled")
+        log("Mock data mode is disabled")
         return True
     
     base_dir = Path(__file__).resolve().parent
@@ -106,57 +137,121 @@ def check_mock_data():
     email_file = mock_dir / 'email_messages.json'
     
     if calendar_file.exists() and email_file.exists():
-        print(f"Mock data files found in: {mock_dir}")
+        log(f"Mock data files found in: {mock_dir}")
         return True
     else:
-        print(f"Mock data files missing in: {mock_dir}")
+        log(f"Mock data files missing in: {mock_dir}")
         if not calendar_file.exists():
-            print(f"   Missing: {calendar_file.name}")
+            log(f"   Missing: {calendar_file.name}")
         if not email_file.exists():
-            print(f"   Missing: {email_file.name}")
+            log(f"   Missing: {email_file.name}")
         return False
 
-def check_static_directory():
+def check_static_directory(log=print):
     """Ensure static directory exists"""
     from config import Config
     
-    static_dir = Path(__file__).resolve().parent / 'static' / 'visualizations'
+    static_dir = Path(Config.VISUALIZATION_DIR)
     static_dir.mkdir(parents=True, exist_ok=True)
     
-    print(f"Static directory ready: {static_dir}")
+    log(f"Static directory ready: {static_dir}")
     
-    # List existing visualizations
-    images = list(static_dir.glob('*.png'))
-    if images:
-        print(f"   Contains {len(images)} existing visualization(s)")
+    # Summarize from the storage index rather than globbing the directory
+    from visualizer.storage import read_index_summary
+    summary = read_index_summary(str(static_dir))
+    if summary is None:
+        log("   No visualization index yet (built on first backend start)")
+    elif summary['files']:
+        budget_mb = Config.VISUALIZATION_CACHE_MAX_MB
+        log(f"   Contains {summary['files']} visualization(s), "
+              f"{summary['bytes'] / (1024 * 1024):.1f} MB of {budget_mb} MB budget")
     
     return True
 
-def reset_chromadb():
+def reset_chromadb(log=print):
     """Reset ChromaDB if needed"""
     from config import Config
     
     chroma_path = Path(Config.CHROMA_PATH)
     
     if chroma_path.exists():
-        print(f"ChromaDB directory exists: {chroma_path}")
+        log(f"ChromaDB directory exists: {chroma_path}")
         
         # Check if it has any issues
         sqlite_file = chroma_path / 'chroma.sqlite3'
         if sqlite_file.exists():
-            print(f"   ChromaDB SQLite file found")
+            log(f"   ChromaDB SQLite file found")
         return True
     else:
-        print(f" ChromaDB will be initialized at: {chroma_path}")
+        log(f" ChromaDB will be initialized at: {chroma_path}")
         return True
 
+def profile_imports(module: str = 'app', top: int = 15) -> bool:
+    """Summarize `python -X importtime -c "import <module>"`: total, slowest packages and modules"""
+    print_header(f"IMPORT TIME PROFILE: import {module}")
+    
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=str(BACKEND_DIR), capture_output=True, text=True
+    )
+    
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, raw_name = line[len('import time:'):].split('|')
+        name = raw_name.strip()
+        depth = (len(raw_name) - len(raw_name.lstrip()) - 1) // 2
+        rows.append((name, int(self_us), int(cumulative_us), depth))
+    
+    if result.returncode != 0 or not rows:
+        print(f" import {module} failed:")
+        print(result.stderr[-2000:])
+        return False
+    
+    total_us = sum(cumulative for _name, _self, cumulative, depth in rows if depth == 0)
+    print(f"\n Total: {total_us / 1000:.1f} ms across {len(rows)} modules\n")
+    
+    packages = {}
+    for name, self_us, _cumulative, _depth in rows:
+        package = name.split('.')[0]
+        packages[package] = packages.get(package, 0) + self_us
+    print(" Slowest packages (self time summed):")
+    for package, self_us in sorted(packages.items(), key=lambda kv: kv[1], reverse=True)[:top]:
+        print(f"   {self_us / 1000:8.1f} ms  {package}")
+    
+    print("\n Slowest modules (cumulative, including their imports):")
+    for name, _self, cumulative, depth in sorted(rows, key=lambda row: row[2], reverse=True)[:top]:
+        print(f"   {cumulative / 1000:8.1f} ms  {'  ' * min(depth, 6)}{name}")
+    
+    return True
+
+def _run_check(check_func) -> Tuple[bool, float, List[str]]:
+    lines = []
+    start = time.perf_counter()
+    try:
+        passed = bool(check_func(lines.append))
+    except Exception as e:
+        lines.append(f" Error during check: {e}")
+        passed = False
+    return passed, (time.perf_counter() - start) * 1000, lines
+
+def run_checks(checks: Dict[str, Callable]) -> Dict[str, Tuple[bool, float, List[str]]]:
+    """Run independent checks concurrently; returns {name: (passed, elapsed_ms, output_lines)}"""
+    with ThreadPoolExecutor(max_workers=len(checks), thread_name_prefix='preflight') as pool:
+        futures = {name: pool.submit(_run_check, check_func) for name, check_func in checks.items()}
+        return {name: future.result() for name, future in futures.items()}
+
 def main():
     print_header("PRODUCTIVITY ASSISTANT - BACKEND STARTUP")
     
+    from config import Config
+    Config.init_directories()
+    
     print("\n Running Pre-flight Checks...\n")
     
     checks = {
-        "Configuration": lambda: __import__('config').Config.validate(),
+        "Configuration": Config.validate,
         "Ollama Service": check_ollama,
         "Database": check_database,
         "Mock Data Files": check_mock_data,
@@ -164,24 +259,27 @@ def main():
         "ChromaDB": reset_chromadb
     }
     
-    results = {}
-    for name, check_func in checks.items():
+    start = time.perf_counter()
+    results = run_checks(checks)
+    wall_ms = (time.perf_counter() - start) * 1000
+    
+    # Each check's output is buffered, so blocks print in order despite running concurrently
+    for name, (passed, elapsed_ms, lines) in results.items():
         print(f"\n Checking: {name}")
         print("-" * 60)
-        try:
-            results[name] = check_func()
-        except Exception as e:
-            print(f" Error during {name} check: {e}")
-            results[name] = False
+        for line in lines:
+            print(line)
     
     print_header("PRE-FLIGHT CHECK RESULTS")
     
     all_passed = True
-    for name, result in results.items():
-        status = "PASS" if result else "FAIL"
-        print(f"{status.ljust(10)} - {name}")
-        if not result:
+    for name, (passed, elapsed_ms, _lines) in results.items():
+        status = "PASS" if passed else "FAIL"
+        print(f"{status.ljust(10)} - {name.ljust(20)} {elapsed_ms:8.1f} ms")
+        if not passed:
             all_passed = False
+    serial_ms = sum(elapsed_ms for _passed, elapsed_ms, _lines in results.values())
+    print(f"\n Checks took {wall_ms:.1f} ms ({serial_ms:.1f} ms if run one after another)")
     
     if not all_passed:
         print("\n Some checks failed. Please fix the issues above before starting.\n")
@@ -190,18 +288,32 @@ def main():
     print_header("ALL CHECKS PASSED - STARTING SERVER")
     
     # Print configuration
-    from config import Config
     Config.print_config()
     
+    if Config.FLASK_ENV == 'production':
+        from serve import run_production
+        run_production()
+        return True
+    
     # Start Flask app
-    print("Starting Flask application on http://localhost:5000\n")
+    print(f"Starting Flask application on http://localhost:{Config.SERVER_PORT}\n")
     
-    from app import app
-    app.run(debug=True, port=5000, host='0.0.0.0')
+    from app import app, start_warm_up
+    start_warm_up()
+    app.run(debug=Config.FLASK_DEBUG, port=Config.SERVER_PORT, host=Config.SERVER_HOST)
     
     return True
 
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Pre-flight checks, then start the backend")
+    parser.add_argument('--import-profile', nargs='?', const='app', metavar='MODULE',
+                        help="Print an -X importtime summary for MODULE (default: app) and exit")
+    parser.add_argument('--top', type=int, default=15, help="Rows per import profile table")
+    args = parser.parse_args()
+    
+    if args.import_profile:
+        sys.exit(0 if profile_imports(args.import_profile, args.top) else 1)
+    
     try:
         success = main()
         sys.exit(0 if success else 1)
@@ -0,0 +1,298 @@
+"""
+Request-scoped tracing.
+
+Each request gets an id (the incoming X-Request-ID header or a fresh one)
+held in a ContextVar. It follows the request through IntentProcessor,
+SyncOrchestrator and LLMService, across asyncio.to_thread hops and
+gathered tasks, and it is echoed back in the response header and added
+to log records.
+
+Spans are recorded by the OpenTelemetry SDK when it is installed. The
+SDK's ConsoleSpanExporter writes to stderr (TRACING_EXPORTER=console) or
+appends to TRACING_FILE (TRACING_EXPORTER=file). Without the SDK, a
+minimal built-in tracer writes spans in the same JSON shape. With the
+default TRACING_EXPORTER=none, span() and @traced cost one global check.
+"""
+import atexit
+import functools
+import inspect
+import json
+import os
+import secrets
+import sys
+import threading
+import time
+import uuid
+from contextlib import ExitStack
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Dict, Optional
+
+from config import Config
+
+REQUEST_ID_HEADER = 'X-Request-ID'
+
+_request_id: ContextVar[Optional[str]] = ContextVar('request_id', default=None)
+_current_span: ContextVar[Optional['_BuiltinSpan']] = ContextVar('current_span', default=None)
+
+_tracer = None
+_shutdown = None
+_setup_lock = threading.Lock()
+
+def get_request_id() -> Optional[str]:
+    return _request_id.get()
+
+def bind_request_id(request_id: Optional[str] = None):
+    """Set the id for the current context; returns a token for reset_request_id"""
+    return _request_id.set(request_id or uuid.uuid4().hex[:16])
+
+def reset_request_id(token):
+    try:
+        _request_id.reset(token)
+    except ValueError:
+        # Token was created in another context (e.g. a copied one); nothing to undo here
+        pass
+
+class _NoopSpan:
+    """Returned by span() while tracing is off"""
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        return False
+    
+    def set_attribute(self, key, value):
+        pass
+    
+    def set_attributes(self, attributes):
+        pass
+
+_NOOP_SPAN = _NoopSpan()
+
+def _iso(ns: int) -> str:
+    return datetime.fromtimestamp(ns / 1e9, tz=timezone.utc).isoformat().replace('+00:00', 'Z')
+
+class _BuiltinSpan:
+    def __init__(self, tracer: '_BuiltinTracer', name: str, attributes: Dict, parent: Optional['_BuiltinSpan']):
+        self._tracer = tracer
+        self.name = name
+        self.attributes = dict(attributes or {})
+        self.trace_id = parent.trace_id if parent else secrets.token_hex(16)
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent.span_id if parent else None
+        self.status = 'UNSET'
+        self.events = []
+    
+    def set_attribute(self, key, value):
+        self.attributes[key] = value
+    
+    def set_attributes(self, attributes):
+        self.attributes.update(attributes)
+    
+    def __enter__(self):
+        self.start_ns = time.time_ns()
+        self._token = _current_span.set(self)
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        self.end_ns = time.time_ns()
+        _current_span.reset(self._token)
+        if exc_type is not None:
+            self.status = 'ERROR'
+            self.events.append({
+                'name': 'exception',
+                'timestamp': _iso(self.end_ns),
+                'attributes': {'exception.type': exc_type.__name__, 'exception.message': str(exc)}
+            })
+        self._tracer.export(self)
+        return False
+    
+    def to_dict(self) -> Dict:
+        return {
+            'name': self.name,
+            'context': {'trace_id': f"0x{self.trace_id}", 'span_id': f"0x{self.span_id}"},
+            'parent_id': f"0x{self.parent_id}" if self.parent_id else None,
+            'start_time': _iso(self.start_ns),
+            'end_time': _iso(self.end_ns),
+            'status': {'status_code': self.status},
+            'attributes': self.attributes,
+            'events': self.events,
+            'resource': {'attributes': {'service.name': self._tracer.service_name}}
+        }
+
+class _BuiltinTracer:
+    """Stand-in for an OpenTelemetry tracer when the SDK is not installed"""
+    
+    def __init__(self, stream, service_name: str):
+        self._stream = stream
+        self._lock = threading.Lock()
+        self.service_name = service_name
+    
+    def start_as_current_span(self, name: str, attributes: Optional[Dict] = None):
+        return _BuiltinSpan(self, name, attributes, _current_span.get())
+    
+    def export(self, span: _BuiltinSpan):
+        line = json.dumps(span.to_dict(), default=str)
+        with self._lock:
+            self._stream.write(line + '\n')
+    
+    def shutdown(self):
+        with self._lock:
+            self._stream.flush()
+
+def _open_stream(exporter: str, path: str):
+    if exporter == 'console':
+        return sys.stderr
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    return open(path, 'a', buffering=1, encoding='utf-8')
+
+def setup_tracing(exporter: Optional[str] = None, path: Optional[str] = None, force: bool = False):
+    """
+    Install the tracer chosen by TRACING_EXPORTER ('none', 'console' or 'file').
+    
+    Like setup_logging, pass force=True in a forked worker so the batch
+    export thread is recreated.
+    """
+    global _tracer, _shutdown
+    with _setup_lock:
+        if _tracer is not None and not force:
+            return
+        
+        exporter = (exporter or Config.TRACING_EXPORTER).lower()
+        if exporter not in ('console', 'file'):
+            _tracer = None
+            return
+        
+        stream = _open_stream(exporter, path or Config.TRACING_FILE)
+        service_name = Config.TRACING_SERVICE_NAME
+        
+        try:
+            from opentelemetry.sdk.resources import Resource
+            from opentelemetry.sdk.trace import TracerProvider
+            from opentelemetry.sdk.trace.export import BatchSpanProcessor, ConsoleSpanExporter
+        except ImportError:
+            from log_config import get_logger
+            get_logger('tracing').info("opentelemetry-sdk not installed; using built-in span exporter")
+            tracer = _BuiltinTracer(stream, service_name)
+            _tracer, _shutdown = tracer, tracer.shutdown
+            return
+        
+        # Own provider rather than the global one, so re-running setup after a fork is allowed
+        provider = TracerProvider(resource=Resource.create({'service.name': service_name}))
+        provider.add_span_processor(BatchSpanProcessor(ConsoleSpanExporter(
+            out=stream,
+            formatter=lambda span: span.to_json(indent=None) + os.linesep
+        )))
+        _tracer = provider.get_tracer('productivity')
+        _shutdown = provider.shutdown
+
+def stop_tracing():
+    """Flush buffered spans (registered at exit)"""
+    global _tracer, _shutdown
+    with _setup_lock:
+        if _shutdown is not None:
+            _shutdown()
+        _tracer = _shutdown = None
+
+atexit.register(stop_tracing)
+
+def tracing_enabled() -> bool:
+    return _tracer is not None
+
+def span(name: str, attributes: Optional[Dict] = None):
+    """
+    Context manager for a child span of the current one.
+    
+        with span('llm.generate', {'llm.model': model}) as current:
+            current.set_attribute('ollama.eval_duration', ns)
+    """
+    if _tracer is None:
+        return _NOOP_SPAN
+    attrs = {key: value for key, value in (attributes or {}).items() if value is not None}
+    request_id = _request_id.get()
+    if request_id:
+        attrs['request.id'] = request_id
+    return _tracer.start_as_current_span(name, attributes=attrs)
+
+def traced(name: str):
+    """Decorator form of span(); sync and async functions"""
+    def decorator(func):
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                if _tracer is None:
+                    return await func(*args, **kwargs)
+                with span(name):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+        
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if _tracer is None:
+                return func(*args, **kwargs)
+            with span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def outgoing_headers() -> Dict[str, str]:
+    """Headers that carry the request id to downstream services (Ollama)"""
+    request_id = _request_id.get()
+    return {REQUEST_ID_HEADER: request_id} if request_id else {}
+
+def instrument_flask(app):
+    """Bind a request id and open a root span for every Flask request"""
+    from flask import g, request
+    
+    @app.before_request
+    def _trace_start():
+        g._request_id_token = bind_request_id(request.headers.get(REQUEST_ID_HEADER))
+        if _tracer is not None:
+            rule = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+            g._trace_stack = ExitStack()
+            g._trace_span = g._trace_stack.enter_context(span(f"{request.method} {rule}", {
+                'http.method': request.method,
+                'http.route': rule,
+                'http.target': request.full_path.rstrip('?')
+            }))
+    
+    @app.after_request
+    def _trace_response(response):
+        request_id = get_request_id()
+        if request_id:
+            response.headers[REQUEST_ID_HEADER] = request_id
+        current = g.get('_trace_span')
+        if current is not None:
+            current.set_attribute('http.status_code', response.status_code)
+        return response
+    
+    @app.teardown_request
+    def _trace_finish(exc):
+        stack = g.pop('_trace_stack', None)
+        g.pop('_trace_span', None)
+        if stack is not None:
+            if exc is not None:
+                stack.__exit__(type(exc), exc, exc.__traceback__)
+            else:
+                stack.close()
+        token = g.pop('_request_id_token', None)
+        if token is not None:
+            reset_request_id(token)
+
+def trace_async_endpoint(route: str):
+    """Request id and root span for the native ASGI routes in asgi.py"""
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(request):
+            token = bind_request_id(request.headers.get(REQUEST_ID_HEADER))
+            try:
+                with span(f"{request.method} {route}", {'http.method': request.method, 'http.route': route}) as current:
+                    response = await func(request)
+                    current.set_attribute('http.status_code', response.status_code)
+                response.headers[REQUEST_ID_HEADER] = get_request_id()
+                return response
+            finally:
+                reset_request_id(token)
+        return wrapper
+    return decorator
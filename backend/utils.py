@@ -1,5 +1,32 @@
-from datetime import datetime
-from typing import Optional
+import base64
+import json
+import os
+import time
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta, tzinfo
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from config import Config
+
+try:
+    import fcntl
+except ImportError:  # Windows: single-process servers only (waitress), nothing to coordinate
+    fcntl = None
+
+@contextmanager
+def file_lock(path: str):
+    """Exclusive lock on `path` (created if missing) shared by every process on the host"""
+    if fcntl is None:
+        yield
+        return
+    with open(path, 'a') as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
 
 def format_datetime(dt_string: Optional[str]) -> Optional[str]:
     """Format datetime string for display"""
@@ -14,4 +41,148 @@ def format_datetime(dt_string: Optional[str]) -> Optional[str]:
 
 def validate_item_type(item_type: str) -> bool:
     """Validate item type"""
-    return item_type in ['task', 'note', 'reminder']
\ No newline at end of file
+    return item_type in ['task', 'note', 'reminder']
+
+def parse_bool(value) -> bool:
+    """Flag from JSON (true/false) or a query string ('1', 'true', 'yes', 'on')"""
+    if isinstance(value, str):
+        return value.strip().lower() in ('1', 'true', 'yes', 'on')
+    return bool(value)
+
+ITEM_PRIORITIES = ('low', 'medium', 'high')
+
+def normalize_item_updates(updates) -> Dict:
+    """
+    Checked copy of item updates from a request (flags parsed with
+    parse_bool); raises ValueError naming the first bad value, so callers
+    answer 400 instead of hitting the table's constraints.
+    """
+    if not isinstance(updates, dict):
+        raise ValueError("updates must be an object")
+    updates = dict(updates)
+    if 'type' in updates and not validate_item_type(updates['type']):
+        raise ValueError("type must be 'task', 'note' or 'reminder'")
+    if 'priority' in updates and updates['priority'] not in ITEM_PRIORITIES:
+        raise ValueError("priority must be 'low', 'medium' or 'high'")
+    if 'title' in updates and (not isinstance(updates['title'], str) or not updates['title'].strip()):
+        raise ValueError("title must be a non-empty string")
+    for field in ('description', 'datetime'):
+        if updates.get(field) is not None and not isinstance(updates[field], str):
+            raise ValueError(f"{field} must be a string or null")
+    if 'tags' in updates:
+        tags = updates['tags']
+        if tags is not None and not isinstance(tags, str) and not (
+                isinstance(tags, list) and all(isinstance(tag, str) for tag in tags)):
+            raise ValueError("tags must be a list of strings or a comma-separated string")
+    if 'completed' in updates:
+        updates['completed'] = parse_bool(updates['completed'])
+    return updates
+
+def split_tags(tags) -> List[str]:
+    """Distinct, lowercased tags from a list or comma-joined text, in first-seen order"""
+    if not tags:
+        return []
+    if isinstance(tags, str):
+        tags = tags.split(',')
+    seen = []
+    for tag in tags:
+        tag = str(tag).strip().lower()
+        if tag and tag not in seen:
+            seen.append(tag)
+    return seen
+
+class SystemLocalTimezone(tzinfo):
+    """The C library's local zone, its offset looked up per instant (follows DST without a zone database)"""
+    
+    @staticmethod
+    def _local(dt: datetime) -> time.struct_time:
+        try:
+            return time.localtime(time.mktime((dt.year, dt.month, dt.day, dt.hour, dt.minute, dt.second, 0, 0, -1)))
+        except (OverflowError, ValueError):
+            return time.localtime()
+    
+    def utcoffset(self, dt: Optional[datetime]) -> timedelta:
+        return timedelta(seconds=(self._local(dt) if dt else time.localtime()).tm_gmtoff)
+    
+    def dst(self, dt: Optional[datetime]) -> timedelta:
+        local = self._local(dt) if dt else time.localtime()
+        return timedelta(hours=1) if local.tm_isdst > 0 else timedelta(0)
+    
+    def tzname(self, dt: Optional[datetime]) -> str:
+        return (self._local(dt) if dt else time.localtime()).tm_zone
+    
+    def fromutc(self, dt: datetime) -> datetime:
+        epoch = (dt.replace(tzinfo=None) - datetime(1970, 1, 1)).total_seconds()
+        try:
+            return dt + timedelta(seconds=time.localtime(epoch).tm_gmtoff)
+        except (OverflowError, ValueError, OSError):
+            return dt + self.utcoffset(None)
+
+@lru_cache(maxsize=None)
+def system_timezone() -> tzinfo:
+    """
+    The system zone with its DST rules: TZ, else /etc/localtime, else the
+    C library's. Never a fixed offset, which is wrong for half the year.
+    """
+    key = os.environ.get('TZ', '').lstrip(':')
+    if key:
+        try:
+            return ZoneInfo(key)
+        except (ZoneInfoNotFoundError, ValueError):
+            return SystemLocalTimezone()
+    try:
+        with open('/etc/localtime', 'rb') as f:
+            return ZoneInfo.from_file(f, key='localtime')
+    except (OSError, ValueError):
+        return SystemLocalTimezone()
+
+def local_timezone(name: Optional[str] = None) -> tzinfo:
+    """Zone for naive datetimes and local dates: `name`, else Config.TIMEZONE, else the system zone"""
+    name = name or Config.TIMEZONE
+    if name:
+        return ZoneInfo(name)
+    return system_timezone()
+
+def normalize_datetime(value: Optional[str], tz: Optional[tzinfo] = None) -> Tuple[Optional[int], Optional[str]]:
+    """
+    (UTC epoch seconds, local YYYY-MM-DD) for an ISO datetime or date.
+    
+    Offsets and a trailing 'Z' are honoured; naive values are read in the
+    local zone. Unparseable values give (None, None).
+    """
+    if not value:
+        return None, None
+    tz = tz or local_timezone()
+    text = value.strip()
+    if text.endswith(('Z', 'z')):
+        text = text[:-1] + '+00:00'
+    try:
+        dt = datetime.fromisoformat(text)
+    except ValueError:
+        return None, None
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=tz)
+    return int(dt.timestamp()), dt.astimezone(tz).date().isoformat()
+
+def local_today(tz: Optional[tzinfo] = None) -> date:
+    """Today in the local zone (the one local_date columns are derived with)"""
+    return datetime.now(tz or local_timezone()).date()
+
+def encode_cursor(position: Optional[Dict]) -> Optional[str]:
+    """Opaque, URL-safe token for a change-feed position"""
+    if position is None:
+        return None
+    raw = json.dumps(position, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+def decode_cursor(token: Optional[str]) -> Optional[Dict]:
+    """Inverse of encode_cursor; raises ValueError for anything it did not produce"""
+    if not token:
+        return None
+    try:
+        position = json.loads(base64.urlsafe_b64decode(token + '=' * (-len(token) % 4)))
+    except (ValueError, TypeError) as e:
+        raise ValueError(f"Invalid cursor: {e}") from None
+    if not isinstance(position, dict) or not {'id', 'seq'} <= position.keys():
+        raise ValueError("Invalid cursor")
+    return position
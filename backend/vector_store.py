@@ -1,20 +1,37 @@
-import chromadb
-from chromadb.config import Settings
 from config import Config  # Changed from .config
-from typing import List, Dict
+from typing import List, Dict, Optional, Set
+from log_config import get_logger
+from metrics import timed
+from tracing import traced
 import os
 import shutil
 import time
 import sqlite3
 
+logger = get_logger('vector_store')
+
+# Candidates fetched per requested result when search is restricted to a set of ids
+FILTERED_SEARCH_OVERFETCH = 20
+
+# Vectors of archived items (Database.archive_items); only searched on request
+ARCHIVE_COLLECTION = "productivity_items_archive"
+
+# Records per collection.upsert when loading vectors (chromadb rejects batches above ~5461)
+LOAD_BATCH_SIZE = 5000
+
 class VectorStore:
     def __init__(self):
         self.client = None
         self.collection = None
+        self._archive_collection = None
         self._initialize_client()
     
     def _initialize_client(self):
         """Initialize ChromaDB client with error handling for schema issues"""
+        # Imported here: chromadb is the slowest import in the backend
+        import chromadb
+        from chromadb.config import Settings
+        
         try:
             # Disable telemetry to avoid warnings
             import os
@@ -34,7 +51,7 @@ class VectorStore:
         except Exception as e:
             error_msg = str(e).lower()
             if "no such column" in error_msg or "operationalerror" in error_msg:
-                print(f"⚠️  ChromaDB schema mismatch detected. Resetting ChromaDB database...")
+                logger.warning("ChromaDB schema mismatch detected. Resetting ChromaDB database...")
                 self._reset_chromadb()
                 time.sleep(0.5)
                 self.client = chromadb.PersistentClient(
@@ -45,7 +62,7 @@ class VectorStore:
                     name="productivity_items",
                     metadata={"hnsw:space": "cosine"}
                 )
-                print("✅ ChromaDB database reset and reinitialized successfully")
+                logger.info("ChromaDB database reset and reinitialized successfully")
             else:
                 raise e
     
@@ -65,16 +82,16 @@ class VectorStore:
         if os.path.exists(sqlite_file):
             try:
                 os.remove(sqlite_file)
-                print(f"✅ Deleted ChromaDB SQLite file")
+                logger.info("Deleted ChromaDB SQLite file")
             except PermissionError:
                 try:
                     backup_name = sqlite_file + '.old.' + str(int(time.time()))
                     os.rename(sqlite_file, backup_name)
-                    print(f"✅ Renamed old SQLite file to {os.path.basename(backup_name)}")
+                    logger.info("Renamed old SQLite file to %s", os.path.basename(backup_name))
                 except Exception as e2:
-                    print(f"⚠️  Could not rename file: {e2}")
+                    logger.warning("Could not rename file: %s", e2)
             except Exception as e:
-                print(f"⚠️  Error deleting SQLite file: {e}")
+                logger.warning("Error deleting SQLite file: %s", e)
         
         if os.path.exists(chroma_path):
             try:
@@ -83,11 +100,21 @@ class VectorStore:
                     if os.path.isdir(item_path):
                         try:
                             shutil.rmtree(item_path, onerror=self._handle_remove_readonly)
-                            print(f"✅ Deleted ChromaDB subdirectory: {item}")
+                            logger.info("Deleted ChromaDB subdirectory: %s", item)
                         except Exception as e:
-                            print(f"⚠️  Could not delete subdirectory {item}: {e}")
+                            logger.warning("Could not delete subdirectory %s: %s", item, e)
             except Exception as e:
-                print(f"⚠️  Error cleaning ChromaDB directory: {e}")
+                logger.warning("Error cleaning ChromaDB directory: %s", e)
+    
+    @property
+    def archive_collection(self):
+        """Created on first use, so stores without archived items never open it"""
+        if self._archive_collection is None:
+            self._archive_collection = self.client.get_or_create_collection(
+                name=ARCHIVE_COLLECTION,
+                metadata={"hnsw:space": "cosine"}
+            )
+        return self._archive_collection
     
     def _handle_remove_readonly(self, func, path, exc):
         """Handle readonly files on Windows"""
@@ -95,38 +122,119 @@ class VectorStore:
         os.chmod(path, stat.S_IWRITE)
         func(path)
     
+    @staticmethod
+    def _tag_list(tags) -> List[str]:
+        """Tags arrive as a list from the LLM and as comma-joined text from the DB"""
+        if not tags:
+            return []
+        if isinstance(tags, str):
+            return [t.strip() for t in tags.split(',') if t.strip()]
+        return list(tags)
+    
+    @classmethod
+    def build_document(cls, item: Dict) -> str:
+        """Text that gets embedded for an item"""
+        return f"{item.get('title', '')} {item.get('description', '') or ''} {' '.join(cls._tag_list(item.get('tags')))}"
+    
+    @classmethod
+    def build_metadata(cls, item: Dict) -> Dict:
+        """Metadata stored alongside an item's embedding"""
+        return {
+            'type': item.get('type', 'task'),
+            'priority': item.get('priority', 'medium'),
+            'tags': ','.join(cls._tag_list(item.get('tags')))
+        }
+    
+    @staticmethod
+    def _clean_metadata(metadata: Dict) -> Dict:
+        """Chroma only accepts scalar metadata values"""
+        clean_metadata = {}
+        for key, value in metadata.items():
+            if value is None:
+                clean_metadata[key] = ""
+            else:
+                clean_metadata[key] = str(value)
+        return clean_metadata
+    
+    @traced('vector.add_item')
+    @timed('vector_add')
     def add_item(self, item_id: int, text: str, metadata: Dict):
         """Add an item to the vector store"""
         try:
             if not self.collection:
-                print("Warning: Vector store collection not initialized, skipping vector add")
+                logger.warning("Vector store collection not initialized, skipping vector add")
                 return
             
             if not text or not text.strip():
                 text = "untitled"
             
-            clean_metadata = {}
-            for key, value in metadata.items():
-                if value is None:
-                    clean_metadata[key] = ""
-                elif isinstance(value, (list, dict)):
-                    clean_metadata[key] = str(value)
-                else:
-                    clean_metadata[key] = str(value)
-            
             self.collection.add(
                 ids=[str(item_id)],
                 documents=[text],
-                metadatas=[clean_metadata]
+                metadatas=[self._clean_metadata(metadata)]
+            )
+        except Exception as e:
+            logger.warning("Failed to add item to vector store: %s", e, extra={'item_id': item_id})
+    
+    @traced('vector.upsert_items')
+    @timed('vector_add')
+    def upsert_items(self, items: List[Dict]) -> int:
+        """Re-embed items in a single batch, replacing any existing vectors"""
+        if not items:
+            return 0
+        
+        try:
+            if not self.collection:
+                logger.warning("Vector store collection not initialized, skipping vector upsert")
+                return 0
+            
+            documents = []
+            for item in items:
+                text = self.build_document(item)
+                documents.append(text if text.strip() else "untitled")
+            
+            self.collection.upsert(
+                ids=[str(item['id']) for item in items],
+                documents=documents,
+                metadatas=[self._clean_metadata(self.build_metadata(item)) for item in items]
             )
+            return len(items)
         except Exception as e:
-            print(f"Warning: Failed to add item to vector store: {e}")
+            logger.warning("Failed to upsert items in vector store: %s", e)
+            return 0
     
-    def search(self, query: str, n_results: int = 10) -> List[Dict]:
-        """Semantic search for items"""
-        results = self.collection.query(
+    @traced('vector.search')
+    @timed('vector_search')
+    def search(self, query: str, n_results: int = 10, allowed_ids: Optional[Set[int]] = None,
+               include_archived: bool = False) -> List[Dict]:
+        """
+        Semantic search for items. With `allowed_ids` (e.g. from a tag
+        filter) only those items are returned: the nearest
+        n_results * FILTERED_SEARCH_OVERFETCH candidates are fetched and
+        filtered, so a rarely used filter can return fewer than n_results.
+        `include_archived` also searches the archive collection and merges
+        the hits by distance.
+        """
+        if allowed_ids is not None and not allowed_ids:
+            return []
+        collections = [self.collection, self.archive_collection] if include_archived else [self.collection]
+        
+        items = []
+        for collection in collections:
+            items.extend(self._query(collection, query, n_results, allowed_ids))
+        if len(collections) > 1:
+            items.sort(key=lambda item: float('inf') if item['distance'] is None else item['distance'])
+        
+        return items[:n_results]
+    
+    @staticmethod
+    def _query(collection, query: str, n_results: int, allowed_ids: Optional[Set[int]]) -> List[Dict]:
+        fetch = n_results if allowed_ids is None else min(n_results * FILTERED_SEARCH_OVERFETCH, collection.count())
+        if fetch < 1:
+            return []
+        results = collection.query(
             query_texts=[query],
-            n_results=n_results
+            n_results=fetch
         )
         
         if not results['ids'] or not results['ids'][0]:
@@ -134,18 +242,103 @@ class VectorStore:
         
         items = []
         for i in range(len(results['ids'][0])):
+            item_id = int(results['ids'][0][i])
+            if allowed_ids is not None and item_id not in allowed_ids:
+                continue
             items.append({
-                'id': int(results['ids'][0][i]),
+                'id': item_id,
                 'text': results['documents'][0][i],
                 'metadata': results['metadatas'][0][i],
                 'distance': results['distances'][0][i] if 'distances' in results else None
             })
-        
-        return items
+        return items[:n_results]
     
+    @traced('vector.delete_item')
+    @timed('vector_delete')
     def delete_item(self, item_id: int):
         """Delete an item from vector store"""
         try:
             self.collection.delete(ids=[str(item_id)])
         except:
-            pass
\ No newline at end of file
+            pass
+    
+    @traced('vector.delete_items')
+    @timed('vector_delete')
+    def delete_items(self, item_ids: List[int]):
+        """Delete several items' vectors in one call"""
+        if not item_ids:
+            return
+        try:
+            self.collection.delete(ids=[str(item_id) for item_id in item_ids])
+        except Exception as e:
+            logger.warning("Failed to delete items from vector store: %s", e, extra={'count': len(item_ids)})
+    
+    @traced('vector.archive_items')
+    @timed('vector_add')
+    def archive_items(self, item_ids: List[int]) -> int:
+        """Move items' stored vectors to the archive collection (no re-embedding); returns how many moved"""
+        if not item_ids:
+            return 0
+        ids = [str(item_id) for item_id in item_ids]
+        try:
+            stored = self.collection.get(ids=ids, include=['embeddings', 'documents', 'metadatas'])
+            if stored['ids']:
+                self.archive_collection.upsert(
+                    ids=stored['ids'],
+                    embeddings=stored['embeddings'],
+                    documents=stored['documents'],
+                    metadatas=stored['metadatas']
+                )
+            self.collection.delete(ids=ids)
+            return len(stored['ids'])
+        except Exception as e:
+            logger.warning("Failed to move vectors to the archive collection: %s", e, extra={'count': len(item_ids)})
+            return 0
+    
+    @staticmethod
+    def _as_list(embedding) -> List[float]:
+        # Newer chromadb returns numpy arrays
+        return embedding.tolist() if hasattr(embedding, 'tolist') else list(embedding)
+    
+    @traced('vector.get_embeddings')
+    @timed('vector_search')
+    def get_embeddings(self, item_ids: List[int], archived: bool = False) -> Dict[int, List[float]]:
+        """Stored vectors by item id (items without one are left out)"""
+        if not item_ids:
+            return {}
+        collection = self.archive_collection if archived else self.collection
+        stored = collection.get(ids=[str(item_id) for item_id in item_ids], include=['embeddings'])
+        embeddings = stored.get('embeddings')
+        if embeddings is None:
+            return {}
+        return {int(item_id): self._as_list(embedding) for item_id, embedding in zip(stored['ids'], embeddings)}
+    
+    @traced('vector.load_embeddings')
+    @timed('vector_add')
+    def load_embeddings(self, records: List[Dict]) -> int:
+        """
+        Write exported vectors as they are (no embedding model call) in
+        upserts of LOAD_BATCH_SIZE. Records are item dicts with an `embedding`;
+        those with an archived_at go to the archive collection.
+        """
+        loaded = 0
+        for archived in (False, True):
+            batch = [record for record in records
+                     if record.get('embedding') is not None and bool(record.get('archived_at')) == archived]
+            if not batch:
+                continue
+            collection = self.archive_collection if archived else self.collection
+            for start in range(0, len(batch), LOAD_BATCH_SIZE):
+                chunk = batch[start:start + LOAD_BATCH_SIZE]
+                documents = []
+                for record in chunk:
+                    text = self.build_document(record)
+                    documents.append(text if text.strip() else "untitled")
+                collection.upsert(
+                    ids=[str(record['id']) for record in chunk],
+                    embeddings=[record['embedding'] for record in chunk],
+                    documents=documents,
+                    metadatas=[self._clean_metadata(self.build_metadata(record)) for record in chunk]
+                )
+            loaded += len(batch)
+        return loaded
\ No newline at end of file
@@ -0,0 +1,70 @@
+"""
+Microbenchmark for DayViewGenerator.
+
+Compares a cold render (generator built per call, so fonts and the static
+background are loaded every time, as before asset preloading) against a
+warm render that reuses one generator.
+
+Usage (from backend/):
+    python -m visualizer.benchmark --renders 50 --items 12
+"""
+import argparse
+import io
+import tempfile
+import time
+from typing import Dict, List, Tuple
+
+from visualizer.day_view_generator import DayViewGenerator
+
+def sample_items(count: int, date: str = '2026-01-23') -> List[Dict]:
+    """Build a deterministic mix of timed and untimed items for one day"""
+    types = ('task', 'reminder', 'note')
+    priorities = ('high', 'medium', 'low')
+    sources = ('manual', 'calendar', 'email')
+    items = []
+    for i in range(count):
+        items.append({
+            'id': i + 1,
+            'type': types[i % 3],
+            'title': f"Benchmark item {i + 1}",
+            'datetime': f"{date}T{8 + i % 12:02d}:{(i * 7) % 60:02d}:00" if i % 4 else None,
+            'priority': priorities[i % 3],
+            'source': sources[i % 3]
+        })
+    return items
+
+def time_renders(renders: int, items: List[Dict], output_dir: str, cold: bool) -> Tuple[float, float]:
+    """Average milliseconds per render and per PNG encode"""
+    generator = DayViewGenerator(output_dir=output_dir)
+    render_s = 0.0
+    encode_s = 0.0
+    for _ in range(renders):
+        start = time.perf_counter()
+        if cold:
+            generator = DayViewGenerator(output_dir=output_dir)
+        img = generator.render('2026-01-23', items)
+        render_s += time.perf_counter() - start
+        
+        start = time.perf_counter()
+        img.save(io.BytesIO(), format='PNG')
+        encode_s += time.perf_counter() - start
+    return render_s * 1000 / renders, encode_s * 1000 / renders
+
+def main():
+    parser = argparse.ArgumentParser(description="DayViewGenerator render benchmark")
+    parser.add_argument('--renders', type=int, default=30)
+    parser.add_argument('--items', type=int, default=12)
+    args = parser.parse_args()
+    
+    items = sample_items(args.items)
+    with tempfile.TemporaryDirectory() as output_dir:
+        cold_render, cold_encode = time_renders(args.renders, items, output_dir, cold=True)
+        warm_render, warm_encode = time_renders(args.renders, items, output_dir, cold=False)
+    
+    print(f"Renders: {args.renders}, items per day: {args.items}")
+    print(f"Cold (assets loaded per render): {cold_render:.1f} ms render + {cold_encode:.1f} ms encode")
+    print(f"Warm (assets preloaded):         {warm_render:.1f} ms render + {warm_encode:.1f} ms encode")
+    print(f"Render speedup: {cold_render / warm_render:.2f}x")
+
+if __name__ == '__main__':
+    main()
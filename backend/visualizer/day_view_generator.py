@@ -1,13 +1,78 @@
 from PIL import Image, ImageDraw, ImageFont
 from datetime import datetime
-from typing import List, Dict
+from typing import List, Dict, Optional
+import gzip
+import hashlib
+import io
+import json
 import os
+import re
+from metrics import timed
+from tracing import traced
+from utils import local_timezone, normalize_datetime
+
+# Bump whenever the drawing code changes so cached images are re-rendered
+LAYOUT_VERSION = 3
+
+# Item fields that affect the rendered image
+RENDERED_FIELDS = ('id', 'type', 'title', 'datetime', 'datetime_utc', 'priority', 'source')
+
+CACHED_FILENAME_RE = re.compile(
+    r'^(?:day_view_\d{4}-\d{2}-\d{2}|range_view_\d{4}-\d{2}-\d{2}_\d{4}-\d{2}-\d{2})_([0-9a-f]{16})\.(?:png|svg)$'
+)
+
+# Tried in order; arial ships with Windows, DejaVu with most Linux distros
+FONT_CANDIDATES = ('arial.ttf', 'DejaVuSans.ttf')
+
+FONT_SIZES = {
+    'title': 48,
+    'subtitle': 28,
+    'time': 22,
+    'text': 20,
+    'small': 16
+}
+
+# Fixed layout rows (shared by the pre-rendered background and render())
+STATS_Y = 120
+LEGEND_Y = STATS_Y + 90
+TIMELINE_Y = LEGEND_Y + 90
+STAT_BOXES = (
+    (50, "Tasks", 'task'),
+    (300, "Reminders", 'reminder'),
+    (550, "Notes", 'note')
+)
+SOURCE_EMOJI = {'manual': '✍️', 'calendar': '📅', 'email': '📧'}
+
+def item_epoch(item) -> Optional[int]:
+    """UTC epoch of a timed item (the raw datetime text may carry any offset, or none)"""
+    epoch = item.get('datetime_utc')
+    if epoch is None:
+        epoch, _ = normalize_datetime(item.get('datetime'))
+    return epoch
+
+def split_timed(items: List[Dict]) -> tuple:
+    """(items with a time in the order they happen, items without one)"""
+    timed_items = sorted(
+        (item for item in items if item_epoch(item) is not None),
+        key=lambda item: (item_epoch(item), item.get('id') or 0)
+    )
+    return timed_items, [item for item in items if item_epoch(item) is None]
+
+def time_label(item) -> str:
+    """Clock time of a timed item in the local zone"""
+    return datetime.fromtimestamp(item_epoch(item), local_timezone()).strftime('%I:%M %p')
+
+OUTPUT_FORMATS = ('png', 'svg')
 
 class DayViewGenerator:
     """Generate visual day view image from items"""
     
-    def __init__(self, output_dir='backend/static/visualizations'):
+    def __init__(self, output_dir='backend/static/visualizations', compress_level=6, fast_compress_level=1,
+                 storage=None):
         self.output_dir = output_dir
+        self.storage = storage
+        self.compress_level = compress_level
+        self.fast_compress_level = fast_compress_level
         os.makedirs(output_dir, exist_ok=True)
         self.width = 900
         self.height = 1200
@@ -24,62 +89,177 @@ class DayViewGenerator:
             'calendar': (139, 92, 246),
             'email': (236, 72, 153)
         }
-
-    def generate(self, date: str, items: List[Dict]) -> str:
-        """Generate visual day view image"""
         
+        self.theme = 'light'
+        self.theme_signature = json.dumps(
+            {'name': self.theme, 'bg': self.bg_color, 'colors': self.colors, 'size': [self.width, self.height]},
+            sort_keys=True
+        )
+        
+        # Assets are loaded once and reused by every render
+        self.fonts = {name: self._load_font(size) for name, size in FONT_SIZES.items()}
+        self._background = self._render_background()
+
+    @staticmethod
+    def _load_font(size: int):
+        """Load the first available TrueType font, falling back to Pillow's default"""
+        for candidate in FONT_CANDIDATES:
+            try:
+                return ImageFont.truetype(candidate, size)
+            except OSError:
+                continue
+        try:
+            return ImageFont.load_default(size=size)
+        except TypeError:
+            # Pillow < 10.1 has no sized default font
+            return ImageFont.load_default()
+
+    def _render_background(self) -> Image.Image:
+        """Draw everything that does not depend on the day's items"""
         img = Image.new('RGB', (self.width, self.height), self.bg_color)
         draw = ImageDraw.Draw(img)
+        text_font = self.fonts['text']
+        small_font = self.fonts['small']
         
-        # Load fonts
-        try:
-            title_font = ImageFont.truetype("arial.ttf", 48)
-            subtitle_font = ImageFont.truetype("arial.ttf", 28)
-            time_font = ImageFont.truetype("arial.ttf", 22)
-            text_font = ImageFont.truetype("arial.ttf", 20)
-            small_font = ImageFont.truetype("arial.ttf", 16)
-        except:
-            title_font = ImageFont.load_default()
-            subtitle_font = ImageFont.load_default()
-            time_font = ImageFont.load_default()
-            text_font = ImageFont.load_default()
-            small_font = ImageFont.load_default()
+        # Stat box frames and labels (counts are drawn per render)
+        for x, label, item_type in STAT_BOXES:
+            color = self.colors[item_type]
+            draw.rectangle([(x, STATS_Y), (x + 200, STATS_Y + 70)], fill=(255, 255, 255), outline=color, width=3)
+            draw.text((x + 20, STATS_Y + 15), label, fill=(71, 85, 105), font=text_font)
+        
+        # Source legend
+        draw.text((50, LEGEND_Y), "Sources:", fill=(71, 85, 105), font=small_font)
+        self._draw_legend(draw, 150, LEGEND_Y, "✍️ Manual", self.colors['manual'], small_font)
+        self._draw_legend(draw, 300, LEGEND_Y, "📅 Calendar", self.colors['calendar'], small_font)
+        self._draw_legend(draw, 470, LEGEND_Y, "📧 Email", self.colors['email'], small_font)
+        
+        # Timeline heading
+        draw.text((50, TIMELINE_Y), "Timeline", fill=(15, 23, 42), font=self.fonts['subtitle'])
+        
+        return img
+
+    def cache_key(self, date: str, items: List[Dict]) -> str:
+        """Hash of everything that determines how the day renders"""
+        rendered = sorted(
+            ({field: item.get(field) for field in RENDERED_FIELDS} for item in items),
+            key=lambda i: (str(i.get('datetime') or ''), i.get('id') or 0)
+        )
+        payload = json.dumps(
+            [LAYOUT_VERSION, self.theme_signature, date, rendered],
+            sort_keys=True, default=str
+        )
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:16]
+
+    @staticmethod
+    def etag_for(filename: str) -> Optional[str]:
+        """Content hash embedded in a cached image filename, if any"""
+        match = CACHED_FILENAME_RE.match(filename)
+        return match.group(1) if match else None
+
+    def is_cached(self, filename: str) -> bool:
+        """Whether a rendered file is available (index lookup when storage is managed)"""
+        if self.storage is not None:
+            return self.storage.contains(filename)
+        return os.path.exists(os.path.join(self.output_dir, filename))
+
+    def write_file(self, filename: str, data: bytes):
+        """Write atomically so a concurrent request never serves a partial file"""
+        filepath = os.path.join(self.output_dir, filename)
+        tmp_path = f"{filepath}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, filepath)
+        if self.storage is not None:
+            self.storage.record(filename, data)
+
+    def _invalidate_day(self, date: str, key: str):
+        """Remove images (any format) rendered for this date from older item sets"""
+        prefix = f"day_view_{date}"
+        keep_prefix = f"day_view_{date}_{key}."
+        if self.storage is not None:
+            self.storage.remove_matching(prefix, keep_prefix)
+            return
+        for name in os.listdir(self.output_dir):
+            if name.startswith(prefix) and not name.startswith(keep_prefix):
+                try:
+                    os.remove(os.path.join(self.output_dir, name))
+                except OSError:
+                    pass
+
+    @traced('visualizer.encode')
+    @timed('image_render')
+    def encode(self, date: str, items: List[Dict], output_format: str = 'png', fast_encode: bool = False) -> bytes:
+        """Render the day and return the encoded image bytes"""
+        if output_format == 'svg':
+            from visualizer.svg_renderer import render_day_svg
+            return render_day_svg(self, date, items).encode('utf-8')
+        
+        img = self.render(date, items)
+        level = self.fast_compress_level if fast_encode else self.compress_level
+        buffer = io.BytesIO()
+        img.save(buffer, format='PNG', optimize=False, compress_level=level)
+        return buffer.getvalue()
+
+    def save(self, date: str, key: str, output_format: str, data: bytes) -> str:
+        """Store encoded bytes under the cache filename and drop stale renders of the day"""
+        filename = f"day_view_{date}_{key}.{output_format}"
+        if output_format == 'svg':
+            # Publish the gzip sibling first so it exists whenever the .svg does
+            self.write_file(f"{filename}.gz", gzip.compress(data, compresslevel=9))
+        self.write_file(filename, data)
+        self._invalidate_day(date, key)
+        return f"/static/visualizations/{filename}"
+
+    def generate(self, date: str, items: List[Dict], key: Optional[str] = None,
+                 output_format: str = 'png', fast_encode: bool = False) -> str:
+        """
+        Generate visual day view image, reusing the cached file when items are unchanged.
+        
+        output_format 'svg' writes a scalable vector image plus a precompressed
+        .svg.gz sibling; 'png' rasterizes, with fast_encode trading file size
+        for a lower zlib compression level.
+        """
+        if output_format not in OUTPUT_FORMATS:
+            raise ValueError(f"Unsupported output format '{output_format}'")
+        
+        key = key or self.cache_key(date, items)
+        filename = f"day_view_{date}_{key}.{output_format}"
+        
+        if self.is_cached(filename):
+            if self.storage is not None:
+                self.storage.touch(filename)
+            return f"/static/visualizations/{filename}"
+        
+        data = self.encode(date, items, output_format, fast_encode)
+        return self.save(date, key, output_format, data)
+
+    def render(self, date: str, items: List[Dict]) -> Image.Image:
+        """Draw the day view onto a copy of the pre-rendered background"""
+        img = self._background.copy()
+        draw = ImageDraw.Draw(img)
+        
+        time_font = self.fonts['time']
+        text_font = self.fonts['text']
+        small_font = self.fonts['small']
     
         # Header
         date_obj = datetime.fromisoformat(date)
         header_text = date_obj.strftime('%A, %B %d, %Y')
-        draw.text((50, 40), header_text, fill=(15, 23, 42), font=title_font)
+        draw.text((50, 40), header_text, fill=(15, 23, 42), font=self.fonts['title'])
         
         # Stats
-        stats_y = 120
-        total_tasks = len([i for i in items if i['type'] == 'task'])
-        total_reminders = len([i for i in items if i['type'] == 'reminder'])
-        total_notes = len([i for i in items if i['type'] == 'note'])
+        counts = {'task': 0, 'reminder': 0, 'note': 0}
+        for item in items:
+            if item['type'] in counts:
+                counts[item['type']] += 1
         
-        self._draw_stat_box(draw, 50, stats_y, "Tasks", total_tasks, self.colors['task'], text_font)
-        self._draw_stat_box(draw, 300, stats_y, "Reminders", total_reminders, self.colors['reminder'], text_font)
-        self._draw_stat_box(draw, 550, stats_y, "Notes", total_notes, self.colors['note'], text_font)
+        for x, _label, item_type in STAT_BOXES:
+            draw.text((x + 20, STATS_Y + 40), str(counts[item_type]), fill=self.colors[item_type], font=text_font)
         
-        # Source legend
-        legend_y = stats_y + 90
-        draw.text((50, legend_y), "Sources:", fill=(71, 85, 105), font=small_font)
-        self._draw_legend(draw, 150, legend_y, "✍️ Manual", self.colors['manual'], small_font)
-        self._draw_legend(draw, 300, legend_y, "📅 Calendar", self.colors['calendar'], small_font)
-        self._draw_legend(draw, 470, legend_y, "📧 Email", self.colors['email'], small_font)
-        
-        # Timeline
-        timeline_y = legend_y + 90
-        draw.text((50, timeline_y), "Timeline", fill=(15, 23, 42), font=subtitle_font)
-        
-        y_offset = timeline_y + 50
-        
-        # Sort items by datetime
-        sorted_items = sorted(
-            [i for i in items if i.get('datetime')],
-            key=lambda x: x['datetime']
-        )
+        y_offset = TIMELINE_Y + 50
         
-        no_time_items = [i for i in items if not i.get('datetime')]
+        # Sort items by their UTC instant (the raw text may mix offsets)
+        sorted_items, no_time_items = split_timed(items)
         
         # If no items, show message
         if not sorted_items and not no_time_items:
@@ -106,18 +286,7 @@ class DayViewGenerator:
         footer_text = f"Generated by Productivity Assistant • {datetime.now().strftime('%I:%M %p')}"
         draw.text((50, footer_y), footer_text, fill=(148, 163, 184), font=small_font)
         
-        # Save
-        filename = f"day_view_{date}.png"
-        filepath = os.path.join(self.output_dir, filename)
-        img.save(filepath, quality=95)
-    
-        return f"/static/visualizations/{filename}"
-
-    def _draw_stat_box(self, draw, x, y, label, count, color, font):
-        """Draw stat box"""
-        draw.rectangle([(x, y), (x + 200, y + 70)], fill=(255, 255, 255), outline=color, width=3)
-        draw.text((x + 20, y + 15), label, fill=(71, 85, 105), font=font)
-        draw.text((x + 20, y + 40), str(count), fill=color, font=font)
+        return img
 
     def _draw_legend(self, draw, x, y, text, color, font):
         """Draw legend item"""
@@ -146,8 +315,7 @@ class DayViewGenerator:
         )
         
         # Time
-        dt = datetime.fromisoformat(item['datetime'])
-        time_str = dt.strftime('%I:%M %p')
+        time_str = time_label(item)
         draw.text((75, y + 15), time_str, fill=priority_color, font=time_font)
         
         # Title
@@ -162,7 +330,7 @@ class DayViewGenerator:
         draw.text((75, y + 75), priority_badge, fill=priority_color, font=small_font)
         
         # Source
-        source_emoji = {'manual': '✍️', 'calendar': '📅', 'email': '📧'}.get(item.get('source'), '📌')
+        source_emoji = SOURCE_EMOJI.get(item.get('source'), '📌')
         draw.text((230, y + 75), f"{source_emoji} {item.get('source', 'manual').title()}", fill=source_color, font=small_font)
     
         return y + card_height + 15
@@ -172,7 +340,7 @@ class DayViewGenerator:
         draw.ellipse([(50, y + 5), (62, y + 17)], fill=self.colors[item['type']])
         draw.text((75, y), item['title'][:60], fill=(15, 23, 42), font=text_font)
     
-        source_emoji = {'manual': '✍️', 'calendar': '📅', 'email': '📧'}.get(item.get('source'), '📌')
+        source_emoji = SOURCE_EMOJI.get(item.get('source'), '📌')
         draw.text((75, y + 25), f"{source_emoji} {item.get('source', 'manual')}", fill=(100, 116, 139), font=small_font)
         
         return y + 55
\ No newline at end of file
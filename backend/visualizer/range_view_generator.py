@@ -0,0 +1,196 @@
+from PIL import Image
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date as date_cls, timedelta
+from typing import List, Dict, Optional, Tuple
+import calendar
+import hashlib
+import io
+import os
+import threading
+
+from metrics import timed
+from visualizer.day_view_generator import DayViewGenerator, LAYOUT_VERSION
+
+# Each day tile is scaled down by this factor in the composite image
+TILE_SCALE = 3
+GRID_COLUMNS = 7
+GRID_PADDING = 12
+
+# Per-process generator, built once by the pool initializer
+_worker_generator: Optional[DayViewGenerator] = None
+
+def _init_worker(output_dir: str, compress_level: int):
+    global _worker_generator
+    _worker_generator = DayViewGenerator(output_dir=output_dir, compress_level=compress_level)
+
+def _render_tile(date: str, items: List[Dict], output_format: str) -> bytes:
+    # Workers only encode; the parent process owns the files and the storage index
+    return _worker_generator.encode(date, items, output_format)
+
+def range_for_view(view: str, anchor: str) -> Tuple[str, str]:
+    """Return (start, end) ISO dates for the week (Mon-Sun) or month containing anchor"""
+    anchor_date = date_cls.fromisoformat(anchor)
+    if view == 'week':
+        start = anchor_date - timedelta(days=anchor_date.weekday())
+        end = start + timedelta(days=6)
+    elif view == 'month':
+        start = anchor_date.replace(day=1)
+        end = anchor_date.replace(day=calendar.monthrange(anchor_date.year, anchor_date.month)[1])
+    else:
+        raise ValueError(f"Unknown view '{view}', expected 'week' or 'month'")
+    return start.isoformat(), end.isoformat()
+
+class RangeViewGenerator:
+    """Render week/month views as day tiles across a process pool"""
+    
+    def __init__(self, day_generator: DayViewGenerator, max_workers: Optional[int] = None):
+        self.day_generator = day_generator
+        self.output_dir = day_generator.output_dir
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._pool_lock = threading.Lock()
+    
+    def _get_pool(self) -> ProcessPoolExecutor:
+        """Create the worker pool on first use"""
+        with self._pool_lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    initializer=_init_worker,
+                    initargs=(self.output_dir, self.day_generator.compress_level)
+                )
+            return self._pool
+    
+    def shutdown(self):
+        with self._pool_lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=False, cancel_futures=True)
+                self._pool = None
+    
+    @staticmethod
+    def partition_by_day(start: str, end: str, items: List[Dict]) -> Dict[str, List[Dict]]:
+        """Bucket items by their date, with an entry for every day in the range"""
+        start_date = date_cls.fromisoformat(start)
+        days = (date_cls.fromisoformat(end) - start_date).days + 1
+        buckets = {(start_date + timedelta(days=i)).isoformat(): [] for i in range(days)}
+        for item in items:
+            day = item.get('local_date') or (item.get('datetime') or '')[:10]
+            if day in buckets:
+                buckets[day].append(item)
+        return buckets
+    
+    def cache_key(self, start: str, end: str, items: List[Dict]) -> str:
+        """Hash of every day tile's cache key: equal keys mean identical tiles and composite"""
+        buckets = self.partition_by_day(start, end, items)
+        day_keys = [f"{day}:{self.day_generator.cache_key(day, day_items)}" for day, day_items in sorted(buckets.items())]
+        return hashlib.sha256(f"{LAYOUT_VERSION}|{'|'.join(day_keys)}".encode('utf-8')).hexdigest()[:16]
+    
+    def is_cached(self, start: str, end: str, items: List[Dict], output_format: str = 'png',
+                  composite: bool = False) -> bool:
+        """Whether every file the response would link to (tiles, and the composite) is still stored"""
+        buckets = self.partition_by_day(start, end, items)
+        filenames = [
+            f"day_view_{day}_{self.day_generator.cache_key(day, day_items)}.{output_format}"
+            for day, day_items in sorted(buckets.items())
+        ]
+        if composite:
+            filenames.append(self._composite_filename(
+                start, end, [f"/static/visualizations/{filename}" for filename in filenames]
+            ))
+        return all(self.day_generator.is_cached(filename) for filename in filenames)
+    
+    @staticmethod
+    def _composite_filename(start: str, end: str, tile_urls: List[str]) -> str:
+        key = hashlib.sha256(f"{LAYOUT_VERSION}|{'|'.join(tile_urls)}".encode('utf-8')).hexdigest()[:16]
+        return f"range_view_{start}_{end}_{key}.png"
+    
+    def generate_tiles(self, start: str, end: str, items: List[Dict],
+                       output_format: str = 'png') -> Dict[str, Dict]:
+        """Render (or reuse) one day image per date; returns {date: {image_url, items_count}}"""
+        return self._generate_tiles(self.partition_by_day(start, end, items), output_format)
+    
+    def _generate_tiles(self, buckets: Dict[str, List[Dict]], output_format: str) -> Dict[str, Dict]:
+        tiles = {}
+        pending = {}
+        
+        for day, day_items in buckets.items():
+            key = self.day_generator.cache_key(day, day_items)
+            filename = f"day_view_{day}_{key}.{output_format}"
+            tiles[day] = {'image_url': f"/static/visualizations/{filename}", 'items_count': len(day_items)}
+            if not self.day_generator.is_cached(filename):
+                pending[day] = (day_items, key)
+        
+        if len(pending) == 1:
+            # Not worth a round trip through the pool
+            day, (day_items, key) = next(iter(pending.items()))
+            self.day_generator.generate(day, day_items, key=key, output_format=output_format)
+        elif pending:
+            pool = self._get_pool()
+            futures = {
+                day: pool.submit(_render_tile, day, day_items, output_format)
+                for day, (day_items, _key) in pending.items()
+            }
+            with timed('image_render_pool'):
+                rendered = {day: future.result() for day, future in futures.items()}
+            for day, data in rendered.items():
+                self.day_generator.save(day, pending[day][1], output_format, data)
+        
+        return tiles
+    
+    def generate_composite(self, start: str, end: str, items: List[Dict]) -> Tuple[str, Dict[str, Dict]]:
+        """Render the range as one calendar-grid PNG; returns (image_url, tiles)"""
+        buckets = self.partition_by_day(start, end, items)
+        tiles = self._generate_tiles(buckets, 'png')
+        
+        filename = self._composite_filename(start, end, [tiles[day]['image_url'] for day in sorted(tiles)])
+        
+        if not self.day_generator.is_cached(filename):
+            with timed('image_composite'):
+                img = self._composite(start, tiles, buckets)
+                buffer = io.BytesIO()
+                img.save(buffer, format='PNG', optimize=False, compress_level=self.day_generator.compress_level)
+            self.day_generator.write_file(filename, buffer.getvalue())
+            self._invalidate_range(start, end, keep=filename)
+        elif self.day_generator.storage is not None:
+            self.day_generator.storage.touch(filename)
+        
+        return f"/static/visualizations/{filename}", tiles
+    
+    def _composite(self, start: str, tiles: Dict[str, Dict], buckets: Dict[str, List[Dict]]) -> Image.Image:
+        """Lay the day tiles out Monday-first, seven per row"""
+        tile_w = self.day_generator.width // TILE_SCALE
+        tile_h = self.day_generator.height // TILE_SCALE
+        lead = date_cls.fromisoformat(start).weekday()
+        cells = lead + len(tiles)
+        rows = (cells + GRID_COLUMNS - 1) // GRID_COLUMNS
+        
+        width = GRID_COLUMNS * (tile_w + GRID_PADDING) + GRID_PADDING
+        height = rows * (tile_h + GRID_PADDING) + GRID_PADDING
+        canvas = Image.new('RGB', (width, height), self.day_generator.bg_color)
+        
+        for index, day in enumerate(sorted(tiles)):
+            cell = lead + index
+            x = GRID_PADDING + (cell % GRID_COLUMNS) * (tile_w + GRID_PADDING)
+            y = GRID_PADDING + (cell // GRID_COLUMNS) * (tile_h + GRID_PADDING)
+            filename = tiles[day]['image_url'].rsplit('/', 1)[-1]
+            try:
+                with Image.open(os.path.join(self.output_dir, filename)) as tile:
+                    canvas.paste(tile.reduce(TILE_SCALE), (x, y))
+            except OSError:
+                # Tile evicted from storage since it was checked; draw it directly
+                canvas.paste(self.day_generator.render(day, buckets[day]).reduce(TILE_SCALE), (x, y))
+        
+        return canvas
+    
+    def _invalidate_range(self, start: str, end: str, keep: str):
+        """Remove composites rendered for this range from older item sets"""
+        prefix = f"range_view_{start}_{end}_"
+        if self.day_generator.storage is not None:
+            self.day_generator.storage.remove_matching(prefix, keep)
+            return
+        for name in os.listdir(self.output_dir):
+            if name.startswith(prefix) and name != keep:
+                try:
+                    os.remove(os.path.join(self.output_dir, name))
+                except OSError:
+                    pass
@@ -0,0 +1,264 @@
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+import json
+import os
+import threading
+import time
+
+from log_config import get_logger
+from utils import file_lock
+
+logger = get_logger('visualizer.storage')
+
+INDEX_FILENAME = '.index.json'
+LOCK_FILENAME = '.index.lock'
+INDEX_VERSION = 1
+
+class VisualizationStore:
+    """
+    Size-bounded store for rendered visualizations.
+    
+    Files are tracked in an in-memory LRU (filename -> size, last access)
+    that is persisted to a small index file, so lookups never touch the
+    directory and startup reads one JSON file instead of globbing. When the
+    byte budget is exceeded the least recently accessed files are deleted.
+    Optionally the hottest files are also kept in memory for serving.
+    
+    Server workers share the directory: every save merges the on-disk index
+    (other workers' renders, accesses and deletions) under a file lock and
+    evicts against the merged total, so the budget holds across processes.
+    """
+    
+    def __init__(self, directory: str, max_bytes: int, memory_bytes: int = 0, save_interval: float = 5.0):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.memory_bytes = memory_bytes
+        self.save_interval = save_interval
+        self.index_path = os.path.join(directory, INDEX_FILENAME)
+        self.lock_path = os.path.join(directory, LOCK_FILENAME)
+        
+        self._entries: "OrderedDict[str, Dict]" = OrderedDict()
+        self._total_bytes = 0
+        # Names listed in the index at the last merge, and names this process removed since
+        self._synced = set()
+        self._removed = set()
+        self._memory: "OrderedDict[str, bytes]" = OrderedDict()
+        self._memory_total = 0
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._last_save = 0.0
+        
+        os.makedirs(directory, exist_ok=True)
+        self._load_index()
+    
+    @property
+    def total_bytes(self) -> int:
+        return self._total_bytes
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+    
+    def _read_index(self) -> Optional[Dict[str, Tuple[int, float]]]:
+        """name -> (size, accessed) from the index file; None if it is missing or unreadable"""
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') != INDEX_VERSION:
+                raise ValueError("index version mismatch")
+            return {name: (size, accessed) for name, size, accessed in data.get('entries', [])}
+        except (OSError, ValueError, TypeError):
+            return None
+    
+    def _load_index(self):
+        """Load the LRU index, rebuilding it from the directory only if it is missing or unreadable"""
+        disk = self._read_index()
+        if disk is not None:
+            for name, (size, accessed) in sorted(disk.items(), key=lambda item: item[1][1]):
+                self._entries[name] = {'size': size, 'accessed': accessed}
+                self._total_bytes += size
+            self._synced = set(disk)
+            return
+        
+        logger.info("Rebuilding visualization index", extra={'directory': self.directory})
+        found = []
+        with os.scandir(self.directory) as it:
+            for entry in it:
+                if entry.is_file() and not entry.name.startswith('.') and not entry.name.endswith('.tmp'):
+                    stat = entry.stat()
+                    found.append((stat.st_atime, entry.name, stat.st_size))
+        for accessed, name, size in sorted(found):
+            self._entries[name] = {'size': size, 'accessed': accessed}
+            self._total_bytes += size
+        self._dirty = True
+        with self._lock:
+            self._evict_locked()
+        self.save(force=True)
+    
+    def save(self, force: bool = False):
+        """Merge with the on-disk index, evict over budget and persist it, if anything changed (throttled unless forced)"""
+        with self._lock:
+            if not self._dirty:
+                return
+            now = time.time()
+            if not force and now - self._last_save < self.save_interval:
+                return
+            self._dirty = False
+            self._last_save = now
+        
+        tmp_path = f"{self.index_path}.{os.getpid()}.tmp"
+        try:
+            with file_lock(self.lock_path):
+                disk = self._read_index()
+                with self._lock:
+                    if disk is not None:
+                        self._merge_locked(disk)
+                    self._evict_locked()
+                    payload = {
+                        'version': INDEX_VERSION,
+                        'entries': [[name, e['size'], e['accessed']] for name, e in self._entries.items()]
+                    }
+                    self._synced = set(self._entries)
+                    self._removed.clear()
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    json.dump(payload, f, separators=(',', ':'))
+                os.replace(tmp_path, self.index_path)
+        except OSError as e:
+            logger.warning("Failed to save visualization index: %s", e)
+    
+    def _merge_locked(self, disk: Dict[str, Tuple[int, float]]):
+        """Fold in what other processes recorded, accessed or deleted since our last merge"""
+        for name, (size, accessed) in disk.items():
+            if name in self._removed:
+                continue
+            entry = self._entries.get(name)
+            if entry is None:
+                self._entries[name] = {'size': size, 'accessed': accessed}
+                self._total_bytes += size
+            elif accessed > entry['accessed']:
+                entry['accessed'] = accessed
+        # Listed at our last merge but gone now: another process evicted or removed it
+        for name in [name for name in self._entries if name in self._synced and name not in disk]:
+            self._forget_locked(name)
+        self._entries = OrderedDict(sorted(self._entries.items(), key=lambda item: item[1]['accessed']))
+    
+    def contains(self, filename: str) -> bool:
+        """O(1) check whether a rendered file is stored"""
+        return filename in self._entries
+    
+    def touch(self, filename: str) -> bool:
+        """Mark a file as recently used; returns False if it is not stored"""
+        with self._lock:
+            entry = self._entries.get(filename)
+            if entry is None:
+                return False
+            entry['accessed'] = time.time()
+            self._entries.move_to_end(filename)
+            if filename in self._memory:
+                self._memory.move_to_end(filename)
+            self._dirty = True
+        self.save()
+        return True
+    
+    def record(self, filename: str, data: Optional[bytes] = None):
+        """Register a newly written file and evict old ones if over budget"""
+        path = os.path.join(self.directory, filename)
+        try:
+            size = len(data) if data is not None else os.path.getsize(path)
+        except OSError:
+            return
+        
+        with self._lock:
+            previous = self._entries.pop(filename, None)
+            if previous:
+                self._total_bytes -= previous['size']
+            self._entries[filename] = {'size': size, 'accessed': time.time()}
+            self._synced.discard(filename)
+            self._removed.discard(filename)
+            self._total_bytes += size
+            if data is not None:
+                self._remember_locked(filename, data)
+            self._dirty = True
+            self._evict_locked()
+        self.save()
+    
+    def remove(self, filename: str):
+        """Delete a stored file"""
+        with self._lock:
+            self._remove_locked(filename)
+            self._dirty = True
+        self.save()
+    
+    def remove_matching(self, prefix: str, keep_prefix: str):
+        """Delete stored files starting with prefix, except those starting with keep_prefix"""
+        with self._lock:
+            stale = [name for name in self._entries if name.startswith(prefix) and not name.startswith(keep_prefix)]
+            for name in stale:
+                self._remove_locked(name)
+            if stale:
+                self._dirty = True
+        self.save()
+    
+    def read(self, filename: str) -> Optional[bytes]:
+        """Return file contents from the memory tier, loading them if there is room"""
+        if not self.memory_bytes or filename not in self._entries:
+            return None
+        
+        with self._lock:
+            data = self._memory.get(filename)
+            if data is not None:
+                self._memory.move_to_end(filename)
+                return data
+        
+        try:
+            with open(os.path.join(self.directory, filename), 'rb') as f:
+                data = f.read()
+        except OSError:
+            return None
+        
+        with self._lock:
+            self._remember_locked(filename, data)
+        return data
+    
+    def _remember_locked(self, filename: str, data: bytes):
+        if not self.memory_bytes or len(data) > self.memory_bytes:
+            return
+        previous = self._memory.pop(filename, None)
+        if previous is not None:
+            self._memory_total -= len(previous)
+        self._memory[filename] = data
+        self._memory_total += len(data)
+        while self._memory_total > self.memory_bytes:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_total -= len(evicted)
+    
+    def _forget_locked(self, filename: str):
+        entry = self._entries.pop(filename, None)
+        if entry:
+            self._total_bytes -= entry['size']
+        cached = self._memory.pop(filename, None)
+        if cached is not None:
+            self._memory_total -= len(cached)
+    
+    def _remove_locked(self, filename: str):
+        self._forget_locked(filename)
+        self._removed.add(filename)
+        try:
+            os.remove(os.path.join(self.directory, filename))
+        except OSError:
+            pass
+    
+    def _evict_locked(self):
+        """Drop least recently accessed files until under the byte budget"""
+        while self._total_bytes > self.max_bytes and len(self._entries) > 1:
+            oldest = next(iter(self._entries))
+            self._remove_locked(oldest)
+
+def read_index_summary(directory: str) -> Optional[Dict]:
+    """Cheap stats from the index file without scanning the directory"""
+    try:
+        with open(os.path.join(directory, INDEX_FILENAME), 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        entries = data.get('entries', [])
+        return {'files': len(entries), 'bytes': sum(e[1] for e in entries)}
+    except (OSError, ValueError, TypeError, IndexError):
+        return None
@@ -0,0 +1,127 @@
+from datetime import datetime
+from typing import List, Dict, Tuple
+from xml.sax.saxutils import escape
+
+from visualizer.day_view_generator import (
+    FONT_SIZES, STATS_Y, LEGEND_Y, TIMELINE_Y, STAT_BOXES, SOURCE_EMOJI, split_timed, time_label
+)
+
+FONT_FAMILY = "Arial, 'DejaVu Sans', sans-serif"
+
+def _rgb(color: Tuple[int, int, int]) -> str:
+    return '#%02x%02x%02x' % tuple(color)
+
+class SvgDayRenderer:
+    """Render the day view as SVG using the same layout as DayViewGenerator.render"""
+    
+    def __init__(self, generator):
+        self.gen = generator
+        self.colors = generator.colors
+        self.parts: List[str] = []
+    
+    def _text(self, x, y, text, color, size_name, weight=None):
+        weight_attr = f' font-weight="{weight}"' if weight else ''
+        self.parts.append(
+            f'<text x="{x}" y="{y}" fill="{_rgb(color)}" font-size="{FONT_SIZES[size_name]}"'
+            f'{weight_attr}>{escape(text)}</text>'
+        )
+    
+    def _rect(self, x1, y1, x2, y2, fill, outline=None, width=0):
+        stroke = f' stroke="{_rgb(outline)}" stroke-width="{width}"' if outline else ''
+        self.parts.append(
+            f'<rect x="{x1}" y="{y1}" width="{x2 - x1}" height="{y2 - y1}" fill="{_rgb(fill)}"{stroke}/>'
+        )
+    
+    def _dot(self, x, y, color):
+        self.parts.append(f'<circle cx="{x + 6}" cy="{y + 6}" r="6" fill="{_rgb(color)}"/>')
+    
+    def render(self, date: str, items: List[Dict]) -> str:
+        gen = self.gen
+        self.parts = [
+            f'<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 {gen.width} {gen.height}" '
+            f'width="{gen.width}" height="{gen.height}" font-family="{FONT_FAMILY}" dominant-baseline="hanging">',
+            f'<rect width="100%" height="100%" fill="{_rgb(gen.bg_color)}"/>'
+        ]
+        
+        # Header
+        header_text = datetime.fromisoformat(date).strftime('%A, %B %d, %Y')
+        self._text(50, 40, header_text, (15, 23, 42), 'title')
+        
+        # Stats
+        counts = {'task': 0, 'reminder': 0, 'note': 0}
+        for item in items:
+            if item['type'] in counts:
+                counts[item['type']] += 1
+        
+        for x, label, item_type in STAT_BOXES:
+            color = self.colors[item_type]
+            self._rect(x, STATS_Y, x + 200, STATS_Y + 70, (255, 255, 255), color, 3)
+            self._text(x + 20, STATS_Y + 15, label, (71, 85, 105), 'text')
+            self._text(x + 20, STATS_Y + 40, str(counts[item_type]), color, 'text')
+        
+        # Source legend
+        self._text(50, LEGEND_Y, "Sources:", (71, 85, 105), 'small')
+        for x, label, source in ((150, "✍️ Manual", 'manual'), (300, "📅 Calendar", 'calendar'), (470, "📧 Email", 'email')):
+            self._dot(x, LEGEND_Y + 2, self.colors[source])
+            self._text(x + 20, LEGEND_Y, label, (71, 85, 105), 'small')
+        
+        # Timeline
+        self._text(50, TIMELINE_Y, "Timeline", (15, 23, 42), 'subtitle')
+        y_offset = TIMELINE_Y + 50
+        
+        sorted_items, no_time_items = split_timed(items)
+        
+        if not sorted_items and not no_time_items:
+            self._text(50, y_offset, "No items scheduled for this day", (148, 163, 184), 'text')
+            self._text(50, y_offset + 60, "Add tasks, notes, or reminders to see them here!", (203, 213, 225), 'small')
+        else:
+            for item in sorted_items[:10]:
+                if y_offset < gen.height - 200:
+                    y_offset = self._timeline_item(item, y_offset)
+            
+            if no_time_items and y_offset < gen.height - 200:
+                self._text(50, y_offset, "No Specific Time", (100, 116, 139), 'text')
+                y_offset += 40
+                
+                for item in no_time_items[:5]:
+                    if y_offset < gen.height - 200:
+                        y_offset = self._simple_item(item, y_offset)
+        
+        # Footer
+        footer_text = f"Generated by Productivity Assistant • {datetime.now().strftime('%I:%M %p')}"
+        self._text(50, gen.height - 60, footer_text, (148, 163, 184), 'small')
+        
+        self.parts.append('</svg>')
+        return '\n'.join(self.parts)
+    
+    def _timeline_item(self, item: Dict, y: int) -> int:
+        card_height = 110
+        priority_color = self.colors.get(item.get('priority', 'medium'), self.colors['medium'])
+        source_color = self.colors.get(item.get('source', 'manual'), self.colors['manual'])
+        
+        self._rect(50, y, 850, y + card_height, (255, 255, 255), priority_color, 4)
+        self._rect(50, y, 58, y + card_height, source_color)
+        
+        time_str = time_label(item)
+        self._text(75, y + 15, time_str, priority_color, 'time')
+        self._text(230, y + 15, item['title'][:50], (15, 23, 42), 'text')
+        self._text(75, y + 50, f"[{item['type'].upper()}]", self.colors[item['type']], 'small')
+        self._text(75, y + 75, item.get('priority', 'medium').upper(), priority_color, 'small')
+        
+        source_emoji = SOURCE_EMOJI.get(item.get('source'), '📌')
+        self._text(230, y + 75, f"{source_emoji} {item.get('source', 'manual').title()}", source_color, 'small')
+        
+        return y + card_height + 15
+    
+    def _simple_item(self, item: Dict, y: int) -> int:
+        self._dot(50, y + 5, self.colors[item['type']])
+        self._text(75, y, item['title'][:60], (15, 23, 42), 'text')
+        
+        source_emoji = SOURCE_EMOJI.get(item.get('source'), '📌')
+        self._text(75, y + 25, f"{source_emoji} {item.get('source', 'manual')}", (100, 116, 139), 'small')
+        
+        return y + 55
+
+def render_day_svg(generator, date: str, items: List[Dict]) -> str:
+    """Render a day view as an SVG document"""
+    return SvgDayRenderer(generator).render(date, items)
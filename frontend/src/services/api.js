@@ -91,4 +91,14 @@ export const visualizeDay = async (date) => {
   } catch (error) {
     throw error.response?.data || { error: 'Network error' };
   }
+};
+
+// Generate a week or month view ('composite' image or per-day 'tiles')
+export const visualizeRange = async (date, view = 'week', output = 'composite') => {
+  try {
+    const response = await axios.post(`${API_BASE_URL}/visualize/range`, { date, view, output });
+    return response.data;
+  } catch (error) {
+    throw error.response?.data || { error: 'Network error' };
+  }
 };
\ No newline at end of file